@@ -3,6 +3,23 @@ from flask import Flask
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
 from .models import db
+from .encoding import init_json
+from .metrics import request_metrics
+from .replicas import replica_router
+from .compression import compressor
+from .ratelimit import rate_limiter
+from .passwords import password_hasher
+from .auth import user_cache
+from .cache import product_page_cache
+from .reference import reference_cache
+from .versions import data_versions
+from .search import search_engine
+from .autocomplete import autocomplete
+from .facets import facet_counter
+from .reviews import review_stats
+from .substitutes import substitute_tracker
+from .categories import category_tree_maintainer
+from . import inventory, export, importer
 from config import config_map
 from .routes import api_bp
 import os
@@ -14,6 +31,7 @@ def create_app(config_name=None):
     
     app = Flask(__name__)
     app.config.from_object(config_map.get(config_name, config_map['default']))
+    init_json(app)
 
     # Initialize extensions
     CORS(app, 
@@ -21,7 +39,25 @@ def create_app(config_name=None):
          supports_credentials=True)  # Enable Cross-Origin Resource Sharing
     
     jwt = JWTManager(app)
+    replica_router.init_app(app)  # before db, so the replica binds get engines
     db.init_app(app)
+    request_metrics.init_app(app)  # first, so its after_request hook runs last
+    compressor.init_app(app)
+    rate_limiter.init_app(app)
+    password_hasher.init_app(app)
+    user_cache.init_app(app)
+    product_page_cache.init_app(app)
+    reference_cache.init_app(app)
+    data_versions.init_app(app)
+    search_engine.init_app(app)
+    autocomplete.init_app(app)
+    facet_counter.init_app(app)
+    review_stats.init_app(app)
+    substitute_tracker.init_app(app)
+    category_tree_maintainer.init_app(app)
+    inventory.init_app(app)
+    export.init_app(app)
+    importer.init_app(app)
     
     # JWT error handlers
     @jwt.expired_token_loader
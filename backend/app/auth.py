@@ -0,0 +1,124 @@
+# backend/app/auth.py
+from flask import g
+from flask_jwt_extended import get_jwt, get_jwt_identity
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+from .models import db, User
+from .cache import LRUCache
+
+USER_COLUMNS = ('id', 'username', 'email', 'first_name', 'last_name', 'is_active')
+
+
+class CachedUser:
+    """Read-only snapshot of a User row, safe to share between requests"""
+    __slots__ = USER_COLUMNS
+
+    def __init__(self, row):
+        for column in USER_COLUMNS:
+            object.__setattr__(self, column, getattr(row, column))
+
+    def __setattr__(self, name, value):
+        raise AttributeError('CachedUser is read-only')
+
+    def to_dict(self):
+        return {column: getattr(self, column) for column in USER_COLUMNS}
+
+
+def token_claims(user):
+    """Stable claims embedded in issued tokens so requests can skip the lookup"""
+    return {'uid': user.id}
+
+
+class UserCache:
+    """Bounded per-process cache of user snapshots keyed by user id.
+
+    ORM commits that touch a User (edits, deactivation, deletion) evict it
+    from this process immediately; other processes pick the change up when
+    their entry's TTL runs out. Core UPDATEs on users should call
+    invalidate().
+    """
+
+    def __init__(self, app=None):
+        self.cache = LRUCache()
+        self.enabled = True
+        self._listening = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('USER_CACHE_ENABLED', True)
+        self.cache = LRUCache(
+            maxsize=app.config.get('USER_CACHE_SIZE', 4096),
+            ttl=app.config.get('USER_CACHE_TTL', 60)
+        )
+        if not self._listening:
+            self._listening = True
+            event.listen(Session, 'after_flush', self._after_flush)
+            event.listen(Session, 'after_commit', self._after_commit)
+            event.listen(Session, 'after_soft_rollback', self._after_rollback)
+
+    def get(self, user_id):
+        """Snapshot for `user_id`, loading it with one column query on a miss"""
+        if self.enabled:
+            user = self.cache.get(user_id)
+            if user is not None:
+                return user
+        generation = self.cache.generation()
+        row = db.session.execute(
+            select(*(getattr(User, column) for column in USER_COLUMNS)).where(User.id == user_id)
+        ).first()
+        if row is None:
+            return None
+        user = CachedUser(row)
+        if self.enabled:
+            self.cache.set(user_id, user, {('user', user_id)}, generation)
+        return user
+
+    def invalidate(self, user_id):
+        self.cache.invalidate_tags([('user', user_id)])
+
+    def clear(self):
+        self.cache.clear()
+
+    def stats(self):
+        stats = self.cache.stats()
+        stats['enabled'] = self.enabled
+        return stats
+
+    # --- Session event hooks ---
+    def _after_flush(self, session, flush_context):
+        pending = session.info.setdefault('user_cache_ids', set())
+        for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+            if isinstance(obj, User) and obj.id is not None:
+                pending.add(obj.id)
+
+    def _after_commit(self, session):
+        user_ids = session.info.pop('user_cache_ids', None)
+        if user_ids:
+            self.cache.invalidate_tags([('user', user_id) for user_id in user_ids])
+
+    def _after_rollback(self, session, previous_transaction):
+        if previous_transaction.parent is None:
+            session.info.pop('user_cache_ids', None)
+
+
+def current_user():
+    """The authenticated, active user for this request, or None.
+
+    Resolved once per request from the token's `uid` claim through the user
+    cache. Tokens issued before the claim existed fall back to a username
+    lookup.
+    """
+    if 'current_user' in g:
+        return g.current_user
+    user_id = get_jwt().get('uid')
+    if user_id is None:
+        user_id = db.session.scalar(select(User.id).where(User.username == get_jwt_identity()))
+    user = user_cache.get(user_id) if user_id is not None else None
+    if user is not None and not user.is_active:
+        user = None
+    g.current_user = user
+    return user
+
+
+user_cache = UserCache()
@@ -0,0 +1,333 @@
+# backend/app/autocomplete.py
+import bisect
+import heapq
+import threading
+import time
+from collections import OrderedDict
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+from .models import db, Product, ProductSalt, Salt, Manufacturer, OrderItem, ProductReviewStats
+from .replicas import replica_router
+from .search import tokenize
+
+# Suggestion groups, in response order
+SUGGESTION_KINDS = ('products', 'salts', 'manufacturers')
+
+
+class _Node:
+    __slots__ = ('children', 'top', 'ids', 'count')
+
+    def __init__(self):
+        self.children = {}
+        self.top = []     # best sort keys in this subtree, ascending
+        self.ids = None   # entries having a token that ends here
+        self.count = 0    # token occurrences in this subtree
+
+
+class PrefixIndex:
+    """Character trie over the tokens of entry labels.
+
+    Every node caches the top-k entries of its subtree by popularity, so a
+    one-token prefix lookup is a walk of len(prefix) nodes plus a slice.
+    Multi-token queries walk the most selective token's subtree in
+    popularity order (cached per prefix until the next write) and stop at
+    `limit` entries matching every token.
+    """
+
+    ranked_cache_size = 256
+
+    def __init__(self, top_k=10):
+        self.top_k = top_k
+        self.nodes = 1
+        self._root = _Node()
+        self._entries = {}  # id -> (sort key, label, ' token token ...')
+        self._ranked = OrderedDict()  # prefix -> subtree sort keys, ascending
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, entry_id, label, popularity=0):
+        self.remove(entry_id)
+        key = (-popularity, entry_id)
+        tokens = list(dict.fromkeys(tokenize(label)))
+        self._entries[entry_id] = (key, label, ' ' + ' '.join(tokens))
+        self._ranked.clear()
+        for token in tokens:
+            node = self._root
+            for char in token:
+                child = node.children.get(char)
+                if child is None:
+                    child = node.children[char] = _Node()
+                    self.nodes += 1
+                node = child
+                node.count += 1
+                self._offer(node, key)
+            if node.ids is None:
+                node.ids = set()
+            node.ids.add(entry_id)
+
+    def remove(self, entry_id):
+        entry = self._entries.pop(entry_id, None)
+        if entry is None:
+            return
+        key, _, haystack = entry
+        self._ranked.clear()
+        paths = []
+        for token in haystack.split():
+            path = self._path(token)
+            path[-1].ids.discard(entry_id)
+            for node in path[1:]:
+                node.count -= 1
+            paths.append((token, path))
+        # Deepest nodes first, so each node rebuilds from up-to-date children
+        for token, path in paths:
+            for depth in range(len(path) - 1, 0, -1):
+                node, parent = path[depth], path[depth - 1]
+                if not node.count:
+                    if parent.children.pop(token[depth - 1], None) is not None:
+                        self.nodes -= 1
+                elif key in node.top:
+                    node.top = self._collect(node)
+
+    def lookup(self, query, limit=10):
+        """[(id, label, popularity)] best first for entries matching every query token as a prefix"""
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return []
+        if len(tokens) == 1:
+            node = self._find(tokens[0])
+            keys = node.top[:limit] if node is not None else []
+        else:
+            keys = self._match_all(tokens, limit)
+        return [(entry_id, self._entries[entry_id][1], -popularity) for popularity, entry_id in keys]
+
+    def _offer(self, node, key):
+        top = node.top
+        if key in top:
+            return
+        if len(top) < self.top_k:
+            bisect.insort(top, key)
+        elif key < top[-1]:
+            bisect.insort(top, key)
+            top.pop()
+
+    def _collect(self, node):
+        candidates = set(child_key for child in node.children.values() for child_key in child.top)
+        if node.ids:
+            candidates.update(self._entries[entry_id][0] for entry_id in node.ids)
+        return heapq.nsmallest(self.top_k, candidates)
+
+    def _find(self, prefix):
+        node = self._root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return None
+        return node
+
+    def _path(self, token):
+        path = [self._root]
+        for char in token:
+            path.append(path[-1].children[char])
+        return path
+
+    def _ranked_keys(self, prefix, node):
+        keys = self._ranked.get(prefix)
+        if keys is None:
+            ids, stack = set(), [node]
+            while stack:
+                node = stack.pop()
+                stack.extend(node.children.values())
+                if node.ids:
+                    ids.update(node.ids)
+            keys = self._ranked[prefix] = sorted(self._entries[entry_id][0] for entry_id in ids)
+            if len(self._ranked) > self.ranked_cache_size:
+                self._ranked.popitem(last=False)
+        else:
+            self._ranked.move_to_end(prefix)
+        return keys
+
+    def _match_all(self, tokens, limit):
+        nodes = [self._find(token) for token in tokens]
+        if None in nodes:
+            return []
+        anchor = min(range(len(tokens)), key=lambda i: nodes[i].count)
+        needles = [' ' + token for i, token in enumerate(tokens) if i != anchor]
+        matches = []
+        for key in self._ranked_keys(tokens[anchor], nodes[anchor]):
+            haystack = self._entries[key[1]][2]
+            if all(needle in haystack for needle in needles):
+                matches.append(key)
+                if len(matches) == limit:
+                    break
+        return matches
+
+
+def product_entries(ids=None):
+    """(id, name, popularity) of active products; popularity is reviews plus order lines"""
+    ordered = select(OrderItem.product_id, func.count(OrderItem.id).label('lines')).group_by(
+        OrderItem.product_id
+    ).subquery()
+    stmt = select(
+        Product.id, Product.name,
+        func.coalesce(ProductReviewStats.review_count, 0) + func.coalesce(ordered.c.lines, 0)
+    ).outerjoin(ProductReviewStats, ProductReviewStats.product_id == Product.id).outerjoin(
+        ordered, ordered.c.product_id == Product.id
+    ).where(Product.is_active == True)
+    if ids is not None:
+        stmt = stmt.where(Product.id.in_(ids))
+    return db.session.execute(stmt).all()
+
+
+def salt_entries(ids=None):
+    """(id, name, popularity) of salts; popularity is the number of active products containing it"""
+    stmt = select(Salt.id, Salt.name, func.count(Product.id)).outerjoin(
+        ProductSalt, ProductSalt.salt_id == Salt.id
+    ).outerjoin(
+        Product, (Product.id == ProductSalt.product_id) & (Product.is_active == True)
+    ).group_by(Salt.id, Salt.name)
+    if ids is not None:
+        stmt = stmt.where(Salt.id.in_(ids))
+    return db.session.execute(stmt).all()
+
+
+def manufacturer_entries(ids=None):
+    """(id, name, popularity) of manufacturers; popularity is their active product count"""
+    stmt = select(Manufacturer.id, Manufacturer.name, func.count(Product.id)).outerjoin(
+        Product, (Product.manufacturer_id == Manufacturer.id) & (Product.is_active == True)
+    ).group_by(Manufacturer.id, Manufacturer.name)
+    if ids is not None:
+        stmt = stmt.where(Manufacturer.id.in_(ids))
+    return db.session.execute(stmt).all()
+
+
+ENTRY_LOADERS = {
+    'products': product_entries,
+    'salts': salt_entries,
+    'manufacturers': manufacturer_entries
+}
+
+
+class Autocompleter:
+    """Popularity-ranked name suggestions for products, salts and manufacturers.
+
+    Indexes are built on first use. Committed ORM changes are queued by
+    session events and applied before the next lookup (a deactivated product
+    is dropped, a renamed one re-indexed). Popularity only moves on the full
+    rebuild every AUTOCOMPLETE_REBUILD_SECONDS, so order and review traffic
+    never touches the index.
+    """
+
+    def __init__(self, app=None):
+        self.top_k = 10
+        self.rebuild_seconds = 3600
+        self.indexes = {kind: PrefixIndex() for kind in SUGGESTION_KINDS}
+        self._built_at = None
+        self._pending = set()
+        self._lock = threading.RLock()           # guards lookups against index writes
+        self._refresh_lock = threading.Lock()    # one rebuild or update at a time
+        self._pending_lock = threading.Lock()
+        self._listening = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.top_k = app.config.get('AUTOCOMPLETE_TOP_K', 10)
+        self.rebuild_seconds = app.config.get('AUTOCOMPLETE_REBUILD_SECONDS', 3600)
+        self.indexes = {kind: PrefixIndex(self.top_k) for kind in SUGGESTION_KINDS}
+        self._built_at = None
+        self._pending = set()
+        if not self._listening:
+            self._listening = True
+            event.listen(Session, 'after_flush', self._after_flush)
+            event.listen(Session, 'after_commit', self._after_commit)
+            event.listen(Session, 'after_soft_rollback', self._after_rollback)
+
+    def rebuild(self):
+        with self._refresh_lock:
+            self._rebuild()
+
+    def _rebuild(self):
+        """Build fresh indexes off to the side and swap them in; lookups keep
+        using the old ones meanwhile"""
+        with self._pending_lock:
+            self._pending.clear()
+        indexes = {}
+        for kind, loader in ENTRY_LOADERS.items():
+            index = indexes[kind] = PrefixIndex(self.top_k)
+            # Best first, so most offers are rejected without an insert
+            for entry_id, label, popularity in sorted(loader(), key=lambda row: (-row[2], row[0])):
+                index.add(entry_id, label, popularity)
+        with self._lock:
+            self.indexes = indexes
+            self._built_at = time.monotonic()
+
+    def invalidate(self):
+        """Rebuild from scratch on next use (after bulk writes that bypass the ORM)"""
+        self._built_at = None
+
+    def _stale(self):
+        return self._built_at is None or time.monotonic() - self._built_at > self.rebuild_seconds
+
+    def refresh(self):
+        """Build (or periodically rebuild) the indexes, then apply queued changes"""
+        if not self._pending and not self._stale():
+            return
+        with self._refresh_lock, replica_router.primary():
+            if self._stale():
+                self._rebuild()
+                return
+            with self._pending_lock:
+                pending, self._pending = self._pending, set()
+            for kind, loader in ENTRY_LOADERS.items():
+                ids = [key for pending_kind, key in pending if pending_kind == kind]
+                if not ids:
+                    continue
+                rows = loader(ids)
+                with self._lock:
+                    index = self.indexes[kind]
+                    for entry_id in set(ids) - {row[0] for row in rows}:
+                        index.remove(entry_id)
+                    for entry_id, label, popularity in rows:
+                        index.add(entry_id, label, popularity)
+
+    def suggest(self, query, limit=5, kinds=SUGGESTION_KINDS):
+        """{kind: [{'id', 'name', 'popularity'}]} for a partially typed query"""
+        self.refresh()
+        limit = max(1, min(limit, self.top_k))
+        with self._lock:
+            return {
+                kind: [
+                    {'id': entry_id, 'name': label, 'popularity': popularity}
+                    for entry_id, label, popularity in self.indexes[kind].lookup(query, limit)
+                ]
+                for kind in kinds
+            }
+
+    def stats(self):
+        with self._lock:
+            return {kind: {'entries': len(index), 'nodes': index.nodes} for kind, index in self.indexes.items()}
+
+    # --- Session event hooks ---
+    def _after_flush(self, session, flush_context):
+        pending = session.info.setdefault('autocomplete_pending', set())
+        for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+            if isinstance(obj, Product):
+                pending.add(('products', obj.id))
+            elif isinstance(obj, Salt):
+                pending.add(('salts', obj.id))
+            elif isinstance(obj, Manufacturer):
+                pending.add(('manufacturers', obj.id))
+
+    def _after_commit(self, session):
+        pending = session.info.pop('autocomplete_pending', None)
+        if pending:
+            with self._pending_lock:
+                self._pending.update(pending)
+
+    def _after_rollback(self, session, previous_transaction):
+        if previous_transaction.parent is None:
+            session.info.pop('autocomplete_pending', None)
+
+
+autocomplete = Autocompleter()
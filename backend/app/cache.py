@@ -0,0 +1,219 @@
+# backend/app/cache.py
+import threading
+import time
+from collections import OrderedDict
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from .conditional import make_etag
+from .models import Product, ProductSalt, Substitute, FAQ, Review, Salt, Manufacturer, Category
+
+
+class LRUCache:
+    """Thread-safe LRU cache with per-entry TTL and dependency tags"""
+
+    def __init__(self, maxsize=1024, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, value, tags)
+        self._tag_index = {}           # tag -> set of keys depending on it
+        self._lock = threading.RLock()
+        self._generation = 0           # bumped on every invalidation
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value, _ = entry
+            if expires_at < time.monotonic():
+                self._remove(key)
+                self.evictions += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def peek(self, key):
+        """Like get() but without touching recency or hit/miss counters"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                return None
+            return entry[1]
+
+    def generation(self):
+        """Snapshot to pass to set() so a value built during a write is not stored"""
+        with self._lock:
+            return self._generation
+
+    def set(self, key, value, tags=(), generation=None):
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return False
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, value, frozenset(tags))
+            for tag in tags:
+                self._tag_index.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.maxsize:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+            return True
+
+    def invalidate_tags(self, tags):
+        with self._lock:
+            self._generation += 1
+            for tag in tags:
+                for key in list(self._tag_index.get(tag, ())):
+                    self._remove(key)
+                    self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._tag_index.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations
+            }
+
+    def _remove(self, key):
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tag_index.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tag_index[tag]
+
+
+def _history_values(obj, attr):
+    """Current and previous values of a column, so moves invalidate both sides"""
+    history = inspect(obj).attrs[attr].history
+    values = set(history.added or ()) | set(history.deleted or ()) | set(history.unchanged or ())
+    return {value for value in values if value is not None}
+
+
+def _tags_for(obj):
+    """Cache tags a changed row invalidates"""
+    tags = set()
+    if isinstance(obj, Product):
+        tags.add(('product', obj.id))
+        tags.update(('category', cid) for cid in _history_values(obj, 'category_id'))
+    elif isinstance(obj, ProductSalt):
+        tags.update(('product', pid) for pid in _history_values(obj, 'product_id'))
+        tags.update(('salt', sid) for sid in _history_values(obj, 'salt_id'))
+    elif isinstance(obj, Substitute):
+        tags.update(('product', pid) for pid in _history_values(obj, 'product_id'))
+    elif isinstance(obj, FAQ):
+        tags.update(('product', pid) for pid in _history_values(obj, 'product_id'))
+        tags.update(('salt', sid) for sid in _history_values(obj, 'salt_id'))
+    elif isinstance(obj, Review):
+        tags.update(('product', pid) for pid in _history_values(obj, 'product_id'))
+    elif isinstance(obj, Salt):
+        tags.add(('salt', obj.id))
+    elif isinstance(obj, Manufacturer):
+        tags.add(('manufacturer', obj.id))
+    elif isinstance(obj, Category):
+        tags.add(('category', obj.id))
+    return tags
+
+
+class ProductPageCache:
+    """Assembled product page payloads keyed by product id.
+
+    Entries are tagged with every product, salt, manufacturer and category
+    they embed; committed ORM writes to any of those rows evict exactly the
+    pages that depend on them. Bulk Query.update()/delete() bypass the
+    session events, so callers using them should call clear().
+    """
+
+    def __init__(self, app=None):
+        self.cache = LRUCache()
+        self.enabled = True
+        self._listening = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('PRODUCT_PAGE_CACHE_ENABLED', True)
+        self.cache = LRUCache(
+            maxsize=app.config.get('PRODUCT_PAGE_CACHE_SIZE', 1024),
+            ttl=app.config.get('PRODUCT_PAGE_CACHE_TTL', 300)
+        )
+        if not self._listening:
+            self._listening = True
+            event.listen(Session, 'after_flush', self._after_flush)
+            event.listen(Session, 'after_commit', self._after_commit)
+            event.listen(Session, 'after_soft_rollback', self._after_rollback)
+
+    def get(self, product_id):
+        if not self.enabled:
+            return None
+        entry = self.cache.get(product_id)
+        return entry[0] if entry is not None else None
+
+    def etag(self, product_id):
+        """Content hash of the cached page, or None if it isn't cached"""
+        if not self.enabled:
+            return None
+        entry = self.cache.peek(product_id)
+        return entry[1] if entry is not None else None
+
+    def generation(self):
+        return self.cache.generation()
+
+    def set(self, product_id, payload, tags=(), generation=None):
+        if not self.enabled:
+            return
+        self.cache.set(
+            product_id, (payload, make_etag(payload)),
+            set(tags) | {('product', product_id)}, generation
+        )
+
+    def invalidate(self, product_id):
+        self.cache.invalidate_tags([('product', product_id)])
+
+    def clear(self):
+        self.cache.clear()
+
+    def stats(self):
+        stats = self.cache.stats()
+        stats['enabled'] = self.enabled
+        return stats
+
+    # --- Session event hooks ---
+    def _after_flush(self, session, flush_context):
+        pending = session.info.setdefault('product_page_cache_tags', set())
+        for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+            pending.update(_tags_for(obj))
+
+    def _after_commit(self, session):
+        tags = session.info.pop('product_page_cache_tags', None)
+        if tags:
+            self.cache.invalidate_tags(tags)
+
+    def _after_rollback(self, session, previous_transaction):
+        if previous_transaction.parent is None:
+            session.info.pop('product_page_cache_tags', None)
+
+
+product_page_cache = ProductPageCache()
@@ -0,0 +1,209 @@
+# backend/app/categories.py
+import logging
+import threading
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import and_, delete, event, exc, func, insert, inspect, or_, select
+from sqlalchemy.orm import Session
+from .models import db, Category, CategoryClosure, Product
+from .replicas import replica_router
+
+CLOSURE = CategoryClosure.__table__
+
+logger = logging.getLogger(__name__)
+
+
+class CategoryCycleError(ValueError):
+    """Raised when a category would become its own ancestor"""
+
+
+def descendant_ids(category_id):
+    """SELECT of `category_id` and every category below it, for IN filters"""
+    category_tree_maintainer.ensure_closure()
+    return select(CategoryClosure.descendant_id).where(CategoryClosure.ancestor_id == category_id)
+
+
+def category_tree(root_id=None):
+    """Nested category tree (or the subtree under `root_id`) from one query.
+
+    Each node carries `product_count`: active products in the category or
+    any of its descendants.
+    """
+    category_tree_maintainer.ensure_closure()
+    counts = select(
+        CategoryClosure.ancestor_id.label('category_id'),
+        func.count(Product.id).label('product_count')
+    ).join(
+        Product, and_(Product.category_id == CategoryClosure.descendant_id, Product.is_active == True)
+    ).group_by(CategoryClosure.ancestor_id).subquery()
+    stmt = select(
+        Category.id, Category.name, Category.description, Category.parent_id,
+        func.coalesce(counts.c.product_count, 0)
+    ).outerjoin(counts, counts.c.category_id == Category.id).order_by(Category.name)
+    if root_id is not None:
+        stmt = stmt.join(CategoryClosure, and_(
+            CategoryClosure.descendant_id == Category.id, CategoryClosure.ancestor_id == root_id
+        ))
+
+    nodes = {
+        category_id: {
+            'id': category_id, 'name': name, 'description': description,
+            'parent_id': parent_id, 'product_count': product_count, 'children': []
+        }
+        for category_id, name, description, parent_id, product_count in db.session.execute(stmt)
+    }
+    roots = []
+    for node in nodes.values():
+        parent = nodes.get(node['parent_id'])
+        if parent is not None and node['id'] != root_id:
+            parent['children'].append(node)
+        else:
+            roots.append(node)
+    return roots
+
+
+def _link(connection, parent_id, subtree):
+    """Connect every ancestor of `parent_id` (itself included) to every
+    (descendant_id, depth) of a subtree being hung beneath it"""
+    if parent_id is None:
+        return
+    if parent_id in {descendant_id for descendant_id, _ in subtree}:
+        raise CategoryCycleError(f"Category {parent_id} is inside the subtree being moved under it")
+    ancestors = connection.execute(
+        select(CLOSURE.c.ancestor_id, CLOSURE.c.depth).where(CLOSURE.c.descendant_id == parent_id)
+    ).all()
+    rows = [
+        {'ancestor_id': ancestor_id, 'descendant_id': descendant_id, 'depth': ancestor_depth + depth + 1}
+        for ancestor_id, ancestor_depth in ancestors
+        for descendant_id, depth in subtree
+    ]
+    if rows:
+        connection.execute(insert(CLOSURE), rows)
+
+
+def _parents_first(categories):
+    pending = {category.id: category for category in categories}
+    ordered, seen = [], set()
+
+    def visit(category):
+        if category.id in seen:
+            return
+        seen.add(category.id)
+        parent = pending.get(category.parent_id)
+        if parent is not None:
+            visit(parent)
+        ordered.append(category)
+
+    for category in categories:
+        visit(category)
+    return ordered
+
+
+def _moved(category):
+    attrs = inspect(category).attrs
+    return attrs.parent_id.history.has_changes() or attrs.parent.history.has_changes()
+
+
+class CategoryTreeMaintainer:
+    """Keeps the category closure table in step with ORM writes to Category.
+
+    Runs after each flush, inside the same transaction: new categories get
+    their self row plus one row per ancestor, a re-parented category has its
+    whole subtree detached from the old ancestors and linked to the new
+    ones, and deleted categories lose their rows. Writes that bypass the ORM
+    unit of work need rebuild_category_closure() afterwards.
+
+    A database whose categories predate the closure table has none of these
+    rows; ensure_closure() builds them on first use in each process.
+    """
+
+    def __init__(self, app=None):
+        self._listening = False
+        self._closure_checked = False
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self._closure_checked = False
+        if not self._listening:
+            self._listening = True
+            event.listen(Session, 'after_flush', self._after_flush)
+        app.cli.add_command(rebuild_category_tree_command)
+
+    def ensure_closure(self):
+        """Rebuild the closure table if it is empty while categories exist"""
+        if self._closure_checked:
+            return
+        with self._lock, replica_router.primary():
+            if self._closure_checked:
+                return
+            empty = db.session.execute(select(CLOSURE.c.ancestor_id).limit(1)).first() is None
+            if empty and db.session.execute(select(Category.id).limit(1)).first() is not None:
+                try:
+                    count = rebuild_category_closure()
+                    logger.warning('category closure was empty; rebuilt it for %d categories', count)
+                except exc.IntegrityError:
+                    db.session.rollback()  # another worker rebuilt it first
+            self._closure_checked = True
+
+    def _after_flush(self, session, flush_context):
+        created = [obj for obj in session.new if isinstance(obj, Category)]
+        moved = [obj for obj in session.dirty if isinstance(obj, Category) and _moved(obj)]
+        deleted = [obj.id for obj in session.deleted if isinstance(obj, Category)]
+        if not (created or moved or deleted):
+            return
+        connection = session.connection()
+
+        if deleted:
+            connection.execute(delete(CLOSURE).where(or_(
+                CLOSURE.c.ancestor_id.in_(deleted), CLOSURE.c.descendant_id.in_(deleted)
+            )))
+        for category in _parents_first(created):
+            connection.execute(insert(CLOSURE).values(
+                ancestor_id=category.id, descendant_id=category.id, depth=0
+            ))
+            _link(connection, category.parent_id, [(category.id, 0)])
+        for category in moved:
+            subtree = connection.execute(
+                select(CLOSURE.c.descendant_id, CLOSURE.c.depth).where(CLOSURE.c.ancestor_id == category.id)
+            ).all()
+            subtree_ids = [descendant_id for descendant_id, _ in subtree]
+            if category.parent_id in subtree_ids:
+                raise CategoryCycleError(f"Category {category.id} cannot be moved under its own descendant")
+            connection.execute(delete(CLOSURE).where(
+                CLOSURE.c.descendant_id.in_(subtree_ids), CLOSURE.c.ancestor_id.notin_(subtree_ids)
+            ))
+            _link(connection, category.parent_id, subtree)
+
+
+def rebuild_category_closure():
+    """Recompute the closure table from categories.parent_id.
+
+    Needed after bulk writes that bypass the ORM (imports, fixtures).
+    Returns the number of categories.
+    """
+    parents = dict(db.session.execute(select(Category.id, Category.parent_id)).all())
+    rows = []
+    for category_id in parents:
+        ancestor_id, depth, seen = category_id, 0, set()
+        while ancestor_id is not None and ancestor_id not in seen:
+            seen.add(ancestor_id)
+            rows.append({'ancestor_id': ancestor_id, 'descendant_id': category_id, 'depth': depth})
+            ancestor_id, depth = parents.get(ancestor_id), depth + 1
+    db.session.execute(delete(CLOSURE))
+    if rows:
+        db.session.execute(insert(CLOSURE), rows)
+    db.session.commit()
+    return len(parents)
+
+
+@click.command('rebuild-category-tree')
+@with_appcontext
+def rebuild_category_tree_command():
+    """Recompute the category closure table from parent links"""
+    count = rebuild_category_closure()
+    click.echo(f"✅ Rebuilt category tree for {count} categories")
+
+
+category_tree_maintainer = CategoryTreeMaintainer()
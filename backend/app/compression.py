@@ -0,0 +1,85 @@
+# backend/app/compression.py
+import gzip
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+# Content codings we may emit, in order of preference
+ENCODINGS = ('br', 'gzip')
+
+
+def available_encodings():
+    return tuple(encoding for encoding in ENCODINGS if encoding != 'br' or brotli is not None)
+
+
+class Compressor:
+    """Compresses large responses with the best coding the client accepts.
+
+    Runs as an after_request hook: JSON/text bodies of at least
+    COMPRESS_MIN_SIZE bytes are encoded with brotli (when installed) or
+    gzip, negotiated from Accept-Encoding. Streamed responses and bodies that
+    already carry a Content-Encoding are left alone. A compressed response's
+    strong ETag gets a '-<coding>' suffix, since its bytes differ.
+    """
+
+    def __init__(self, app=None):
+        self.enabled = True
+        self.min_size = 1024
+        self.mimetypes = set()
+        self.gzip_level = 6
+        self.brotli_quality = 4
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('COMPRESS_ENABLED', True)
+        self.min_size = app.config.get('COMPRESS_MIN_SIZE', 1024)
+        self.mimetypes = set(app.config.get('COMPRESS_MIMETYPES', ('application/json',)))
+        self.gzip_level = app.config.get('COMPRESS_GZIP_LEVEL', 6)
+        self.brotli_quality = app.config.get('COMPRESS_BROTLI_QUALITY', 4)
+        app.after_request(self._after_request)
+
+    def negotiate(self, accept_encodings):
+        """Best coding the client accepts, or None"""
+        best, best_quality = None, 0
+        for encoding in available_encodings():
+            quality = accept_encodings[encoding]
+            if quality > best_quality:
+                best, best_quality = encoding, quality
+        return best
+
+    def compress(self, data, encoding):
+        if encoding == 'br':
+            return brotli.compress(data, quality=self.brotli_quality)
+        return gzip.compress(data, compresslevel=self.gzip_level)
+
+    def _after_request(self, response):
+        if not self.enabled or response.mimetype not in self.mimetypes:
+            return response
+        if response.direct_passthrough or response.is_streamed:
+            return response
+        if not 200 <= response.status_code < 300 or 'Content-Encoding' in response.headers:
+            return response
+
+        response.vary.add('Accept-Encoding')
+        if response.content_length is not None and response.content_length < self.min_size:
+            return response
+        encoding = self.negotiate(request.accept_encodings)
+        if encoding is None:
+            return response
+
+        data = response.get_data()
+        if len(data) < self.min_size:
+            return response
+        response.set_data(self.compress(data, encoding))
+        response.headers['Content-Encoding'] = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(f'{etag}-{encoding}')
+        return response
+
+
+compressor = Compressor()
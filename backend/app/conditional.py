@@ -0,0 +1,93 @@
+# backend/app/conditional.py
+import hashlib
+import json
+from functools import wraps
+from flask import current_app, make_response, request
+from sqlalchemy import func, select
+from .models import db
+from .compression import ENCODINGS
+
+
+def make_etag(*parts):
+    """Strong validator from any JSON-serialisable version parts"""
+    digest = hashlib.sha1(
+        json.dumps(parts, sort_keys=True, separators=(',', ':'), default=str).encode('utf-8')
+    )
+    return digest.hexdigest()
+
+
+def table_versions(*models):
+    """(row count, max id, max updated_at) watermark per model, in one query.
+
+    Inserts and deletes move the count or max id; edits move updated_at,
+    including Core UPDATEs, which still apply the column's onupdate. Models
+    without updated_at only report inserts and deletes.
+    """
+    columns = []
+    for model in models:
+        key = model.__mapper__.primary_key[0]
+        columns += [
+            select(func.count(key)).scalar_subquery(),
+            select(func.max(key)).scalar_subquery()
+        ]
+        if hasattr(model, 'updated_at'):
+            columns.append(select(func.max(model.updated_at)).scalar_subquery())
+    return list(db.session.execute(select(*columns)).one())
+
+
+def _request_parts():
+    return request.endpoint, sorted(request.args.items(multi=True))
+
+
+def conditional(version, policy):
+    """ETag / If-None-Match handling for a GET view.
+
+    `version(**view_args)` returns something that changes whenever the
+    response would, and is checked before the view runs, so a matching
+    If-None-Match is answered with 304 without building the body. It may
+    return None when no cheap version is known; the view then runs and the
+    body is hashed instead. `policy` names a CACHE_CONTROL_POLICIES entry.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            cache_control = current_app.config['CACHE_CONTROL_POLICIES'][policy]
+            current = version(**kwargs)
+            etag = make_etag(*_request_parts(), current) if current is not None else None
+            matched = _matching(etag) if etag is not None else None
+            if matched:
+                return _not_modified(matched, cache_control)
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+            if etag is None:
+                current = version(**kwargs)
+                etag = make_etag(
+                    *_request_parts(),
+                    current if current is not None else response.get_json()
+                )
+                matched = _matching(etag)
+                if matched:
+                    return _not_modified(matched, cache_control)
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = cache_control
+            return response
+        return wrapper
+    return decorator
+
+
+def _matching(etag):
+    """The If-None-Match tag matching `etag` or one of its compressed variants"""
+    for tag in (etag,) + tuple(f'{etag}-{encoding}' for encoding in ENCODINGS):
+        if request.if_none_match.contains(tag):
+            return tag
+    return None
+
+
+def _not_modified(etag, cache_control):
+    response = make_response('', 304)
+    response.set_etag(etag)
+    response.vary.add('Accept-Encoding')
+    response.headers['Cache-Control'] = cache_control
+    return response
@@ -0,0 +1,74 @@
+# backend/app/encoding.py
+import dataclasses
+import decimal
+import uuid
+from datetime import date
+from flask.json.provider import DefaultJSONProvider, JSONProvider
+from werkzeug.http import http_date
+
+try:
+    import orjson
+except ImportError:  # optional speedup
+    orjson = None
+
+
+def _default(o):
+    """Same fallbacks as Flask's default provider, so output doesn't change"""
+    if isinstance(o, date):
+        return http_date(o)
+    if isinstance(o, (decimal.Decimal, uuid.UUID)):
+        return str(o)
+    if dataclasses.is_dataclass(o) and not isinstance(o, type):
+        return dataclasses.asdict(o)
+    if hasattr(o, '__html__'):
+        return str(o.__html__())
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+class OrjsonProvider(JSONProvider):
+    """JSON provider backed by orjson (Rust), several times faster than json.
+
+    Keys are sorted like the default provider's, so bodies stay byte-stable
+    for ETags; dates go through the same fallback as Flask's provider.
+    """
+
+    sort_keys = True
+    compact = None
+
+    def dumps(self, obj, **kwargs):
+        return self._dumps_bytes(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        # Like the default provider, only responses are pretty-printed in debug
+        indent = self.compact is False or (self.compact is None and self._app.debug)
+        return self._app.response_class(self._dumps_bytes(obj, indent), mimetype='application/json')
+
+    def _dumps_bytes(self, obj, indent=False):
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=_default, option=option)
+
+
+JSON_PROVIDERS = {
+    'default': DefaultJSONProvider,
+    'orjson': OrjsonProvider
+}
+
+
+def init_json(app):
+    """Install the provider named by JSON_PROVIDER ('auto' prefers orjson)"""
+    name = app.config.get('JSON_PROVIDER', 'auto')
+    if name == 'auto':
+        name = 'orjson' if orjson is not None else 'default'
+    if name == 'orjson' and orjson is None:
+        raise RuntimeError("JSON_PROVIDER is 'orjson' but orjson is not installed")
+    if name not in JSON_PROVIDERS:
+        raise ValueError(f"Unknown JSON_PROVIDER '{name}'. Allowed: auto, {', '.join(JSON_PROVIDERS)}")
+    app.json = JSON_PROVIDERS[name](app)
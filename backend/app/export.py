@@ -0,0 +1,112 @@
+# backend/app/export.py
+import click
+import csv
+import io
+import sys
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload, selectinload
+from .models import db, Product, ProductSalt, PRODUCT_FIELDS
+
+EXPORT_FORMATS = {
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'csv': ('text/csv', 'csv')
+}
+CSV_COLUMNS = list(PRODUCT_FIELDS) + ['salts']
+FLUSH_BYTES = 64 * 1024
+
+
+def iter_products(include_inactive=False, batch_size=500):
+    """Every product with manufacturer, category and salts, streamed in batches.
+
+    yield_per fetches `batch_size` rows at a time from a server-side cursor
+    (where the driver supports one) and loads each batch's salts with one
+    SELECT ... IN. The identity map only holds weak references, so finished
+    batches are freed and memory is bounded by the batch, not the catalog.
+    """
+    stmt = select(Product).options(
+        joinedload(Product.manufacturer_info),
+        joinedload(Product.category),
+        selectinload(Product.product_salts).joinedload(ProductSalt.salt)
+    ).order_by(Product.id).execution_options(yield_per=batch_size)
+    if not include_inactive:
+        stmt = stmt.where(Product.is_active == True)
+    for partition in db.session.execute(stmt).scalars().partitions():
+        for product in partition:
+            row = product.to_dict()
+            row['salts'] = [
+                {'salt': ps.salt.name, 'strength': ps.strength, 'percentage': ps.percentage}
+                for ps in product.product_salts
+            ]
+            yield row
+
+
+def _csv_value(value):
+    if isinstance(value, list):
+        return '; '.join(
+            f"{item['salt']} {item['strength']}" if isinstance(item, dict) else str(item)
+            for item in value
+        )
+    return value
+
+
+def _ndjson_lines(rows):
+    dumps = current_app.json.dumps
+    for row in rows:
+        yield dumps(row) + '\n'
+
+
+def _csv_lines(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+    for row in rows:
+        writer.writerow([_csv_value(row.get(column)) for column in CSV_COLUMNS])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def export_chunks(export_format, include_inactive=False, batch_size=500):
+    """Encoded export as ~64 KiB text chunks, generated incrementally"""
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Invalid format '{export_format}'. Allowed: {', '.join(EXPORT_FORMATS)}")
+    rows = iter_products(include_inactive=include_inactive, batch_size=batch_size)
+    lines = _ndjson_lines(rows) if export_format == 'ndjson' else _csv_lines(rows)
+    pending, size = [], 0
+    for line in lines:
+        pending.append(line)
+        size += len(line)
+        if size >= FLUSH_BYTES:
+            yield ''.join(pending)
+            pending, size = [], 0
+    if pending:
+        yield ''.join(pending)
+
+
+@click.command('export-products')
+@click.option('--format', 'export_format', type=click.Choice(list(EXPORT_FORMATS)),
+              default='ndjson', show_default=True)
+@click.option('--output', type=click.Path(dir_okay=False, writable=True),
+              help='File to write (default: stdout)')
+@click.option('--include-inactive', is_flag=True, help='Also export inactive products')
+@click.option('--batch-size', default=500, show_default=True, help='Rows fetched per round trip')
+@with_appcontext
+def export_products_command(export_format, output, include_inactive, batch_size):
+    """Stream the product catalog as NDJSON or CSV"""
+    stream = open(output, 'w', encoding='utf-8', newline='') if output else sys.stdout
+    try:
+        for chunk in export_chunks(export_format, include_inactive, batch_size):
+            stream.write(chunk)
+    finally:
+        if output:
+            stream.close()
+    if output:
+        click.echo(f"✅ Exported products to {output}", err=True)
+
+
+def init_app(app):
+    app.cli.add_command(export_products_command)
@@ -0,0 +1,436 @@
+# backend/app/facets.py
+import bisect
+import logging
+import threading
+import time
+from collections import Counter, OrderedDict
+from itertools import compress
+from flask import current_app
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+from .models import db, Product, Category, Manufacturer
+from .replicas import replica_router
+
+logger = logging.getLogger(__name__)
+
+FACETS = ('category', 'manufacturer', 'price', 'prescription')
+PRESCRIPTION_LABELS = {True: 'Rx', False: 'OTC'}
+
+
+class FacetSelectionError(ValueError):
+    """Raised for an unknown facet name in ?facets="""
+
+
+def parse_facets(param):
+    """Facets requested by ?facets= ('true'/'all' or a comma-separated list)"""
+    if not param or param.lower() == 'false':
+        return []
+    if param.lower() in ('true', 'all'):
+        return list(FACETS)
+    facets = list(dict.fromkeys(name.strip() for name in param.split(',') if name.strip()))
+    unknown = [name for name in facets if name not in FACETS]
+    if unknown:
+        raise FacetSelectionError(f"Unknown facets: {', '.join(unknown)}. Allowed: {', '.join(FACETS)}")
+    return facets
+
+
+def _mask(size, positions):
+    """Byte-per-position mask packed into an int, so masks AND in one C-level op"""
+    flags = bytearray(size)
+    for position in positions:
+        flags[position] = 1
+    return int.from_bytes(flags, 'little')
+
+
+class FacetIndex:
+    """Column store of the facet attributes of active products.
+
+    Each product occupies a position; columns hold its category,
+    manufacturer, price bucket and Rx flag at that position. Masks hold one
+    byte per position packed into an int, so filters combine with integer
+    AND and `mask.bit_count()` counts matches. Per-value masks are kept in
+    an LRU of `mask_cache_size` (each is `size` bytes); values no product
+    has are never cached. Small facets are counted by ANDing each value's
+    mask, large ones with Counter(compress(column, mask)). Updates append a
+    new position and tombstone the old one in the `live` mask.
+    """
+
+    bitcount_max_values = 32  # facets with more values are counted by compress
+
+    def __init__(self, rows=(), price_buckets=(100, 250, 500, 1000), mask_cache_size=128):
+        self.price_buckets = tuple(price_buckets)
+        self.mask_cache_size = mask_cache_size
+        self.size = 0
+        self.dead = 0
+        self._positions = {}  # product id -> current position
+        self._columns = {facet: [] for facet in FACETS}
+        self._value_positions = {facet: {} for facet in FACETS}  # facet -> value -> positions
+        self._value_masks = OrderedDict()  # (facet, value) -> mask, least recently used first
+        self._totals = {}       # facet -> counts over every live product
+        self._prices = []       # ascending, parallel to _price_positions
+        self._price_positions = []
+        self._starts = (float('-inf'),) + self.price_buckets
+        self._ends = self.price_buckets + (float('inf'),)
+        for row in rows:
+            self._append(*row)
+        by_price = sorted(range(self.size), key=self._prices.__getitem__)
+        self._prices = [self._prices[position] for position in by_price]
+        self._price_positions = by_price
+        self._live = int.from_bytes(b'\x01' * self.size, 'little')
+
+    def _values(self, category_id, manufacturer_id, price, prescription):
+        return (
+            ('category', category_id),
+            ('manufacturer', manufacturer_id),
+            ('price', bisect.bisect_right(self.price_buckets, price)),
+            ('prescription', bool(prescription))
+        )
+
+    def _append(self, product_id, category_id, manufacturer_id, price, prescription):
+        position = self.size
+        price = float(price or 0)
+        for facet, value in self._values(category_id, manufacturer_id, price, prescription):
+            self._columns[facet].append(value)
+            self._value_positions[facet].setdefault(value, []).append(position)
+        self._prices.append(price)
+        self._positions[product_id] = position
+        self.size += 1
+        return position, price
+
+    def add(self, product_id, category_id, manufacturer_id, price, prescription):
+        position = self._positions.get(product_id)
+        if position is not None and self._unchanged(position, category_id, manufacturer_id, price, prescription):
+            return  # stock or description edits leave the facets alone
+        self.remove(product_id)
+        position, price = self._append(product_id, category_id, manufacturer_id, price, prescription)
+        # _append put the price last; move it into order
+        self._prices.pop()
+        index = bisect.bisect_right(self._prices, price)
+        self._prices.insert(index, price)
+        self._price_positions.insert(index, position)
+        bit = 1 << (8 * position)
+        self._live |= bit
+        self._totals.clear()
+        for facet in FACETS:
+            key = (facet, self._columns[facet][position])
+            if key in self._value_masks:
+                self._value_masks[key] |= bit
+
+    def _unchanged(self, position, category_id, manufacturer_id, price, prescription):
+        price = float(price or 0)
+        start = bisect.bisect_left(self._prices, price)
+        end = bisect.bisect_right(self._prices, price, start)
+        if position not in self._price_positions[start:end]:
+            return False
+        return all(
+            self._columns[facet][position] == value
+            for facet, value in self._values(category_id, manufacturer_id, price, prescription)
+        )
+
+    def remove(self, product_id):
+        position = self._positions.pop(product_id, None)
+        if position is not None:
+            self._live &= ~(1 << (8 * position))
+            self._totals.clear()
+            self.dead += 1
+
+    def __len__(self):
+        return len(self._positions)
+
+    def bucket_range(self, bucket):
+        low = self.price_buckets[bucket - 1] if bucket > 0 else 0.0
+        high = self.price_buckets[bucket] if bucket < len(self.price_buckets) else None
+        return low, high
+
+    def _value_mask(self, facet, value):
+        key = (facet, value)
+        mask = self._value_masks.get(key)
+        if mask is not None:
+            self._value_masks.move_to_end(key)
+            return mask
+        positions = self._value_positions[facet].get(value)
+        if not positions:
+            return 0  # e.g. a client filtering on an id no product has
+        mask = self._value_masks[key] = _mask(self.size, positions)
+        if len(self._value_masks) > self.mask_cache_size:
+            self._value_masks.popitem(last=False)
+        return mask
+
+    def _priced(self, low, high):
+        """Positions priced within [low, high]; None bounds are open"""
+        start = 0 if low is None else bisect.bisect_left(self._prices, low)
+        end = len(self._prices) if high is None else bisect.bisect_right(self._prices, high)
+        return self._price_positions[start:end]
+
+    def _price_mask(self, low, high):
+        # Whole buckets inside the range come from cached masks; only the
+        # partially covered edges are gathered position by position
+        first = 0 if low is None else bisect.bisect_left(self._starts, low)
+        last = len(self._ends) if high is None else bisect.bisect_right(self._ends, high)
+        if first >= last:
+            return _mask(self.size, self._priced(low, high))
+        mask = 0
+        for bucket in range(first, last):
+            mask |= self._value_mask('price', bucket)
+        if low is not None and low < self._starts[first]:
+            mask |= _mask(self.size, self._priced(low, self._starts[first] - 1e-9))
+        if high is not None and high >= self._ends[last - 1]:
+            mask |= _mask(self.size, self._priced(self._ends[last - 1], high))
+        return mask
+
+    def _filter_mask(self, facet, value):
+        if facet == 'price':
+            return self._price_mask(*value)
+        mask = 0
+        for v in value if isinstance(value, (list, tuple, set, frozenset)) else (value,):
+            mask |= self._value_mask(facet, v)
+        return mask
+
+    def counts(self, facets, filters=None, product_ids=None):
+        """{facet: Counter(value -> count)} over live products matching the filters.
+
+        `filters` maps facet -> value (a set of ids for category, an id for
+        manufacturer, (min, max) for price, a bool for prescription). Each
+        facet is counted with every filter except its own, so clients see
+        how many results choosing another value would give.
+        """
+        filters = filters or {}
+        base = self._live
+        if product_ids is not None:
+            base &= _mask(self.size, (self._positions[pid] for pid in product_ids if pid in self._positions))
+        masks = {facet: self._filter_mask(facet, value) for facet, value in filters.items()}
+
+        result = {}
+        for facet in facets:
+            mask = base
+            for other, other_mask in masks.items():
+                if other != facet:
+                    mask &= other_mask
+            if mask == self._live:
+                if facet not in self._totals:
+                    self._totals[facet] = self._count(facet, mask)
+                result[facet] = self._totals[facet]
+            else:
+                result[facet] = self._count(facet, mask)
+        return result
+
+    def _count(self, facet, mask):
+        values = self._value_positions[facet]
+        if len(values) <= self.bitcount_max_values:
+            return Counter({value: (mask & self._value_mask(facet, value)).bit_count() for value in values})
+        return Counter(compress(self._columns[facet], mask.to_bytes(self.size, 'little')))
+
+
+class FacetCounter:
+    """Keeps a FacetIndex of active products in step with the catalog.
+
+    Built on first use; committed ORM writes to products are queued by
+    session events and applied before the next count, and category or
+    manufacturer renames refresh the labels. Writes by other workers or CLI
+    commands are picked up by a rebuild every FACET_REBUILD_SECONDS (or
+    after invalidate()), which also compacts the index once a quarter of
+    its positions are tombstones. Rebuilds after the first run on a
+    background thread and swap the new index in; counts keep using the old
+    one meanwhile.
+    """
+
+    def __init__(self, app=None):
+        self.price_buckets = (100, 250, 500, 1000)
+        self.max_values = 20
+        self.mask_cache_size = 128
+        self.rebuild_seconds = 300
+        self.index = None
+        self._labels = {'category': {}, 'manufacturer': {}}
+        self._built_at = None
+        self._expired = False
+        self._builder = None  # background rebuild thread, while one runs
+        self._replay = None   # changes applied to the old index during a rebuild
+        self._pending = set()
+        self._lock = threading.RLock()
+        self._pending_lock = threading.Lock()
+        self._listening = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.price_buckets = tuple(app.config.get('FACET_PRICE_BUCKETS', (100, 250, 500, 1000)))
+        self.max_values = app.config.get('FACET_MAX_VALUES', 20)
+        self.mask_cache_size = app.config.get('FACET_MASK_CACHE_SIZE', 128)
+        self.rebuild_seconds = app.config.get('FACET_REBUILD_SECONDS', 300)
+        self.wait_for_rebuild()
+        self.index = None
+        self._expired = False
+        self._pending = set()
+        if not self._listening:
+            self._listening = True
+            event.listen(Session, 'after_flush', self._after_flush)
+            event.listen(Session, 'after_commit', self._after_commit)
+            event.listen(Session, 'after_soft_rollback', self._after_rollback)
+
+    @staticmethod
+    def _rows(product_ids=None):
+        stmt = select(
+            Product.id, Product.category_id, Product.manufacturer_id, Product.price,
+            Product.prescription_required
+        ).where(Product.is_active == True).order_by(Product.id)
+        if product_ids is not None:
+            stmt = stmt.where(Product.id.in_(product_ids))
+        return db.session.execute(stmt)
+
+    @staticmethod
+    def _labels_of(kind, ids=None):
+        model = Category if kind == 'category' else Manufacturer
+        stmt = select(model.id, model.name)
+        if ids is not None:
+            stmt = stmt.where(model.id.in_(ids))
+        return dict(db.session.execute(stmt).all())
+
+    def _load_labels(self, kind, ids=None):
+        self._labels[kind].update(self._labels_of(kind, ids))
+
+    def rebuild(self):
+        """Build a fresh index and labels, then swap them in. Changes applied
+        to the old index while this runs are replayed onto the new one."""
+        with self._pending_lock:
+            self._pending.clear()  # the rows read below include them
+            self._replay = set()
+        with replica_router.primary():
+            index = FacetIndex(self._rows(), self.price_buckets, self.mask_cache_size)
+            labels = {kind: self._labels_of(kind) for kind in ('category', 'manufacturer')}
+        with self._lock:
+            self.index, self._labels = index, labels
+            with self._pending_lock:
+                self._pending.update(self._replay)
+                self._replay = None
+            self._built_at = time.monotonic()
+            self._expired = False
+
+    def _start_rebuild(self):
+        with self._pending_lock:
+            if self._builder is not None:
+                return
+            self._builder = threading.Thread(
+                target=self._rebuild_in_background, args=(current_app._get_current_object(),),
+                name='facet-rebuild', daemon=True
+            )
+        self._builder.start()
+
+    def _rebuild_in_background(self, app):
+        try:
+            with app.app_context():
+                self.rebuild()
+        except Exception:
+            logger.exception('facet index rebuild failed; keeping the current index')
+            with self._pending_lock:
+                self._replay = None
+            self._built_at, self._expired = time.monotonic(), False  # retry after another interval
+        finally:
+            with self._pending_lock:
+                self._builder = None
+
+    def wait_for_rebuild(self, timeout=None):
+        """Block until a background rebuild, if any, has been swapped in"""
+        builder = self._builder
+        if builder is not None:
+            builder.join(timeout)
+
+    def invalidate(self):
+        """Rebuild on next use (after bulk writes that bypass the ORM);
+        counts keep using the current index until the new one is ready"""
+        self._expired = True
+
+    def _stale(self):
+        return (
+            self._expired
+            or self.index.dead > max(len(self.index), 1000) // 4
+            or time.monotonic() - self._built_at > self.rebuild_seconds
+        )
+
+    def refresh(self):
+        if self.index is None:
+            with self._lock:
+                if self.index is None:  # nothing to serve yet, so build in line
+                    self.rebuild()
+        elif self._stale():
+            self._start_rebuild()
+        if not self._pending:
+            return
+        with self._lock, replica_router.primary():
+            with self._pending_lock:
+                pending, self._pending = self._pending, set()
+                if self._replay is not None:
+                    self._replay.update(pending)
+            product_ids = [key for kind, key in pending if kind == 'product']
+            if product_ids:
+                # add() keeps the position of a product whose facets did not
+                # change; only products no longer active are removed
+                found = set()
+                for row in self._rows(product_ids):
+                    self.index.add(*row)
+                    found.add(row[0])
+                for product_id in set(product_ids) - found:
+                    self.index.remove(product_id)
+            for kind in ('category', 'manufacturer'):
+                ids = [key for pending_kind, key in pending if pending_kind == kind]
+                if ids:
+                    self._load_labels(kind, ids)
+
+    def counts(self, facets, filters=None, product_ids=None):
+        """{facet: [{'value', 'label', 'count', ...}]} ordered by count, then label"""
+        self.refresh()
+        with self._lock:
+            index = self.index
+            raw = index.counts(facets, filters, product_ids)
+            result = {}
+            for facet, counter in raw.items():
+                if facet == 'price':
+                    entries = []
+                    for bucket in range(len(index.price_buckets) + 1):
+                        low, high = index.bucket_range(bucket)
+                        entries.append({
+                            'value': f'{low:g}-{high:g}' if high is not None else f'{low:g}+',
+                            'min': low, 'max': high, 'count': counter.get(bucket, 0)
+                        })
+                    result[facet] = entries
+                    continue
+                if facet == 'prescription':
+                    labels = PRESCRIPTION_LABELS
+                else:
+                    labels = self._labels[facet]
+                entries = [
+                    {'value': value, 'label': labels.get(value), 'count': count}
+                    for value, count in counter.items() if count
+                ]
+                entries.sort(key=lambda entry: (-entry['count'], str(entry['label'])))
+                result[facet] = entries[:self.max_values]
+            return result
+
+    def stats(self):
+        with self._lock:
+            if self.index is None:
+                return {'products': 0, 'positions': 0}
+            return {'products': len(self.index), 'positions': self.index.size}
+
+    # --- Session event hooks ---
+    def _after_flush(self, session, flush_context):
+        pending = session.info.setdefault('facet_pending', set())
+        for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+            if isinstance(obj, Product):
+                pending.add(('product', obj.id))
+            elif isinstance(obj, Category):
+                pending.add(('category', obj.id))
+            elif isinstance(obj, Manufacturer):
+                pending.add(('manufacturer', obj.id))
+
+    def _after_commit(self, session):
+        pending = session.info.pop('facet_pending', None)
+        if pending:
+            with self._pending_lock:
+                self._pending.update(pending)
+
+    def _after_rollback(self, session, previous_transaction):
+        if previous_transaction.parent is None:
+            session.info.pop('facet_pending', None)
+
+
+facet_counter = FacetCounter()
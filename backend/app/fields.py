@@ -0,0 +1,71 @@
+# backend/app/fields.py
+from sqlalchemy.orm import joinedload, load_only
+from .models import Product, Manufacturer, Category, PRODUCT_FIELDS
+from .reference import reference_cache
+
+# Named field profiles accepted by `fields=` (None means every field)
+PRODUCT_FIELD_PROFILES = {
+    'summary': ('id', 'name', 'manufacturer', 'price', 'mrp', 'discount_percentage',
+                'strength', 'pack_size', 'dosage_form', 'prescription_required', 'stock_quantity'),
+    'full': None
+}
+
+# Output fields rendered from a related row: (relationship, foreign key, column)
+_RELATED_FIELDS = {
+    'manufacturer': ('manufacturer_info', 'manufacturer_id', Manufacturer.name),
+    'category': ('category', 'category_id', Category.name)
+}
+
+
+class FieldSelectionError(ValueError):
+    """Raised for unknown fields or profiles (reported as 400)"""
+
+
+def parse_fields(fields_param, default='full'):
+    """Turn 'summary' or 'id,name,price' into an ordered field tuple (None = all).
+
+    Profiles and field names can be mixed; 'id' is always included so
+    clients can still address each row.
+    """
+    selected = []
+    for name in (part.strip() for part in (fields_param or default).split(',')):
+        if not name:
+            continue
+        if name in PRODUCT_FIELD_PROFILES:
+            profile = PRODUCT_FIELD_PROFILES[name]
+            if profile is None:
+                return None
+            selected.extend(profile)
+        elif name in PRODUCT_FIELDS:
+            selected.append(name)
+        else:
+            allowed = ', '.join(sorted(PRODUCT_FIELD_PROFILES)) + ', ' + ', '.join(PRODUCT_FIELDS)
+            raise FieldSelectionError(f"Invalid field '{name}'. Allowed: {allowed}")
+    if not selected:
+        return None
+    return tuple(dict.fromkeys(['id'] + selected))
+
+
+def product_load_options(fields, extra_columns=()):
+    """Loader options fetching only what `fields` renders.
+
+    Unselected columns (including the large Text ones) are never sent by the
+    database. Related names come from the reference cache by foreign key, or
+    are joined in the same query when it is disabled. `extra_columns`
+    are Product columns the caller needs beyond the rendered fields, such as
+    the sort column for keyset cursors.
+    """
+    related = [
+        (getattr(Product, relationship), getattr(Product, foreign_key), column)
+        for field, (relationship, foreign_key, column) in _RELATED_FIELDS.items()
+        if fields is None or field in fields
+    ]
+    options = [] if reference_cache.enabled else [
+        joinedload(relationship).load_only(column) for relationship, _, column in related
+    ]
+    if fields is None:
+        return options
+    columns = {Product.id, *extra_columns}
+    columns.update(getattr(Product, field) for field in fields if field not in _RELATED_FIELDS)
+    columns.update(foreign_key for _, foreign_key, _ in related)
+    return [load_only(*columns)] + options
@@ -0,0 +1,467 @@
+# backend/app/importer.py
+import click
+import csv
+import json
+import os
+import time
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+from itertools import islice
+from flask.cli import with_appcontext
+from sqlalchemy import bindparam, delete, insert, or_, select, update
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from .models import db, Manufacturer, Category, Salt, Product, ProductSalt, FAQ
+from .cache import product_page_cache
+from .categories import rebuild_category_closure
+from .search import search_engine
+from .autocomplete import autocomplete
+from .facets import facet_counter
+from .reference import reference_cache
+from .substitutes import queue_refresh
+from .versions import data_versions
+
+# Entities in dependency order; each reads one CSV or NDJSON file
+IMPORT_ENTITIES = ('manufacturers', 'salts', 'products', 'compositions', 'faqs')
+MAX_REPORTED_ERRORS = 20
+
+
+class CatalogImportError(ValueError):
+    """Raised for unreadable input files (bad rows are rejected, not raised)"""
+
+
+class RowError(ValueError):
+    """A single input row that cannot be imported"""
+
+
+def read_records(path):
+    """Yield dict records from a .csv or .ndjson/.jsonl file, one at a time"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.csv':
+        with open(path, newline='', encoding='utf-8') as handle:
+            yield from csv.DictReader(handle)
+    elif extension in ('.ndjson', '.jsonl'):
+        with open(path, encoding='utf-8') as handle:
+            for line_number, line in enumerate(handle, 1):
+                if line.strip():
+                    try:
+                        yield json.loads(line)
+                    except ValueError as e:
+                        raise CatalogImportError(f"{path}:{line_number}: invalid JSON ({e})")
+    else:
+        raise CatalogImportError(f"Unsupported file type '{extension}' (use .csv, .ndjson or .jsonl)")
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _to_bool(value):
+    if isinstance(value, str):
+        return value.strip().lower() in ('1', 'true', 'yes', 'y')
+    return bool(value)
+
+
+def _to_decimal(value):
+    return Decimal(str(value))
+
+
+def _to_datetime(value):
+    return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+
+def _to_date(value):
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+def _to_str(value):
+    return ';'.join(str(item) for item in value) if isinstance(value, list) else str(value)
+
+
+_CONVERTERS = {bool: _to_bool, Decimal: _to_decimal, datetime: _to_datetime, date: _to_date, str: _to_str}
+
+
+@lru_cache(maxsize=None)
+def _converters(table, exclude=()):
+    """column name -> function turning a CSV string / JSON value into its Python type"""
+    return {
+        column.name: _CONVERTERS.get(column.type.python_type, column.type.python_type)
+        for column in table.columns if column.name not in exclude
+    }
+
+
+@lru_cache(maxsize=None)
+def _defaulted(table):
+    """Names of columns with a default, which a blank cell must not override"""
+    return frozenset(
+        column.name for column in table.columns
+        if column.default is not None or column.server_default is not None
+    )
+
+
+def _columns(table, record, exclude=()):
+    """Known columns of `table` present in `record`, coerced.
+
+    Blank cells become None, except in columns with a default: those are
+    left out, so inserts get the default and updates keep the stored value.
+    """
+    converters = _converters(table, exclude)
+    row = {}
+    for name, value in record.items():
+        convert = converters.get(name)
+        if convert is None:
+            continue
+        if value is None or value == '' or (isinstance(value, str) and value.isspace()):
+            if name not in _defaulted(table):
+                row[name] = None
+            continue
+        try:
+            row[name] = convert(value)
+        except (ValueError, TypeError, InvalidOperation):
+            raise RowError(f"invalid {name} '{value}'")
+    return row
+
+
+def _required(record, *names):
+    missing = [name for name in names if record.get(name) in (None, '')]
+    if missing:
+        raise RowError(f"missing {', '.join(missing)}")
+    return [str(record[name]).strip() if isinstance(record[name], str) else record[name] for name in names]
+
+
+class NameLookup:
+    """In-memory name -> id map for a small dimension table.
+
+    Loaded once per import; names not yet in the table are inserted in bulk
+    on first reference, so products can name a manufacturer or category
+    that no earlier file created.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.ids = dict(db.session.execute(select(model.name, model.id)).all())
+        self.created = 0
+
+    def resolve(self, names):
+        missing = sorted({name for name in names if name and name not in self.ids})
+        if missing:
+            db.session.execute(insert(self.model.__table__), [{'name': name} for name in missing])
+            self.ids.update(db.session.execute(
+                select(self.model.name, self.model.id).where(self.model.name.in_(missing))
+            ).all())
+            self.created += len(missing)
+        return self.ids
+
+    def refresh(self, names):
+        self.ids.update(db.session.execute(
+            select(self.model.name, self.model.id).where(self.model.name.in_(list(names)))
+        ).all())
+
+
+def upsert(table, rows, key_columns):
+    """Insert rows, updating the non-key columns of rows whose key already exists.
+
+    Rows are grouped by the columns they carry so a file that omits a column
+    never overwrites it with NULL. Uses ON CONFLICT / ON DUPLICATE KEY where
+    available and an UPDATE-then-INSERT pass elsewhere.
+    """
+    connection = db.session.connection()
+    dialect = connection.dialect.name
+    now = datetime.utcnow()
+    groups = {}
+    for row in rows:
+        groups.setdefault(tuple(sorted(row)), []).append(row)
+
+    for columns, group in groups.items():
+        update_columns = [column for column in columns if column not in key_columns]
+        if 'updated_at' in table.c and 'updated_at' not in columns:
+            for row in group:
+                row['updated_at'] = now
+            update_columns.append('updated_at')
+
+        if dialect == 'sqlite':
+            stmt = sqlite_insert(table)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=list(key_columns),
+                set_={column: stmt.excluded[column] for column in update_columns}
+            ) if update_columns else stmt.on_conflict_do_nothing()
+            connection.execute(stmt, group)
+        elif dialect in ('mysql', 'mariadb'):
+            stmt = mysql_insert(table)
+            stmt = stmt.on_duplicate_key_update(
+                {column: stmt.inserted[column] for column in update_columns}
+            ) if update_columns else stmt.prefix_with('IGNORE')
+            connection.execute(stmt, group)
+        else:
+            key = table.c[key_columns[0]]
+            existing = set(connection.scalars(
+                select(key).where(key.in_([row[key.name] for row in group]))
+            ))
+            updates = [row for row in group if row[key.name] in existing]
+            inserts = [row for row in group if row[key.name] not in existing]
+            if updates and update_columns:
+                connection.execute(
+                    update(table).where(key == bindparam('b_key')).values(
+                        {column: bindparam(f'b_{column}') for column in update_columns}
+                    ),
+                    [
+                        dict({f'b_{column}': row[column] for column in update_columns}, b_key=row[key.name])
+                        for row in updates
+                    ]
+                )
+            if inserts:
+                connection.execute(insert(table), inserts)
+
+
+def invalidate_catalog_state():
+    """Drop this process's caches and indexes derived from the catalog"""
+    product_page_cache.clear()
+    search_engine.invalidate()
+    autocomplete.invalidate()
+    facet_counter.invalidate()
+    reference_cache.invalidate()
+
+
+class CatalogImporter:
+    """Chunked bulk import of catalog files.
+
+    Each chunk is validated, resolved and written with a handful of bulk
+    statements, then committed. Bad rows are rejected and reported, not
+    fatal. Writes go through Core, so derived data is refreshed explicitly
+    at the end: the category tree is rebuilt if categories were created,
+    products whose composition changed are queued for
+    compute-substitutes --stale, and the 'catalog' data version is bumped
+    so every running worker evicts product pages and rebuilds its search,
+    autocomplete and facet indexes.
+    """
+
+    def __init__(self, chunk_size=5000):
+        self.chunk_size = chunk_size
+        self.reports = {}
+        self._manufacturers = None
+        self._categories = None
+        self._salts = None
+        self._replaced_compositions = set()
+        self._imported_compositions = set()  # (product_id, salt_id) written so far
+        self._replaced_faqs = set()
+
+    def run(self, files):
+        """Import {entity: path} in dependency order; returns the reports"""
+        unknown = set(files) - set(IMPORT_ENTITIES)
+        if unknown:
+            raise CatalogImportError(f"Unknown entities: {', '.join(sorted(unknown))}")
+        self._manufacturers = NameLookup(Manufacturer)
+        self._categories = NameLookup(Category)
+        self._salts = NameLookup(Salt)
+        for entity in IMPORT_ENTITIES:
+            if files.get(entity):
+                self.import_file(entity, files[entity])
+        if self._categories.created:
+            rebuild_category_closure()
+        # This process drops its derived state now; running servers do when
+        # they next see the bumped catalog version
+        data_versions.bump('catalog')
+        db.session.commit()
+        if search_engine.backend.persistent:
+            search_engine.rebuild()  # the shared table, once, here rather than in every worker
+        invalidate_catalog_state()
+        return self.reports
+
+    def import_file(self, entity, path):
+        handler = getattr(self, f'_import_{entity}')
+        report = self.reports[entity] = {'rows': 0, 'imported': 0, 'rejected': 0, 'errors': []}
+        started = time.perf_counter()
+        for chunk in _chunks(read_records(path), self.chunk_size):
+            rows = []
+            for offset, record in enumerate(chunk, report['rows'] + 1):
+                try:
+                    rows.append(self._prepare(entity, record))
+                except RowError as e:
+                    report['rejected'] += 1
+                    if len(report['errors']) < MAX_REPORTED_ERRORS:
+                        report['errors'].append(f"row {offset}: {e}")
+            report['rows'] += len(chunk)
+            try:
+                report['imported'] += handler(rows, report)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+        seconds = time.perf_counter() - started
+        report['seconds'] = round(seconds, 3)
+        report['rows_per_second'] = int(report['rows'] / seconds) if seconds else report['rows']
+        return report
+
+    # --- Per-entity row preparation (pure, may raise RowError) ---
+    def _prepare(self, entity, record):
+        if entity in ('manufacturers', 'salts'):
+            table = Manufacturer.__table__ if entity == 'manufacturers' else Salt.__table__
+            name, = _required(record, 'name')
+            return dict(_columns(table, record, exclude=('id', 'created_at')), name=name)
+        if entity == 'products':
+            sku, name, manufacturer = _required(record, 'sku', 'name', 'manufacturer')
+            row = _columns(Product.__table__, record, exclude=('id', 'created_at', 'manufacturer_id', 'category_id'))
+            if row.get('price') is None:
+                raise RowError('missing price')
+            row.update(sku=sku, name=name)
+            return row, manufacturer, (record.get('category') or '').strip() or None
+        if entity == 'compositions':
+            sku, salt, strength = _required(record, 'sku', 'salt', 'strength')
+            row = _columns(ProductSalt.__table__, record, exclude=('id', 'product_id', 'salt_id', 'created_at'))
+            row['strength'] = strength
+            return row, sku, salt
+        if entity == 'faqs':
+            question, answer = _required(record, 'question', 'answer')
+            sku = (record.get('sku') or '').strip() or None
+            salt = (record.get('salt') or '').strip() or None
+            if not sku and not salt:
+                raise RowError('needs a sku or a salt')
+            row = _columns(FAQ.__table__, record, exclude=('id', 'product_id', 'salt_id', 'created_at'))
+            row.update(question=question, answer=answer)
+            return row, sku, salt
+
+    # --- Per-entity chunk writers (return rows written) ---
+    def _import_manufacturers(self, rows, report):
+        upsert(Manufacturer.__table__, rows, ('name',))
+        self._manufacturers.refresh(row['name'] for row in rows)
+        return len(rows)
+
+    def _import_salts(self, rows, report):
+        upsert(Salt.__table__, rows, ('name',))
+        self._salts.refresh(row['name'] for row in rows)
+        return len(rows)
+
+    def _import_products(self, rows, report):
+        manufacturer_ids = self._manufacturers.resolve(manufacturer for _, manufacturer, _ in rows)
+        category_ids = self._categories.resolve(category for _, _, category in rows)
+        products = {}
+        for row, manufacturer, category in rows:
+            row['manufacturer_id'] = manufacturer_ids[manufacturer]
+            if category:
+                row['category_id'] = category_ids[category]
+            products[row['sku']] = row  # last occurrence of a sku wins
+        upsert(Product.__table__, list(products.values()), ('sku',))
+        return len(products)
+
+    def _product_ids(self, skus):
+        skus = list(set(skus))
+        return dict(db.session.execute(
+            select(Product.sku, Product.id).where(Product.sku.in_(skus))
+        ).all()) if skus else {}
+
+    def _reject(self, report, message):
+        report['rejected'] += 1
+        if len(report['errors']) < MAX_REPORTED_ERRORS:
+            report['errors'].append(message)
+
+    def _import_compositions(self, rows, report):
+        product_ids = self._product_ids(sku for _, sku, _ in rows)
+        salt_ids = self._salts.resolve(salt for _, _, salt in rows)
+        compositions = {}
+        for row, sku, salt in rows:
+            if sku not in product_ids:
+                self._reject(report, f"composition for unknown sku '{sku}'")
+                continue
+            # The last row for a sku and salt wins
+            key = (product_ids[sku], salt_ids[salt])
+            compositions.pop(key, None)
+            compositions[key] = dict(row, product_id=key[0], salt_id=key[1])
+        values = list(compositions.values())
+
+        # A product's composition is replaced by the file's, even across chunks
+        table = ProductSalt.__table__
+        fresh = {value['product_id'] for value in values} - self._replaced_compositions
+        if fresh:
+            db.session.execute(delete(table).where(table.c.product_id.in_(fresh)))
+            self._replaced_compositions.update(fresh)
+        repeated = [key for key in compositions if key in self._imported_compositions]
+        if repeated:
+            # Written by an earlier chunk of this file; replace that row
+            for product_id, salt_id in repeated:
+                db.session.execute(delete(table).where(
+                    (table.c.product_id == product_id) & (table.c.salt_id == salt_id)
+                ))
+        self._imported_compositions.update(compositions)
+        if values:
+            db.session.execute(insert(table), values)
+            queue_refresh(db.session.connection(), sorted({value['product_id'] for value in values}))
+        return len(values)
+
+    def _import_faqs(self, rows, report):
+        product_ids = self._product_ids(sku for _, sku, _ in rows if sku)
+        salt_ids = self._salts.ids
+        values = []
+        for row, sku, salt in rows:
+            if sku and sku not in product_ids:
+                self._reject(report, f"FAQ for unknown sku '{sku}'")
+                continue
+            if salt and salt not in salt_ids:
+                self._reject(report, f"FAQ for unknown salt '{salt}'")
+                continue
+            values.append(dict(
+                row,
+                product_id=product_ids[sku] if sku else None,
+                salt_id=salt_ids[salt] if salt else None
+            ))
+
+        # Like compositions, the file replaces each owner's FAQ set
+        owners = {(value['product_id'], value['salt_id']) for value in values}
+        fresh = owners - self._replaced_faqs
+        if fresh:
+            table = FAQ.__table__
+            product_owners = [product_id for product_id, _ in fresh if product_id is not None]
+            salt_owners = [salt_id for product_id, salt_id in fresh if product_id is None]
+            conditions = []
+            if product_owners:
+                conditions.append(table.c.product_id.in_(product_owners))
+            if salt_owners:
+                conditions.append(table.c.salt_id.in_(salt_owners) & table.c.product_id.is_(None))
+            db.session.execute(delete(table).where(or_(*conditions)))
+            self._replaced_faqs.update(fresh)
+        if values:
+            db.session.execute(insert(FAQ.__table__), values)
+        return len(values)
+
+
+def import_catalog(files, chunk_size=5000):
+    """Library entry point: import {entity: path} and return per-entity reports"""
+    return CatalogImporter(chunk_size=chunk_size).run(files)
+
+
+@click.command('import-catalog')
+@click.option('--manufacturers', type=click.Path(exists=True, dir_okay=False))
+@click.option('--salts', type=click.Path(exists=True, dir_okay=False))
+@click.option('--products', type=click.Path(exists=True, dir_okay=False))
+@click.option('--compositions', type=click.Path(exists=True, dir_okay=False),
+              help='Rows of sku, salt, strength[, percentage]')
+@click.option('--faqs', type=click.Path(exists=True, dir_okay=False),
+              help='Rows of sku and/or salt, question, answer[, category]')
+@click.option('--chunk-size', default=5000, show_default=True, help='Rows per bulk statement and commit')
+@with_appcontext
+def import_catalog_command(chunk_size, **files):
+    """Bulk import catalog CSV/NDJSON files (upserts on sku and names)"""
+    files = {entity: path for entity, path in files.items() if path}
+    if not files:
+        raise click.UsageError('Pass at least one file, e.g. --products products.ndjson')
+    try:
+        reports = import_catalog(files, chunk_size=chunk_size)
+    except CatalogImportError as e:
+        raise click.ClickException(str(e))
+    for entity, report in reports.items():
+        click.echo(
+            f"✅ {entity}: {report['imported']} of {report['rows']} rows in {report['seconds']}s "
+            f"({report['rows_per_second']} rows/s), {report['rejected']} rejected"
+        )
+        for error in report['errors']:
+            click.echo(f"   ⚠️ {error}")
+
+
+def init_app(app):
+    app.cli.add_command(import_catalog_command)
+    data_versions.on_change('catalog', invalidate_catalog_state)
@@ -0,0 +1,168 @@
+# backend/app/inventory.py
+import click
+from datetime import datetime, timedelta
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import case, func, select, update
+from .models import db, Product, Order, OrderItem
+from .cache import product_page_cache
+
+# Orders whose stock is still held
+RESERVED_STATUSES = ('pending', 'confirmed')
+
+
+class InsufficientStockError(Exception):
+    """Raised when one or more cart lines cannot be reserved"""
+
+    def __init__(self, shortages):
+        super().__init__('Insufficient stock')
+        self.shortages = shortages  # [{'product_id', 'requested', 'available'}]
+
+
+def _quantity_case(quantities):
+    return case(quantities, value=Product.id)
+
+
+def reserve_stock(quantities):
+    """Atomically take stock for every product in `quantities` ({id: qty}).
+
+    One conditional UPDATE decrements all lines at once and only matches rows
+    that still have enough stock, so concurrent checkouts can never drive
+    stock negative and row locks are held for a single statement. If any
+    line is short the whole transaction is rolled back and
+    InsufficientStockError lists every shortage. Call this first in the
+    transaction, before adding the order.
+    """
+    if not quantities:
+        return
+    needed = _quantity_case(quantities)
+    result = db.session.execute(
+        update(Product).where(
+            Product.id.in_(list(quantities)),
+            Product.stock_quantity >= needed
+        ).values(stock_quantity=Product.stock_quantity - needed).execution_options(
+            synchronize_session=False
+        )
+    )
+    if result.rowcount == len(quantities):
+        return
+
+    db.session.rollback()
+    available = dict(db.session.execute(
+        select(Product.id, Product.stock_quantity).where(Product.id.in_(list(quantities)))
+    ).all())
+    shortages = [
+        {
+            'product_id': product_id,
+            'requested': requested,
+            'available': available.get(product_id) or 0
+        }
+        for product_id, requested in sorted(quantities.items())
+        if (available.get(product_id) or 0) < requested
+    ]
+    raise InsufficientStockError(shortages)
+
+
+def _restock(order_ids):
+    """Return the stock held by the given orders with one UPDATE"""
+    quantities = dict(db.session.execute(
+        select(OrderItem.product_id, func.sum(OrderItem.quantity)).where(
+            OrderItem.order_id.in_(order_ids)
+        ).group_by(OrderItem.product_id)
+    ).all())
+    if quantities:
+        db.session.execute(
+            update(Product).where(Product.id.in_(list(quantities))).values(
+                stock_quantity=Product.stock_quantity + _quantity_case(quantities)
+            ).execution_options(synchronize_session=False)
+        )
+    return quantities
+
+
+def release_order(order_id, status='cancelled', user_id=None):
+    """Move an order out of a reserved status and give its stock back.
+
+    The status change is a conditional UPDATE, so of two concurrent
+    cancellations (or a cancellation racing expiry) exactly one restocks.
+    Returns True if this call released the order.
+    """
+    stmt = update(Order).where(
+        Order.id == order_id,
+        Order.status.in_(RESERVED_STATUSES)
+    )
+    if user_id is not None:
+        stmt = stmt.where(Order.user_id == user_id)
+    result = db.session.execute(
+        stmt.values(status=status, updated_at=datetime.utcnow()).execution_options(
+            synchronize_session=False
+        )
+    )
+    if result.rowcount != 1:
+        db.session.rollback()
+        return False
+    quantities = _restock([order_id])
+    db.session.commit()
+    invalidate_stock(quantities)
+    return True
+
+
+def expire_reservations(now=None, batch_size=500):
+    """Release unpaid orders whose reservation window has passed.
+
+    Returns the number of orders expired.
+    """
+    now = now or datetime.utcnow()
+    expired = 0
+    while True:
+        order_ids = db.session.scalars(
+            select(Order.id).where(
+                Order.status == 'pending',
+                Order.payment_status == 'pending',
+                Order.reserved_until.is_not(None),
+                Order.reserved_until < now
+            ).order_by(Order.id).limit(batch_size)
+        ).all()
+        if not order_ids:
+            return expired
+        result = db.session.execute(
+            update(Order).where(
+                Order.id.in_(order_ids),
+                Order.status == 'pending'
+            ).values(status='expired', updated_at=now).execution_options(
+                synchronize_session=False
+            )
+        )
+        if result.rowcount != len(order_ids):
+            # Raced with a cancellation or payment; retry this batch
+            db.session.rollback()
+            continue
+        quantities = _restock(order_ids)
+        db.session.commit()
+        invalidate_stock(quantities)
+        expired += len(order_ids)
+
+
+def reservation_deadline(payment_method):
+    """When an unpaid order's stock is released (None for cash on delivery)"""
+    if payment_method == 'COD':
+        return None
+    minutes = current_app.config.get('ORDER_RESERVATION_MINUTES', 30)
+    return datetime.utcnow() + timedelta(minutes=minutes)
+
+
+def invalidate_stock(product_ids):
+    """Stock changes go through Core UPDATEs, so evict cached pages explicitly"""
+    for product_id in product_ids:
+        product_page_cache.invalidate(product_id)
+
+
+@click.command('expire-reservations')
+@with_appcontext
+def expire_reservations_command():
+    """Release stock held by unpaid orders past their reservation window"""
+    count = expire_reservations()
+    click.echo(f"✅ Expired {count} unpaid orders")
+
+
+def init_app(app):
+    app.cli.add_command(expire_reservations_command)
@@ -0,0 +1,221 @@
+# backend/app/metrics.py
+import functools
+import heapq
+import json
+import logging
+import threading
+import time
+from collections import deque
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(RuntimeError):
+    """A view issued more statements than its query_budget() allows"""
+
+
+def query_budget(limit):
+    """Cap the statements a view may issue per request.
+
+    Going over raises QueryBudgetExceeded in debug and testing, so an N+1
+    regression fails loudly in development and tests; in production it is
+    logged instead.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            g.query_budget_used = 0
+            try:
+                response = view(*args, **kwargs)
+            finally:
+                used = g.pop('query_budget_used')
+            if used > limit:
+                message = f'{request.endpoint} issued {used} queries (budget {limit})'
+                if current_app.debug or current_app.testing:
+                    raise QueryBudgetExceeded(message)
+                logger.warning('query budget exceeded %s', json.dumps({
+                    'route': request.endpoint, 'path': request.full_path.rstrip('?'),
+                    'queries': used, 'budget': limit
+                }))
+            return response
+        return wrapper
+    return decorator
+
+
+class RequestSQL:
+    """Queries issued while serving one request"""
+    __slots__ = ('queries', 'db_ms', 'slowest', 'keep')
+
+    def __init__(self, keep=3):
+        self.queries = 0
+        self.db_ms = 0.0
+        self.slowest = []  # min-heap of (ms, statement), at most `keep` entries
+        self.keep = keep
+
+    def record(self, statement, ms):
+        self.queries += 1
+        self.db_ms += ms
+        if len(self.slowest) < self.keep:
+            heapq.heappush(self.slowest, (ms, statement))
+        elif ms > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest, (ms, statement))
+
+    def slowest_statements(self):
+        return [
+            {'ms': round(ms, 2), 'statement': ' '.join(statement.split())[:300]}
+            for ms, statement in sorted(self.slowest, reverse=True)
+        ]
+
+
+class EndpointStats:
+    """Running totals for one route plus a window of recent latencies"""
+
+    def __init__(self, samples):
+        self.requests = 0
+        self.errors = 0
+        self.slow = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.db_ms = 0.0
+        self.queries = 0
+        self.latencies = deque(maxlen=samples)
+
+    def add(self, ms, sql, status, slow):
+        self.requests += 1
+        self.errors += status >= 500
+        self.slow += slow
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        self.db_ms += sql.db_ms
+        self.queries += sql.queries
+        self.latencies.append(ms)
+
+    def to_dict(self):
+        ordered = sorted(self.latencies)
+
+        def percentile(pct):
+            return round(ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))], 2)
+
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'slow': self.slow,
+            'mean_ms': round(self.total_ms / self.requests, 2),
+            'max_ms': round(self.max_ms, 2),
+            'p50_ms': percentile(50),
+            'p95_ms': percentile(95),
+            'p99_ms': percentile(99),
+            'queries_per_request': round(self.queries / self.requests, 2),
+            'db_ms_per_request': round(self.db_ms / self.requests, 2)
+        }
+
+
+class RequestMetrics:
+    """Per-request SQL instrumentation, Server-Timing headers and endpoint metrics.
+
+    Engine cursor events count every statement issued during a request and
+    time it; the totals go out as a Server-Timing header, requests slower
+    than SLOW_REQUEST_MS are logged with their slowest statements, and
+    latency/query figures are aggregated per route for stats(). The hot path
+    is two perf_counter() calls per statement and one locked update per
+    request. Statements run while a streamed body is generated (after the
+    response has started) are not counted.
+    """
+
+    def __init__(self, app=None):
+        self.enabled = True
+        self.server_timing = True
+        self.slow_request_ms = 500.0
+        self.slow_query_samples = 3
+        self.latency_samples = 1024
+        self._endpoints = {}
+        self._lock = threading.Lock()
+        self._started = time.time()
+        self._listening = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('REQUEST_METRICS_ENABLED', True)
+        self.server_timing = app.config.get('SERVER_TIMING_ENABLED', True)
+        self.slow_request_ms = app.config.get('SLOW_REQUEST_MS', 500.0)
+        self.slow_query_samples = app.config.get('SLOW_QUERY_SAMPLES', 3)
+        self.latency_samples = app.config.get('METRICS_LATENCY_SAMPLES', 1024)
+        log_path = app.config.get('SLOW_REQUEST_LOG')
+        if log_path and not any(getattr(h, 'baseFilename', None) == log_path for h in logger.handlers):
+            handler = logging.FileHandler(log_path)
+            handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+            logger.addHandler(handler)
+            logger.setLevel(logging.WARNING)
+        if not self._listening:
+            # Also counts for query_budget(), which applies even with metrics off
+            self._listening = True
+            event.listen(Engine, 'before_cursor_execute', self._before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', self._after_cursor_execute)
+        if not self.enabled:
+            return
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+
+    def stats(self):
+        with self._lock:
+            endpoints = {name: stats.to_dict() for name, stats in sorted(self._endpoints.items())}
+        return {
+            'since': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(self._started)),
+            'slow_request_ms': self.slow_request_ms,
+            'endpoints': endpoints
+        }
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+            self._started = time.time()
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if not has_request_context():
+            return
+        if g.get('query_budget_used') is not None:
+            g.query_budget_used += 1
+        if 'request_sql' in g:
+            context._metrics_started = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, '_metrics_started', None)
+        if started is not None and has_request_context() and 'request_sql' in g:
+            g.request_sql.record(statement, (time.perf_counter() - started) * 1000)
+
+    def _before_request(self):
+        g.request_sql = RequestSQL(self.slow_query_samples)
+        g.request_started = time.perf_counter()
+
+    def _after_request(self, response):
+        sql = g.pop('request_sql', None)
+        if sql is None:
+            return response
+        ms = (time.perf_counter() - g.request_started) * 1000
+        if self.server_timing:
+            response.headers['Server-Timing'] = (
+                f'db;dur={sql.db_ms:.2f};desc="{sql.queries} queries", app;dur={ms:.2f}'
+            )
+
+        route = f'{request.method} {request.url_rule.rule}' if request.url_rule else '<unmatched>'
+        slow = ms >= self.slow_request_ms
+        if slow:
+            logger.warning('slow request %s', json.dumps({
+                'route': route, 'path': request.full_path.rstrip('?'),
+                'status': response.status_code, 'ms': round(ms, 2),
+                'queries': sql.queries, 'db_ms': round(sql.db_ms, 2),
+                'slowest': sql.slowest_statements()
+            }))
+        with self._lock:
+            stats = self._endpoints.get(route)
+            if stats is None:
+                stats = self._endpoints[route] = EndpointStats(self.latency_samples)
+            stats.add(ms, sql, response.status_code, slow)
+        return response
+
+
+request_metrics = RequestMetrics()
@@ -1,9 +1,11 @@
 # backend/app/models.py
 from flask_sqlalchemy import SQLAlchemy
-import bcrypt
 from datetime import datetime
+from .passwords import password_hasher
+from .replicas import RoutingSession
+from .reference import reference_cache
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 class User(db.Model):
     """User model for authentication"""
@@ -24,10 +26,13 @@ class User(db.Model):
     orders = db.relationship('Order', backref='user', lazy=True)
 
     def set_password(self, password):
-        self.password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        self.password_hash = password_hasher.hash(password)
 
     def check_password(self, password):
-        return bcrypt.checkpw(password.encode('utf-8'), self.password_hash.encode('utf-8'))
+        return password_hasher.verify(password, self.password_hash)
+
+    def password_needs_rehash(self):
+        return password_hasher.needs_rehash(self.password_hash)
 
     def to_dict(self):
         return {
@@ -50,6 +55,7 @@ class Manufacturer(db.Model):
     website = db.Column(db.String(255))
     description = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
     products = db.relationship('Product', backref='manufacturer_info', lazy=True)
@@ -72,6 +78,7 @@ class Category(db.Model):
     description = db.Column(db.Text)
     parent_id = db.Column(db.Integer, db.ForeignKey('categories.id'))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Self-referential relationship for subcategories
     children = db.relationship('Category', backref=db.backref('parent', remote_side=[id]))
@@ -85,6 +92,21 @@ class Category(db.Model):
             'parent_id': self.parent_id
         }
 
+class CategoryClosure(db.Model):
+    """Ancestor/descendant pairs of the category tree (closure table).
+
+    Every category has a depth-0 row to itself plus one row per ancestor,
+    so a subtree or an ancestor path is a single indexed lookup.
+    """
+    __tablename__ = 'category_closure'
+    __table_args__ = (
+        db.Index('ix_category_closure_descendant', 'descendant_id', 'depth'),
+    )
+
+    ancestor_id = db.Column(db.Integer, db.ForeignKey('categories.id', ondelete='CASCADE'), primary_key=True)
+    descendant_id = db.Column(db.Integer, db.ForeignKey('categories.id', ondelete='CASCADE'), primary_key=True)
+    depth = db.Column(db.Integer, nullable=False)
+
 class Salt(db.Model):
     """Salt/Active ingredient model"""
     __tablename__ = 'salts'
@@ -113,6 +135,12 @@ class Salt(db.Model):
 class Product(db.Model):
     """Product model for medicines"""
     __tablename__ = 'products'
+    __table_args__ = (
+        # Composite (sort column, id) indexes back keyset pagination
+        db.Index('ix_products_price_id', 'price', 'id'),
+        db.Index('ix_products_name_id', 'name', 'id'),
+        db.Index('ix_products_created_at_id', 'created_at', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(255), nullable=False, index=True)
@@ -142,6 +170,7 @@ class Product(db.Model):
     storage_conditions = db.Column(db.String(255))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    average_rating = db.query_expression()  # loaded only when listing products by rating
     
     # Relationships
     reviews = db.relationship('Review', backref='product', lazy=True)
@@ -149,34 +178,54 @@ class Product(db.Model):
     substitute_products = db.relationship('Substitute', foreign_keys='Substitute.product_id', backref='main_product', lazy=True)
     order_items = db.relationship('OrderItem', backref='product', lazy=True)
 
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'name': self.name,
-            'sku': self.sku,
-            'manufacturer': self.manufacturer_info.name if self.manufacturer_info else None,
-            'category': self.category.name if self.category else None,
-            'price': float(self.price) if self.price else 0,
-            'mrp': float(self.mrp) if self.mrp else 0,
-            'discount_percentage': self.discount_percentage,
-            'description_general': self.description_general,
-            'uses': self.uses.split(';') if self.uses else [],
-            'how_it_works': self.how_it_works,
-            'how_to_use': self.how_to_use,
-            'side_effects': self.side_effects.split(';') if self.side_effects else [],
-            'precautions': self.precautions.split(';') if self.precautions else [],
-            'interactions': self.interactions.split(';') if self.interactions else [],
-            'dosage_form': self.dosage_form,
-            'strength': self.strength,
-            'pack_size': self.pack_size,
-            'prescription_required': self.prescription_required,
-            'is_active': self.is_active,
-            'stock_quantity': self.stock_quantity,
-            'expiry_date': self.expiry_date.isoformat() if self.expiry_date else None,
-            'manufacturing_date': self.manufacturing_date.isoformat() if self.manufacturing_date else None,
-            'batch_number': self.batch_number,
-            'storage_conditions': self.storage_conditions
-        }
+    def to_dict(self, fields=None):
+        """Serialize the product; `fields` limits output to those PRODUCT_FIELDS"""
+        if fields is None:
+            return {name: render(self) for name, render in PRODUCT_FIELDS.items()}
+        return {name: PRODUCT_FIELDS[name](self) for name in fields}
+
+def _split_list(value):
+    return value.split(';') if value else []
+
+def _isoformat(value):
+    return value.isoformat() if value else None
+
+def _reference_name(kind, ref_id, load):
+    """Name of a manufacturer/category/salt from the reference cache, else via `load()`"""
+    row = reference_cache.lookup(kind, ref_id)
+    if row is not None:
+        return row['name']
+    row = load()
+    return row.name if row else None
+
+# Output field -> renderer, in response order (fields.py maps these to columns)
+PRODUCT_FIELDS = {
+    'id': lambda p: p.id,
+    'name': lambda p: p.name,
+    'sku': lambda p: p.sku,
+    'manufacturer': lambda p: _reference_name('manufacturers', p.manufacturer_id, lambda: p.manufacturer_info),
+    'category': lambda p: _reference_name('categories', p.category_id, lambda: p.category),
+    'price': lambda p: float(p.price) if p.price else 0,
+    'mrp': lambda p: float(p.mrp) if p.mrp else 0,
+    'discount_percentage': lambda p: p.discount_percentage,
+    'description_general': lambda p: p.description_general,
+    'uses': lambda p: _split_list(p.uses),
+    'how_it_works': lambda p: p.how_it_works,
+    'how_to_use': lambda p: p.how_to_use,
+    'side_effects': lambda p: _split_list(p.side_effects),
+    'precautions': lambda p: _split_list(p.precautions),
+    'interactions': lambda p: _split_list(p.interactions),
+    'dosage_form': lambda p: p.dosage_form,
+    'strength': lambda p: p.strength,
+    'pack_size': lambda p: p.pack_size,
+    'prescription_required': lambda p: p.prescription_required,
+    'is_active': lambda p: p.is_active,
+    'stock_quantity': lambda p: p.stock_quantity,
+    'expiry_date': lambda p: _isoformat(p.expiry_date),
+    'manufacturing_date': lambda p: _isoformat(p.manufacturing_date),
+    'batch_number': lambda p: p.batch_number,
+    'storage_conditions': lambda p: p.storage_conditions
+}
 
 class ProductSalt(db.Model):
     """Association table for Product and Salt with composition details"""
@@ -193,21 +242,26 @@ class ProductSalt(db.Model):
     salt = db.relationship('Salt', backref='product_salts')
 
     def to_dict(self):
+        salt = reference_cache.lookup('salts', self.salt_id) or self.salt.to_dict()
         return {
-            'salt_name': self.salt.name,
+            'salt_name': salt['name'],
             'strength': self.strength,
             'percentage': self.percentage,
-            'description': self.salt.description
+            'description': salt['description']
         }
 
 class Substitute(db.Model):
     """Substitute products model"""
     __tablename__ = 'substitutes'
+    __table_args__ = (
+        db.Index('ix_substitutes_product_score', 'product_id', 'similarity_score'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False)
     substitute_product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False)
     similarity_score = db.Column(db.Float, default=0.0)  # How similar are the products
+    is_computed = db.Column(db.Boolean, default=False, nullable=False)  # Written by the batch engine
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Relationships
@@ -217,12 +271,30 @@ class Substitute(db.Model):
         return {
             'id': self.substitute_product.id,
             'name': self.substitute_product.name,
-            'manufacturer': self.substitute_product.manufacturer_info.name,
+            'manufacturer': _reference_name(
+                'manufacturers', self.substitute_product.manufacturer_id,
+                lambda: self.substitute_product.manufacturer_info
+            ),
             'price': float(self.substitute_product.price),
             'strength': self.substitute_product.strength,
             'similarity_score': self.similarity_score
         }
 
+class SubstituteRefreshQueue(db.Model):
+    """Products whose composition changed since substitutes were last computed"""
+    __tablename__ = 'substitute_refresh_queue'
+    
+    product_id = db.Column(db.Integer, primary_key=True)
+    queued_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class DataVersion(db.Model):
+    """Counters bumped by bulk writes that bypass the ORM, polled by every worker"""
+    __tablename__ = 'data_versions'
+    
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
 class FAQ(db.Model):
     """Frequently Asked Questions model"""
     __tablename__ = 'faqs'
@@ -248,6 +320,10 @@ class FAQ(db.Model):
 class Review(db.Model):
     """Product reviews model"""
     __tablename__ = 'reviews'
+    __table_args__ = (
+        db.Index('ix_reviews_product_created_at_id', 'product_id', 'created_at', 'id'),
+        db.Index('ix_reviews_product_rating_id', 'product_id', 'rating', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False)
@@ -274,6 +350,35 @@ class Review(db.Model):
             'date': self.created_at.strftime('%Y-%m-%d')
         }
 
+class ProductReviewStats(db.Model):
+    """Per-product review aggregates, maintained incrementally on review writes"""
+    __tablename__ = 'product_review_stats'
+    
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), primary_key=True)
+    review_count = db.Column(db.Integer, nullable=False, default=0)
+    rating_sum = db.Column(db.Integer, nullable=False, default=0)
+    rating_1 = db.Column(db.Integer, nullable=False, default=0)
+    rating_2 = db.Column(db.Integer, nullable=False, default=0)
+    rating_3 = db.Column(db.Integer, nullable=False, default=0)
+    rating_4 = db.Column(db.Integer, nullable=False, default=0)
+    rating_5 = db.Column(db.Integer, nullable=False, default=0)
+    verified_count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    @property
+    def average_rating(self):
+        return self.rating_sum / self.review_count if self.review_count else 0
+
+    def to_dict(self):
+        return {
+            'average_rating': round(self.average_rating, 1),
+            'total_reviews': self.review_count or 0,
+            'rating_histogram': {
+                str(stars): getattr(self, f'rating_{stars}') or 0 for stars in range(1, 6)
+            },
+            'verified_reviews': self.verified_count or 0
+        }
+
 class Order(db.Model):
     """Order model"""
     __tablename__ = 'orders'
@@ -281,11 +386,12 @@ class Order(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     order_number = db.Column(db.String(50), unique=True, nullable=False, index=True)
-    status = db.Column(db.String(50), default='pending')  # pending, confirmed, shipped, delivered, cancelled
+    status = db.Column(db.String(50), default='pending')  # pending, confirmed, shipped, delivered, cancelled, expired
     total_amount = db.Column(db.Numeric(10, 2), nullable=False)
     shipping_address = db.Column(db.Text)
     payment_method = db.Column(db.String(50))
     payment_status = db.Column(db.String(50), default='pending')
+    reserved_until = db.Column(db.DateTime, index=True)  # Stock released after this if still unpaid
     notes = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -301,6 +407,7 @@ class Order(db.Model):
             'total_amount': float(self.total_amount),
             'payment_method': self.payment_method,
             'payment_status': self.payment_status,
+            'reserved_until': self.reserved_until.isoformat() if self.reserved_until else None,
             'created_at': self.created_at.isoformat()
         }
 
@@ -323,4 +430,8 @@ class OrderItem(db.Model):
             'quantity': self.quantity,
             'unit_price': float(self.unit_price),
             'total_price': float(self.total_price)
-        }
\ No newline at end of file
+        }
+
+reference_cache.register('manufacturers', Manufacturer)
+reference_cache.register('categories', Category)
+reference_cache.register('salts', Salt)
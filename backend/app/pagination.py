@@ -0,0 +1,98 @@
+# backend/app/pagination.py
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from sqlalchemy import and_, or_
+
+
+class PaginationError(ValueError):
+    """Raised for malformed sort keys or cursors (reported as 400)"""
+
+
+def parse_sort(sort_param, sort_columns, default):
+    """Turn 'price' / '-price' into (key, descending) for a known sort key"""
+    sort_param = (sort_param or default).strip()
+    descending = sort_param.startswith('-')
+    key = sort_param.lstrip('-')
+    if key not in sort_columns:
+        allowed = ', '.join(sorted(sort_columns))
+        raise PaginationError(f"Invalid sort '{key}'. Allowed: {allowed}")
+    return key, descending
+
+
+def apply_sort(query, column, id_column, descending):
+    """Order by the sort column with the primary key as a stable tiebreak"""
+    if descending:
+        return query.order_by(column.desc(), id_column.desc())
+    return query.order_by(column.asc(), id_column.asc())
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def _decode_value(value, column):
+    if value is None:
+        return None
+    python_type = column.type.python_type
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    if python_type is Decimal:
+        return Decimal(value)
+    return python_type(value)
+
+
+def encode_cursor(sort_key, descending, value, row_id):
+    """Opaque cursor pointing just past the given row"""
+    payload = json.dumps(
+        {'s': sort_key, 'd': descending, 'v': _encode_value(value), 'id': row_id},
+        separators=(',', ':')
+    )
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, sort_key, descending, column):
+    """Return (value, row_id) for a cursor issued for the same sort order"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        if payload['s'] != sort_key or payload['d'] != descending:
+            raise PaginationError("Cursor does not match the requested sort order")
+        return _decode_value(payload['v'], column), int(payload['id'])
+    except PaginationError:
+        raise
+    except (binascii.Error, UnicodeError, ValueError, KeyError, TypeError):
+        raise PaginationError("Invalid cursor")
+
+
+def keyset_paginate(query, column, id_column, sort_key, descending, cursor, per_page):
+    """Fetch one page after `cursor` using a seek predicate instead of OFFSET.
+
+    The predicate `(col, id) > (value, last_id)` is expanded into OR/AND form
+    so it can use a (col, id) index on both SQLite and MySQL. Returns
+    (rows, next_cursor); next_cursor is None on the last page.
+    """
+    if cursor:
+        value, last_id = decode_cursor(cursor, sort_key, descending, column)
+        if descending:
+            query = query.filter(or_(column < value, and_(column == value, id_column < last_id)))
+        else:
+            query = query.filter(or_(column > value, and_(column == value, id_column > last_id)))
+
+    rows = apply_sort(query, column, id_column, descending).limit(per_page + 1).all()
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        last = rows[-1]
+        next_cursor = encode_cursor(sort_key, descending, getattr(last, column.key), last.id)
+    return rows, next_cursor
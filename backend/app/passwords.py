@@ -0,0 +1,91 @@
+# backend/app/passwords.py
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+import bcrypt
+
+
+class PasswordHashingUnavailable(Exception):
+    """Raised when the hashing pool is saturated or too slow (reported as 503)"""
+
+    def __init__(self, message, retry_after=1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class PasswordHasher:
+    """Runs bcrypt on a small bounded thread pool.
+
+    bcrypt releases the GIL while hashing, so request threads keep serving
+    other endpoints while a hash runs. At most `workers` hashes run at once
+    and at most `max_pending` may be queued; past that, callers fail fast
+    with PasswordHashingUnavailable instead of piling up behind a login
+    storm.
+    """
+
+    def __init__(self, app=None):
+        self.rounds = 12
+        self.workers = 2
+        self.max_pending = 32
+        self.timeout = 5.0
+        self._executor = None
+        self._slots = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.rounds = app.config.get('BCRYPT_ROUNDS', 12)
+        self.workers = app.config.get('PASSWORD_HASH_WORKERS', 2)
+        self.max_pending = app.config.get('PASSWORD_HASH_MAX_PENDING', 32)
+        self.timeout = app.config.get('PASSWORD_HASH_TIMEOUT', 5.0)
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+            self._executor = None
+            self._slots = None
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix='password-hash'
+                )
+                self._slots = threading.BoundedSemaphore(self.workers + self.max_pending)
+            return self._executor, self._slots
+
+    def _run(self, fn, *args):
+        executor, slots = self._pool()
+        if not slots.acquire(blocking=False):
+            raise PasswordHashingUnavailable('Too many concurrent password operations')
+        try:
+            future = executor.submit(fn, *args)
+        except BaseException:
+            slots.release()
+            raise
+        future.add_done_callback(lambda _: slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise PasswordHashingUnavailable('Password operation timed out')
+
+    def hash(self, password):
+        rounds = self.rounds
+        return self._run(
+            lambda: bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds)).decode('utf-8')
+        )
+
+    def verify(self, password, password_hash):
+        return self._run(
+            lambda: bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+        )
+
+    def needs_rehash(self, password_hash):
+        """True when a stored hash was made with a different cost factor"""
+        try:
+            return int(password_hash.split('$')[2]) != self.rounds
+        except (AttributeError, IndexError, ValueError):
+            return True
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,223 @@
+# backend/app/ratelimit.py
+import functools
+import logging
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from flask import jsonify, request
+from flask_jwt_extended import get_jwt_identity
+from werkzeug.utils import import_string
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+
+def parse_rate(rate):
+    """'5/minute' -> (5, 60)"""
+    try:
+        count, period = rate.split('/')
+        return int(count), PERIODS[period.strip()]
+    except (ValueError, KeyError):
+        raise ValueError(f"Invalid rate {rate!r}; expected '<count>/<{'|'.join(PERIODS)}>'") from None
+
+
+class RateLimitStore(ABC):
+    """Bucket storage for the rate limiter.
+
+    A shared store (e.g. a Redis script) lets every worker draw from the same
+    buckets; it only has to refill and take a token atomically.
+    """
+
+    @abstractmethod
+    def consume(self, key, rate, burst):
+        """Take one token from the bucket `key` (refilling `rate` per second
+        up to `burst`); returns (allowed, remaining, retry_after_seconds)"""
+
+    def __len__(self):
+        return 0
+
+
+class MemoryStore(RateLimitStore):
+    """Process-local buckets, least recently used first.
+
+    Buckets that have refilled to full carry no state, so they are dropped
+    from the idle end as new ones arrive; past `max_buckets` the least
+    recently used bucket is dropped regardless. Both are O(1) per call.
+    """
+
+    def __init__(self, max_buckets=100000):
+        self.max_buckets = max_buckets
+        self._buckets = OrderedDict()  # key -> [tokens, updated_at, full_at]
+        self._lock = threading.Lock()
+
+    def consume(self, key, rate, burst):
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                tokens = float(burst)
+            else:
+                tokens = min(burst, bucket[0] + (now - bucket[1]) * rate)
+                self._buckets.move_to_end(key)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = [tokens, now, now + (burst - tokens) / rate]
+            self._evict(now)
+        retry_after = 0.0 if allowed else (1 - tokens) / rate
+        return allowed, int(tokens), retry_after
+
+    def _evict(self, now):
+        buckets = self._buckets
+        while len(buckets) > self.max_buckets:
+            buckets.popitem(last=False)
+        for _ in range(2):  # a couple per call keeps eviction O(1)
+            oldest = next(iter(buckets.values()), None)
+            if oldest is None or oldest[2] > now:
+                break
+            buckets.popitem(last=False)
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+RATE_LIMIT_STORES = {
+    'memory': MemoryStore
+}
+
+
+class _Budget:
+    __slots__ = ('name', 'declared', 'identity', 'rate', 'burst', 'per_second', 'allowed', 'limited')
+
+    def __init__(self, name, rate, burst, identity):
+        self.name = name
+        self.declared = (rate, burst)
+        self.identity = identity
+        self.allowed = 0
+        self.limited = 0
+        self.configure(rate, burst)
+
+    def configure(self, rate, burst=None):
+        count, period = parse_rate(rate)
+        self.rate = rate
+        self.burst = burst if burst is not None else count
+        self.per_second = count / period
+
+
+class RateLimiter:
+    """Token-bucket limits for expensive endpoints.
+
+    Routes declare a named budget with @rate_limiter.limit('search',
+    '20/minute', burst=10). Every request to the route draws a token from
+    the caller's IP bucket and from its identity's bucket: the verified JWT
+    identity, or whatever the budget's `identity` callable returns (e.g. the
+    username a login is for). Neither many accounts behind one address nor
+    one account spread over many addresses gets past the budget. Empty
+    buckets answer 429 with Retry-After. Rates can be retuned per budget
+    with RATE_LIMIT_OVERRIDES; if a shared store fails the request is let
+    through (and logged) rather than taking the endpoint down with it.
+    """
+
+    def __init__(self, app=None):
+        self.enabled = True
+        self.store = MemoryStore()
+        self._budgets = {}
+        self._overrides = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('RATE_LIMIT_ENABLED', True)
+        store = app.config.get('RATE_LIMIT_STORE', 'memory')
+        max_buckets = app.config.get('RATE_LIMIT_MAX_BUCKETS', 100000)
+        if store in RATE_LIMIT_STORES:
+            self.store = RATE_LIMIT_STORES[store](max_buckets)
+        else:
+            self.store = import_string(store)()
+        self._overrides = dict(app.config.get('RATE_LIMIT_OVERRIDES') or {})
+        for budget in self._budgets.values():
+            self._configure(budget)
+
+    def _configure(self, budget):
+        rate = self._overrides.get(budget.name)
+        if rate is not None:
+            budget.configure(rate)  # an overridden rate brings its own burst
+        else:
+            budget.configure(*budget.declared)
+
+    def limit(self, name, rate, burst=None, identity=None):
+        """Decorator applying the budget `name`; place it below @jwt_required()
+        so identities are known"""
+        budget = self._budgets.setdefault(name, _Budget(name, rate, burst, identity))
+        self._configure(budget)
+
+        def decorator(view):
+            @functools.wraps(view)
+            def wrapper(*args, **kwargs):
+                if self.enabled:
+                    retry_after = self._check(budget)
+                    if retry_after is not None:
+                        return self._too_many(budget, retry_after)
+                return view(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    @staticmethod
+    def _keys(budget):
+        keys = [f'ip:{request.remote_addr}']
+        if budget.identity is not None:
+            identity = budget.identity()
+        else:
+            try:
+                identity = get_jwt_identity()
+            except RuntimeError:  # no token verified in this request
+                identity = None
+        if identity is not None:
+            keys.append(f'user:{identity}')
+        return keys
+
+    def _check(self, budget):
+        """None if the request may proceed, else seconds until it may retry"""
+        for key in self._keys(budget):
+            try:
+                allowed, _, retry_after = self.store.consume(
+                    f'ratelimit:{budget.name}:{key}', budget.per_second, budget.burst
+                )
+            except Exception:
+                logger.warning('rate limit store failed; allowing request', exc_info=True)
+                break
+            if not allowed:
+                budget.limited += 1
+                return retry_after
+        budget.allowed += 1
+        return None
+
+    @staticmethod
+    def _too_many(budget, retry_after):
+        seconds = max(1, math.ceil(retry_after))
+        return jsonify({
+            "error": "Too many requests",
+            "details": f"Rate limit of {budget.rate} exceeded; retry in {seconds}s"
+        }), 429, {'Retry-After': str(seconds)}
+
+    def stats(self):
+        return {
+            'enabled': self.enabled,
+            'store': type(self.store).__name__,
+            'buckets': len(self.store),
+            'budgets': {
+                name: {
+                    'rate': budget.rate,
+                    'burst': budget.burst,
+                    'allowed': budget.allowed,
+                    'limited': budget.limited
+                }
+                for name, budget in sorted(self._budgets.items())
+            }
+        }
+
+
+rate_limiter = RateLimiter()
@@ -0,0 +1,269 @@
+# backend/app/reference.py
+import threading
+import time
+from abc import ABC, abstractmethod
+from flask import current_app
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+from werkzeug.utils import import_string
+from .replicas import replica_router
+
+
+class ReferenceBackend(ABC):
+    """Shared tier of the reference cache, visible to every worker.
+
+    A Redis or memcached client fits behind these five methods. Values are
+    lists of JSON-serialisable dicts; `ttl` is in seconds.
+    """
+
+    @abstractmethod
+    def get(self, key):
+        """The stored value, or None if absent or expired"""
+
+    @abstractmethod
+    def set(self, key, value, ttl):
+        """Store `value` for `ttl` seconds"""
+
+    @abstractmethod
+    def add(self, key, value, ttl):
+        """Set only if absent (a refill lock); True if this call set it"""
+
+    @abstractmethod
+    def delete(self, key):
+        """Remove `key` if present"""
+
+    @abstractmethod
+    def incr(self, key):
+        """Atomically add one to a counter starting at 0; returns the new value"""
+
+
+class MemoryBackend(ReferenceBackend):
+    """Process-local stand-in for a shared backend (single worker, tests)"""
+
+    def __init__(self):
+        self._values = {}  # key -> (expires_at or None, value)
+        self._lock = threading.Lock()
+
+    def _live(self, key, now):
+        entry = self._values.get(key)
+        if entry is not None and entry[0] is not None and entry[0] <= now:
+            del self._values[key]
+            return None
+        return entry
+
+    def get(self, key):
+        with self._lock:
+            entry = self._live(key, time.monotonic())
+            return entry[1] if entry is not None else None
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            now = time.monotonic()
+            for stale in [k for k, (expires_at, _) in self._values.items() if expires_at is not None and expires_at <= now]:
+                del self._values[stale]
+            self._values[key] = (now + ttl, value)
+
+    def add(self, key, value, ttl):
+        with self._lock:
+            now = time.monotonic()
+            if self._live(key, now) is not None:
+                return False
+            self._values[key] = (now + ttl, value)
+            return True
+
+    def delete(self, key):
+        with self._lock:
+            self._values.pop(key, None)
+
+    def incr(self, key):
+        with self._lock:
+            entry = self._values.get(key)
+            value = (entry[1] if entry is not None else 0) + 1
+            self._values[key] = (None, value)
+            return value
+
+
+REFERENCE_BACKENDS = {
+    'memory': MemoryBackend
+}
+
+
+class _Snapshot:
+    __slots__ = ('version', 'rows', 'by_id', 'expires_at')
+
+    def __init__(self, version, rows, expires_at):
+        self.version = version
+        self.rows = rows
+        self.by_id = {row['id']: row for row in rows}
+        self.expires_at = expires_at
+
+
+class ReferenceCache:
+    """Serialized manufacturers, categories and salts by id, in two tiers.
+
+    Each process keeps a snapshot per table (id -> to_dict()) for
+    REFERENCE_CACHE_TTL seconds; behind it a shared backend holds the same
+    snapshots under versioned keys. A committed ORM write to a table bumps
+    its version counter, which makes every worker's snapshot stale (this
+    process at once, others within REFERENCE_CACHE_VERSION_CHECK_SECONDS).
+    Refills are single-flight: one thread per process reloads a table
+    while the others wait for it, and across processes the backend's add()
+    elects one loader while the rest poll for its result.
+    """
+
+    refill_lock_seconds = 5.0
+
+    def __init__(self, app=None):
+        self.enabled = True
+        self.ttl = 300
+        self.version_check_seconds = 1.0
+        self.backend = MemoryBackend()
+        self._models = {}  # kind -> model
+        self._kinds = {}   # model -> kind
+        self._local = {}
+        self._versions = {}         # kind -> (version, checked_at)
+        self._refill_locks = {}
+        self.hits = 0
+        self.refills = 0
+        self.shared_hits = 0
+        self.db_loads = 0
+        self._listening = False
+        if app is not None:
+            self.init_app(app)
+
+    def register(self, kind, model):
+        """Cache `model` rows (serialized with to_dict()) as `kind`"""
+        self._models[kind] = model
+        self._kinds[model] = kind
+        self._refill_locks[kind] = threading.Lock()
+
+    def init_app(self, app):
+        self.enabled = app.config.get('REFERENCE_CACHE_ENABLED', True)
+        self.ttl = app.config.get('REFERENCE_CACHE_TTL', 300)
+        self.version_check_seconds = app.config.get('REFERENCE_CACHE_VERSION_CHECK_SECONDS', 1.0)
+        backend = app.config.get('REFERENCE_CACHE_BACKEND', 'memory')
+        self.backend = REFERENCE_BACKENDS[backend]() if backend in REFERENCE_BACKENDS else import_string(backend)()
+        self._local = {}
+        self._versions = {}
+        if not self._listening:
+            self._listening = True
+            event.listen(Session, 'after_flush', self._after_flush)
+            event.listen(Session, 'after_commit', self._after_commit)
+            event.listen(Session, 'after_soft_rollback', self._after_rollback)
+
+    def lookup(self, kind, ref_id):
+        """Serialized row, or None if it isn't cached (callers fall back to the ORM)"""
+        if ref_id is None or not self.enabled:
+            return None
+        return self._snapshot(kind).by_id.get(ref_id)
+
+    def rows(self, kind):
+        """Every serialized row of a table in id order; treat as read-only"""
+        if not self.enabled:
+            return self._load(kind)
+        return self._snapshot(kind).rows
+
+    def invalidate(self, kinds=None):
+        """Bump table versions (after bulk writes that bypass the ORM)"""
+        for kind in kinds if kinds is not None else list(self._models):
+            version = self.backend.incr(f'reference:{kind}:version')
+            self._versions[kind] = (version, time.monotonic())
+
+    def _version(self, kind):
+        version, checked_at = self._versions.get(kind, (None, 0.0))
+        now = time.monotonic()
+        if version is None or now - checked_at >= self.version_check_seconds:
+            version = self.backend.get(f'reference:{kind}:version') or 0
+            self._versions[kind] = (version, now)
+        return version
+
+    def _fresh(self, kind, snapshot):
+        return (
+            snapshot is not None and snapshot.expires_at > time.monotonic()
+            and snapshot.version == self._version(kind)
+        )
+
+    def _snapshot(self, kind):
+        snapshot = self._local.get(kind)
+        if self._fresh(kind, snapshot):
+            self.hits += 1
+            return snapshot
+        with self._refill_locks[kind]:
+            snapshot = self._local.get(kind)
+            if self._fresh(kind, snapshot):
+                self.hits += 1  # another thread refilled it while we waited
+                return snapshot
+            snapshot = self._local[kind] = self._refill(kind)
+            self.refills += 1
+            return snapshot
+
+    def _refill(self, kind):
+        version = self._version(kind)
+        key = f'reference:{kind}:{version}'
+        rows = self.backend.get(key)
+        if rows is not None:
+            self.shared_hits += 1
+        elif self.backend.add(f'{key}:lock', 1, self.refill_lock_seconds):
+            try:
+                rows = self._load(kind)
+                self.backend.set(key, rows, self.ttl)
+            finally:
+                self.backend.delete(f'{key}:lock')
+        else:
+            # Another worker is loading this version; wait for it rather than
+            # adding to the load on the database, up to the lock's lifetime
+            deadline = time.monotonic() + self.refill_lock_seconds
+            while rows is None and time.monotonic() < deadline:
+                time.sleep(0.02)
+                rows = self.backend.get(key)
+            if rows is None:
+                rows = self._load(kind)
+        return _Snapshot(version, rows, time.monotonic() + self.ttl)
+
+    def _load(self, kind):
+        model = self._models[kind]
+        session = current_app.extensions['sqlalchemy'].session
+        self.db_loads += 1
+        with replica_router.primary():
+            return [row.to_dict() for row in session.execute(select(model).order_by(model.id)).scalars()]
+
+    def stats(self):
+        now = time.monotonic()
+        return {
+            'enabled': self.enabled,
+            'backend': type(self.backend).__name__,
+            'hits': self.hits,
+            'refills': self.refills,
+            'shared_hits': self.shared_hits,
+            'db_loads': self.db_loads,
+            'tables': {
+                kind: {
+                    'rows': len(snapshot.rows),
+                    'version': snapshot.version,
+                    'expires_in': round(max(snapshot.expires_at - now, 0), 1)
+                }
+                for kind, snapshot in list(self._local.items())
+            }
+        }
+
+    # --- Session event hooks ---
+    def _after_flush(self, session, flush_context):
+        for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+            kind = self._kinds.get(type(obj))
+            if kind is not None:
+                session.info.setdefault('reference_cache_kinds', set()).add(kind)
+
+    def _after_commit(self, session):
+        kinds = session.info.pop('reference_cache_kinds', None)
+        if kinds:
+            self.invalidate(kinds)
+
+    def _after_rollback(self, session, previous_transaction):
+        if previous_transaction.parent is None:
+            kinds = session.info.pop('reference_cache_kinds', None)
+            if kinds:
+                # A refill inside the transaction may have seen the rolled-back rows
+                self.invalidate(kinds)
+
+
+reference_cache = ReferenceCache()
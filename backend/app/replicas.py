@@ -0,0 +1,325 @@
+# backend/app/replicas.py
+import itertools
+import sqlite3
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+import click
+from flask import current_app, g, has_request_context, request
+from flask.cli import with_appcontext
+from flask_jwt_extended import decode_token, get_jwt_identity
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt import PyJWTError
+from flask_sqlalchemy.session import Session as FlaskSession
+from sqlalchemy import event, exc, text
+from sqlalchemy.orm import Session
+
+# Requests whose plain SELECTs may be served by a replica
+READ_METHODS = frozenset(('GET', 'HEAD'))
+PRIMARY = 'primary'
+
+
+class RoutingSession(FlaskSession):
+    """db.session class that lets the replica router pick the engine for reads"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            engine = replica_router.engine_for(clause)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+class _Replica:
+    __slots__ = ('key', 'healthy', 'checked_at', 'lock')
+
+    def __init__(self, key):
+        self.key = key
+        self.healthy = True
+        self.checked_at = 0.0  # monotonic; 0 forces a check on first use
+        self.lock = threading.Lock()
+
+
+class BindStats:
+    """Statement and routing totals for one engine"""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_ms = 0.0
+        self.errors = 0
+        self.read_requests = 0
+
+    def to_dict(self):
+        return {
+            'queries': self.queries,
+            'db_ms': round(self.db_ms, 2),
+            'errors': self.errors,
+            'read_requests': self.read_requests
+        }
+
+
+class ReplicaRouter:
+    """Routes read-only requests to read replicas.
+
+    Each replica URI in SQLALCHEMY_REPLICA_URIS becomes a Flask-SQLAlchemy
+    bind (replica_1, replica_2, ...). In a GET/HEAD request the first plain
+    SELECT picks a replica round-robin, skipping unhealthy ones, and the
+    rest of the request sticks to it. Everything else stays on the primary:
+    other methods, SELECT ... FOR UPDATE, statements after the request has
+    flushed a write, work outside requests, refills of per-process state
+    inside primary(), and clients inside their read-your-writes window. A
+    request that commits a write pins its client to the primary for
+    READ_YOUR_WRITES_SECONDS (per process): the JWT identity when the
+    request carries a valid token, else the remote address. Replicas are
+    probed with SELECT 1 every REPLICA_HEALTH_CHECK_SECONDS and marked down
+    as soon as a statement fails with an operational error.
+    """
+
+    def __init__(self, app=None):
+        self.replicas = []
+        self.read_your_writes_seconds = 5.0
+        self.health_check_seconds = 30.0
+        self._state = {}
+        self._pins = {}  # client key -> primary-only until (monotonic)
+        self._binds = {}
+        self._instrumented = weakref.WeakSet()
+        self._next = itertools.count()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._listening = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Register the replica binds; call before db.init_app so they get engines"""
+        uris = app.config.get('SQLALCHEMY_REPLICA_URIS') or []
+        binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+        self.replicas = []
+        for number, uri in enumerate(uris, 1):
+            key = f'replica_{number}'
+            binds[key] = uri
+            self.replicas.append(key)
+        app.config['SQLALCHEMY_BINDS'] = binds
+        self.read_your_writes_seconds = app.config.get('READ_YOUR_WRITES_SECONDS', 5.0)
+        self.health_check_seconds = app.config.get('REPLICA_HEALTH_CHECK_SECONDS', 30.0)
+        self._state = {key: _Replica(key) for key in self.replicas}
+        self._pins = {}
+        self._binds = {}
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.cli.add_command(sync_replicas_command)
+        if not self._listening:
+            self._listening = True
+            event.listen(Session, 'after_flush', self._after_flush)
+            event.listen(Session, 'do_orm_execute', self._on_execute)
+            event.listen(Session, 'after_commit', self._after_commit)
+
+    # --- Routing ---
+    @contextmanager
+    def primary(self):
+        """Send this thread's statements to the primary inside the block.
+
+        Wrap refills of state shared by the whole process (indexes, caches):
+        built from a lagging replica, they would stay behind the primary
+        until the next refill.
+        """
+        depth = getattr(self._local, 'primary', 0)
+        self._local.primary = depth + 1
+        try:
+            yield
+        finally:
+            self._local.primary = depth
+
+    def engine_for(self, clause):
+        """Replica engine for a statement, or None for the default bind"""
+        if not self.replicas or not has_request_context() or getattr(self._local, 'primary', 0):
+            return None
+        if request.method not in READ_METHODS or g.get('db_wrote'):
+            return None
+        if not getattr(clause, 'is_select', False) or getattr(clause, '_for_update_arg', None) is not None:
+            return None
+        if 'db_bind' not in g:
+            g.db_bind = self._choose()
+            self._bind_stats(g.db_bind or PRIMARY).read_requests += 1
+        if g.db_bind is None:
+            return None
+        return current_app.extensions['sqlalchemy'].engines[g.db_bind]
+
+    def _choose(self):
+        if self._pinned():
+            return None
+        for _ in range(len(self.replicas)):
+            key = self.replicas[next(self._next) % len(self.replicas)]
+            if self._healthy(self._state[key]):
+                return key
+        return None
+
+    def _healthy(self, replica):
+        if time.monotonic() - replica.checked_at < self.health_check_seconds:
+            return replica.healthy
+        if not replica.lock.acquire(blocking=False):
+            return replica.healthy  # another request is probing it
+        try:
+            try:
+                with current_app.extensions['sqlalchemy'].engines[replica.key].connect() as connection:
+                    connection.execute(text('SELECT 1'))
+                replica.healthy = True
+            except exc.SQLAlchemyError:
+                replica.healthy = False
+            replica.checked_at = time.monotonic()
+            return replica.healthy
+        finally:
+            replica.lock.release()
+
+    # --- Read-your-writes ---
+    @staticmethod
+    def _client_key():
+        """The JWT identity, or the remote address for anonymous clients, so
+        one user's write does not pin everyone behind the same address"""
+        if 'db_client_key' not in g:
+            try:
+                identity = get_jwt_identity()
+            except RuntimeError:  # no token verified in this request
+                identity = _bearer_identity()
+            g.db_client_key = f'user:{identity}' if identity is not None else f'addr:{request.remote_addr}'
+        return g.db_client_key
+
+    def _pinned(self):
+        if not self._pins:
+            return False
+        return self._pins.get(self._client_key(), 0) > time.monotonic()
+
+    def _pin(self):
+        now = time.monotonic()
+        with self._lock:
+            if len(self._pins) > 10000:
+                self._pins = {key: until for key, until in self._pins.items() if until > now}
+            self._pins[self._client_key()] = now + self.read_your_writes_seconds
+
+    def _after_flush(self, session, flush_context):
+        if has_request_context():
+            g.db_wrote = True
+
+    def _on_execute(self, orm_execute_state):
+        # Core INSERT/UPDATE/DELETE through the session never flush
+        if has_request_context() and not orm_execute_state.is_select:
+            g.db_wrote = True
+
+    def _after_commit(self, session):
+        if has_request_context() and g.get('db_wrote'):
+            g.db_committed = True
+
+    def _after_request(self, response):
+        if self.replicas and g.get('db_committed') and response.status_code < 400:
+            self._pin()
+        return response
+
+    # --- Metrics ---
+    def _bind_stats(self, name):
+        stats = self._binds.get(name)
+        if stats is None:
+            with self._lock:
+                stats = self._binds.setdefault(name, BindStats())
+        return stats
+
+    def _before_request(self):
+        for key, engine in current_app.extensions['sqlalchemy'].engines.items():
+            if engine not in self._instrumented:
+                self._instrument(key or PRIMARY, engine)
+
+    def _instrument(self, name, engine):
+        with self._lock:
+            if engine in self._instrumented:
+                return
+            self._instrumented.add(engine)
+        stats = self._bind_stats(name)
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            context._bind_started = time.perf_counter()
+
+        def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            started = getattr(context, '_bind_started', None)
+            stats.queries += 1
+            if started is not None:
+                stats.db_ms += (time.perf_counter() - started) * 1000
+
+        def handle_error(context):
+            stats.errors += 1
+            replica = self._state.get(name)
+            if replica is not None and (
+                context.is_disconnect or isinstance(context.sqlalchemy_exception, exc.OperationalError)
+            ):
+                replica.healthy = False
+                replica.checked_at = time.monotonic()
+
+        event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', after_cursor_execute)
+        event.listen(engine, 'handle_error', handle_error)
+
+    def mark_healthy(self, key):
+        replica = self._state[key]
+        replica.healthy, replica.checked_at = True, time.monotonic()
+
+    def stats(self):
+        binds = {name: stats.to_dict() for name, stats in sorted(self._binds.items())}
+        for key, replica in self._state.items():
+            binds.setdefault(key, BindStats().to_dict())['healthy'] = replica.healthy
+        now = time.monotonic()
+        return {
+            'replicas': len(self.replicas),
+            'pinned_clients': sum(until > now for until in list(self._pins.values())),
+            'binds': binds
+        }
+
+    def reset(self):
+        with self._lock:
+            for stats in self._binds.values():
+                stats.__init__()
+
+
+def _bearer_identity():
+    """Identity in a valid bearer token the route itself does not verify"""
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    if scheme != 'Bearer' or not token:
+        return None
+    try:
+        return decode_token(token).get(current_app.config.get('JWT_IDENTITY_CLAIM', 'sub'))
+    except (JWTExtendedException, PyJWTError):
+        return None
+
+
+@click.command('sync-replicas')
+@with_appcontext
+def sync_replicas_command():
+    """Copy a SQLite primary into SQLite replica files (local stand-in for replication)"""
+    engines = current_app.extensions['sqlalchemy'].engines
+    primary = engines[None]
+    if not replica_router.replicas:
+        click.echo("No replicas configured (SQLALCHEMY_REPLICA_URIS)")
+        return
+    if primary.dialect.name != 'sqlite':
+        click.echo("Replication is managed by the database server; nothing to copy")
+        return
+    for key in replica_router.replicas:
+        replica = engines[key]
+        if replica.dialect.name != 'sqlite':
+            click.echo(f"Skipping {key}: not a SQLite database")
+            continue
+        replica.dispose()
+        try:
+            target = replica.raw_connection()
+        except sqlite3.Error as e:
+            click.echo(f"   ⚠️ Could not open {key}: {e}")
+            continue
+        source = primary.raw_connection()
+        try:
+            source.driver_connection.backup(target.driver_connection)
+        finally:
+            source.close()
+            target.close()
+        replica_router.mark_healthy(key)
+        click.echo(f"✅ Synced {key} from primary ({replica.url.database})")
+
+
+replica_router = ReplicaRouter()
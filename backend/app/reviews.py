@@ -0,0 +1,210 @@
+# backend/app/reviews.py
+import click
+from datetime import datetime
+from flask.cli import with_appcontext
+from sqlalchemy import case, event, func, inspect, insert, update
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from .models import db, Review, ProductReviewStats
+from .cache import product_page_cache
+
+STATS_COLUMNS = (
+    'review_count', 'rating_sum', 'rating_1', 'rating_2', 'rating_3',
+    'rating_4', 'rating_5', 'verified_count'
+)
+RATINGS = (1, 2, 3, 4, 5)  # other stored values are left out of the aggregates
+
+
+def _counted(rating):
+    return isinstance(rating, int) and not isinstance(rating, bool) and rating in RATINGS
+
+
+def _contribution(product_id, rating, is_active, verified):
+    """What a single review adds to its product's aggregate"""
+    # Column defaults are only applied at INSERT, so None means the default
+    if (is_active is not None and not is_active) or product_id is None or not _counted(rating):
+        return None, {}
+    return product_id, {
+        'review_count': 1,
+        'rating_sum': rating,
+        f'rating_{rating}': 1,
+        'verified_count': 1 if verified else 0
+    }
+
+
+def _old_value(obj, attr):
+    history = inspect(obj).attrs[attr].history
+    if history.deleted:
+        return history.deleted[0]
+    if history.unchanged:
+        return history.unchanged[0]
+    return getattr(obj, attr)
+
+
+def _keep_history(target, value, oldvalue, initiator):
+    """No-op 'set' listener; registering it with active_history is the point"""
+
+
+def _current(obj):
+    return _contribution(obj.product_id, obj.rating, obj.is_active, obj.verified_purchase)
+
+
+def _previous(obj):
+    return _contribution(
+        _old_value(obj, 'product_id'), _old_value(obj, 'rating'),
+        _old_value(obj, 'is_active'), _old_value(obj, 'verified_purchase')
+    )
+
+
+def _accumulate(deltas, product_id, contribution, sign):
+    if product_id is None:
+        return
+    delta = deltas.setdefault(product_id, {})
+    for column, value in contribution.items():
+        delta[column] = delta.get(column, 0) + sign * value
+
+
+def _apply_delta(connection, product_id, delta):
+    """Atomically add a delta to a product's aggregate row, creating it if needed"""
+    table = ProductReviewStats.__table__
+    values = dict({column: 0 for column in STATS_COLUMNS}, **delta)
+    values.update(product_id=product_id, updated_at=datetime.utcnow())
+    dialect = connection.dialect.name
+
+    if dialect == 'sqlite':
+        stmt = sqlite_insert(table).values(values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['product_id'],
+            set_=dict(
+                {column: table.c[column] + stmt.excluded[column] for column in delta},
+                updated_at=stmt.excluded.updated_at
+            )
+        )
+        connection.execute(stmt)
+    elif dialect in ('mysql', 'mariadb'):
+        stmt = mysql_insert(table).values(values)
+        stmt = stmt.on_duplicate_key_update(
+            dict(
+                {column: table.c[column] + stmt.inserted[column] for column in delta},
+                updated_at=stmt.inserted.updated_at
+            )
+        )
+        connection.execute(stmt)
+    else:
+        result = connection.execute(
+            update(table).where(table.c.product_id == product_id).values(
+                dict(
+                    {column: table.c[column] + value for column, value in delta.items()},
+                    updated_at=values['updated_at']
+                )
+            )
+        )
+        if result.rowcount == 0:
+            connection.execute(insert(table).values(values))
+
+
+class ReviewStatsMaintainer:
+    """Keeps ProductReviewStats in step with ORM writes to Review.
+
+    Deltas are derived from attribute history before each flush and applied
+    as atomic increments inside the same transaction, so the aggregate
+    commits or rolls back together with the reviews it describes. Writes that
+    bypass the ORM unit of work need rebuild_review_stats() afterwards.
+    """
+
+    def __init__(self, app=None):
+        self._listening = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        if not self._listening:
+            self._listening = True
+            event.listen(Session, 'before_flush', self._before_flush)
+            event.listen(Session, 'after_flush', self._after_flush)
+            # Load the old value when an expired attribute is assigned, so
+            # _previous() doesn't read the new one back
+            for attr in ('product_id', 'rating', 'is_active', 'verified_purchase'):
+                event.listen(getattr(Review, attr), 'set', _keep_history, active_history=True)
+        app.cli.add_command(rebuild_review_stats_command)
+
+    def _before_flush(self, session, flush_context, instances):
+        deltas = session.info['review_stats_deltas'] = {}
+        for obj in session.new:
+            if isinstance(obj, Review):
+                _accumulate(deltas, *_current(obj), 1)
+        for obj in session.dirty:
+            if isinstance(obj, Review) and session.is_modified(obj):
+                _accumulate(deltas, *_previous(obj), -1)
+                _accumulate(deltas, *_current(obj), 1)
+        for obj in session.deleted:
+            if isinstance(obj, Review):
+                _accumulate(deltas, *_previous(obj), -1)
+
+    def _after_flush(self, session, flush_context):
+        deltas = session.info.pop('review_stats_deltas', None)
+        if not deltas:
+            return
+        connection = session.connection()
+        for product_id, delta in deltas.items():
+            delta = {column: value for column, value in delta.items() if value}
+            if delta:
+                _apply_delta(connection, product_id, delta)
+        # Loaded aggregate rows are now stale
+        for obj in list(session.identity_map.values()):
+            if isinstance(obj, ProductReviewStats) and obj.product_id in deltas:
+                session.expire(obj)
+
+
+def rebuild_review_stats(product_ids=None):
+    """Recompute aggregates from the reviews table (drift repair).
+
+    Rebuilds every product, or only `product_ids` when given, with one
+    grouped query. Returns the number of aggregate rows written.
+    """
+    columns = [
+        Review.product_id,
+        func.count(Review.id),
+        func.sum(Review.rating),
+    ] + [
+        func.sum(case((Review.rating == stars, 1), else_=0)) for stars in RATINGS
+    ] + [
+        func.sum(case((Review.verified_purchase == True, 1), else_=0))
+    ]
+    # The same reviews the incremental path counts
+    query = db.session.query(*columns).filter(Review.is_active == True, Review.rating.in_(RATINGS))
+    stats_query = ProductReviewStats.query
+    if product_ids is not None:
+        query = query.filter(Review.product_id.in_(product_ids))
+        stats_query = stats_query.filter(ProductReviewStats.product_id.in_(product_ids))
+
+    now = datetime.utcnow()
+    rows = [
+        dict(zip(('product_id',) + STATS_COLUMNS, (int(value or 0) for value in row)), updated_at=now)
+        for row in query.group_by(Review.product_id)
+    ]
+    stats_query.delete(synchronize_session=False)
+    if rows:
+        db.session.execute(insert(ProductReviewStats.__table__), rows)
+    db.session.commit()
+
+    if product_ids is None:
+        product_page_cache.clear()
+    else:
+        for product_id in product_ids:
+            product_page_cache.invalidate(product_id)
+    return len(rows)
+
+
+@click.command('rebuild-review-stats')
+@click.option('--product-id', 'product_ids', type=int, multiple=True,
+              help='Only rebuild these products (repeatable)')
+@with_appcontext
+def rebuild_review_stats_command(product_ids):
+    """Recompute per-product review aggregates from the reviews table"""
+    count = rebuild_review_stats(list(product_ids) or None)
+    click.echo(f"✅ Rebuilt review stats for {count} products")
+
+
+review_stats = ReviewStatsMaintainer()
@@ -1,21 +1,72 @@
 # backend/app/routes.py
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
 from .models import (
     db, User, Product, Salt, FAQ, Review, Manufacturer, 
-    Category, ProductSalt, Substitute, Order, OrderItem
+    Category, ProductSalt, Substitute, Order, OrderItem, ProductReviewStats
 )
 from flask_jwt_extended import (
-    create_access_token, jwt_required, get_jwt_identity,
+    create_access_token, jwt_required,
     create_refresh_token, get_jwt
 )
 from datetime import timedelta
+import math
 import uuid
-from sqlalchemy import or_, and_
+from sqlalchemy import Float, func, or_, and_, insert, type_coerce
+from sqlalchemy.orm import joinedload, selectinload, with_expression
+from .cache import product_page_cache
+from .search import search_engine
+from .autocomplete import SUGGESTION_KINDS, autocomplete
+from .conditional import conditional, table_versions
+from .fields import FieldSelectionError, parse_fields, product_load_options
+from .pagination import PaginationError, parse_sort, apply_sort, keyset_paginate
+from .passwords import PasswordHashingUnavailable
+from .auth import current_user, token_claims, user_cache
+from .export import EXPORT_FORMATS, export_chunks
+from .metrics import query_budget, request_metrics
+from .replicas import replica_router
+from .ratelimit import rate_limiter
+from .reference import reference_cache
+from .categories import category_tree, descendant_ids
+from .facets import FacetSelectionError, facet_counter, parse_facets
+from .inventory import (
+    InsufficientStockError, reserve_stock, release_order,
+    reservation_deadline, invalidate_stock
+)
 
 api_bp = Blueprint('api_bp', __name__)
 
+# Average rating from the review aggregates (0 when unrated); computed in SQL
+# over an outer join so listings can sort and keyset-page by it
+PRODUCT_AVERAGE_RATING = type_coerce(func.coalesce(
+    ProductReviewStats.rating_sum * 1.0 / func.nullif(ProductReviewStats.review_count, 0), 0
+), Float).label('average_rating')
+
+# Sort keys accepted by list endpoints (prefix with '-' for descending)
+PRODUCT_SORT_COLUMNS = {
+    'id': Product.id,
+    'price': Product.price,
+    'name': Product.name,
+    'created_at': Product.created_at,
+    'rating': PRODUCT_AVERAGE_RATING
+}
+REVIEW_SORT_COLUMNS = {
+    'created_at': Review.created_at,
+    'rating': Review.rating,
+    'helpful_count': Review.helpful_count
+}
+
+def is_integer(value):
+    """True for JSON integers; bool is an int subclass but never an id or quantity"""
+    return isinstance(value, int) and not isinstance(value, bool)
+
+def login_identity():
+    """Account a login attempt is for, so one account can't be brute-forced from many addresses"""
+    username = (request.get_json(silent=True) or {}).get('username')
+    return username.strip().lower() if isinstance(username, str) and username.strip() else None
+
 # --- Authentication Endpoints ---
 @api_bp.route('/login', methods=['POST'])
+@rate_limiter.limit('login', '5/minute', identity=login_identity)
 def login():
     """User login endpoint with JWT token generation"""
     try:
@@ -30,13 +81,27 @@ def login():
             or_(User.username == username, User.email == username)
         ).first()
         
+        # Hand the pooled connection back before the slow bcrypt check so a
+        # burst of logins can't exhaust the pool for every other endpoint
+        db.session.close()
+        
         if user and user.check_password(password) and user.is_active:
+            # Transparently upgrade hashes made with a different bcrypt cost
+            if user.password_needs_rehash():
+                user.set_password(password)
+                db.session.add(user)
+                db.session.commit()
+            
             # Create tokens
             access_token = create_access_token(
                 identity=user.username,
+                additional_claims=token_claims(user),
                 expires_delta=timedelta(hours=24)
             )
-            refresh_token = create_refresh_token(identity=user.username)
+            refresh_token = create_refresh_token(
+                identity=user.username,
+                additional_claims=token_claims(user)
+            )
             
             return jsonify({
                 "access_token": access_token,
@@ -47,10 +112,15 @@ def login():
         else:
             return jsonify({"error": "Invalid username or password"}), 401
             
+    except PasswordHashingUnavailable as e:
+        db.session.rollback()
+        return jsonify({"error": "Login temporarily unavailable", "details": str(e)}), 503, \
+            {'Retry-After': str(e.retry_after)}
     except Exception as e:
         return jsonify({"error": "Login failed", "details": str(e)}), 500
 
 @api_bp.route('/register', methods=['POST'])
+@rate_limiter.limit('register', '10/hour', burst=3)
 def register():
     """User registration endpoint"""
     try:
@@ -70,6 +140,9 @@ def register():
         if existing_user:
             return jsonify({"error": "Username or email already exists"}), 400
         
+        # Release the pooled connection while bcrypt runs
+        db.session.close()
+        
         # Create new user
         user = User(
             username=data['username'],
@@ -87,6 +160,10 @@ def register():
             "user": user.to_dict()
         }), 201
         
+    except PasswordHashingUnavailable as e:
+        db.session.rollback()
+        return jsonify({"error": "Registration temporarily unavailable", "details": str(e)}), 503, \
+            {'Retry-After': str(e.retry_after)}
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": "Registration failed", "details": str(e)}), 500
@@ -95,8 +172,10 @@ def register():
 @jwt_required(refresh=True)
 def refresh():
     """Refresh JWT token"""
-    current_user = get_jwt_identity()
-    new_token = create_access_token(identity=current_user)
+    user = current_user()
+    if user is None:
+        return jsonify({"error": "User not found"}), 401
+    new_token = create_access_token(identity=user.username, additional_claims=token_claims(user))
     return jsonify(access_token=new_token)
 
 @api_bp.route('/logout', methods=['POST'])
@@ -109,99 +188,132 @@ def logout():
 @jwt_required()
 def get_profile():
     """Get current user profile"""
-    current_user = get_jwt_identity()
-    user = User.query.filter_by(username=current_user).first()
+    user = current_user()
     
     if user:
         return jsonify({"user": user.to_dict()}), 200
     return jsonify({"error": "User not found"}), 404
 
 # --- Product Data Endpoints ---
+def build_product_page(product_id):
+    """Assemble the product page payload and the cache tags it depends on"""
+    # Eager-load everything to_dict() touches so the page is assembled
+    # from a fixed number of queries, however many salts/reviews exist
+    product = Product.query.options(
+        *product_load_options(None),
+        selectinload(Product.product_salts).joinedload(ProductSalt.salt)
+    ).filter(Product.id == product_id).first_or_404()
+    salt_ids = [ps.salt_id for ps in product.product_salts]
+    
+    # 1. Product Details
+    product_details = product.to_dict()
+    
+    # 2. Salt Content with detailed composition
+    salt_content = [salt.to_dict() for salt in product.product_salts]
+    
+    # 3. Substitutes, precomputed from salt composition (see substitutes.py)
+    substitutes = Substitute.query.options(
+        joinedload(Substitute.substitute_product).options(*product_load_options(None))
+    ).join(Substitute.substitute_product).filter(
+        Substitute.product_id == product_id,
+        Product.is_active == True
+    ).order_by(Substitute.similarity_score.desc(), Substitute.id).limit(6).all()
+    substitutes_data = [sub.to_dict() for sub in substitutes]
+    
+    # 4. FAQs - both product-specific and salt-specific
+    faqs_data = []
+    
+    # Product-specific FAQs
+    product_faqs = FAQ.query.filter_by(product_id=product_id, is_active=True).all()
+    faqs_data.extend([faq.to_dict() for faq in product_faqs])
+    
+    # Salt-specific FAQs
+    if salt_ids:
+        salt_faqs = FAQ.query.filter(
+            FAQ.salt_id.in_(salt_ids),
+            FAQ.is_active == True
+        ).limit(10).all()
+        faqs_data.extend([faq.to_dict() for faq in salt_faqs])
+    
+    # 5. Review aggregates (O(1) lookup) and the top reviews only
+    stats = db.session.get(ProductReviewStats, product_id)
+    review_stats = (stats or ProductReviewStats(product_id=product_id)).to_dict()
+    
+    reviews = Review.query.filter(
+        Review.product_id == product_id,
+        Review.is_active == True
+    ).order_by(
+        Review.helpful_count.desc(), Review.created_at.desc(), Review.id.desc()
+    ).limit(current_app.config.get('PRODUCT_PAGE_REVIEW_LIMIT', 10)).all()
+    reviews_data = [review.to_dict() for review in reviews]
+    
+    # 6. Related products from same category
+    related = []
+    if product.category_id:
+        related = Product.query.options(*product_load_options(None)).filter(
+            Product.category_id == product.category_id,
+            Product.id != product_id,
+            Product.is_active == True
+        ).limit(4).all()
+    related_products = [p.to_dict() for p in related]
+    
+    # Everything embedded in the page, so writes to any of it evict the entry
+    embedded = [product] + related + [sub.substitute_product for sub in substitutes]
+    tags = {('salt', salt_id) for salt_id in salt_ids}
+    tags.update(('product', p.id) for p in embedded)
+    tags.update(('manufacturer', p.manufacturer_id) for p in embedded)
+    if product.category_id:
+        tags.add(('category', product.category_id))
+    
+    payload = {
+        "product_details": product_details,
+        "salt_content": salt_content,
+        "substitutes": substitutes_data,
+        "faqs": faqs_data,
+        "reviews": reviews_data,
+        "average_rating": review_stats['average_rating'],
+        "total_reviews": review_stats['total_reviews'],
+        "rating_histogram": review_stats['rating_histogram'],
+        "verified_reviews": review_stats['verified_reviews'],
+        "related_products": related_products
+    }
+    return payload, tags
+
 @api_bp.route('/product/<int:product_id>', methods=['GET'])
 @jwt_required()
+@query_budget(11)  # 8 for a cold page, plus 3 when reference data is refilled
+@conditional(product_page_cache.etag, 'product_page')
 def get_product_data(product_id):
     """Fetch comprehensive product data for product page"""
     try:
-        product = Product.query.get_or_404(product_id)
-        
-        # 1. Product Details
-        product_details = product.to_dict()
-        
-        # 2. Salt Content with detailed composition
-        salt_content = [salt.to_dict() for salt in product.product_salts]
-        
-        # 3. Substitutes based on similar products
-        substitutes_query = Substitute.query.filter_by(product_id=product_id).limit(6)
-        substitutes_data = [sub.to_dict() for sub in substitutes_query]
-        
-        # If no predefined substitutes, find products with similar salts
-        if not substitutes_data:
-            # Get products with similar salt composition
-            similar_products = Product.query.join(ProductSalt).join(Salt).filter(
-                Salt.id.in_([ps.salt_id for ps in product.product_salts]),
-                Product.id != product_id,
-                Product.is_active == True
-            ).limit(6).all()
-            
-            substitutes_data = [{
-                'id': p.id,
-                'name': p.name,
-                'manufacturer': p.manufacturer_info.name if p.manufacturer_info else '',
-                'price': float(p.price),
-                'strength': p.strength,
-                'similarity_score': 0.8
-            } for p in similar_products]
-        
-        # 4. FAQs - both product-specific and salt-specific
-        faqs_data = []
-        
-        # Product-specific FAQs
-        product_faqs = FAQ.query.filter_by(product_id=product_id, is_active=True).all()
-        faqs_data.extend([faq.to_dict() for faq in product_faqs])
-        
-        # Salt-specific FAQs
-        if product.product_salts:
-            salt_ids = [ps.salt_id for ps in product.product_salts]
-            salt_faqs = FAQ.query.filter(
-                FAQ.salt_id.in_(salt_ids),
-                FAQ.is_active == True
-            ).limit(10).all()
-            faqs_data.extend([faq.to_dict() for faq in salt_faqs])
-        
-        # 5. Reviews with user details
-        reviews_data = [review.to_dict() for review in product.reviews if review.is_active]
-        
-        # Calculate average rating
-        avg_rating = 0
-        if reviews_data:
-            avg_rating = sum(review['rating'] for review in reviews_data) / len(reviews_data)
-        
-        # 6. Related products from same category
-        related_products = []
-        if product.category_id:
-            related = Product.query.filter(
-                Product.category_id == product.category_id,
-                Product.id != product_id,
-                Product.is_active == True
-            ).limit(4).all()
-            related_products = [p.to_dict() for p in related]
+        cached = product_page_cache.get(product_id)
+        if cached is not None:
+            return jsonify(cached), 200
         
-        return jsonify({
-            "product_details": product_details,
-            "salt_content": salt_content,
-            "substitutes": substitutes_data,
-            "faqs": faqs_data,
-            "reviews": reviews_data,
-            "average_rating": round(avg_rating, 1),
-            "total_reviews": len(reviews_data),
-            "related_products": related_products
-        }), 200
+        generation = product_page_cache.generation()
+        with replica_router.primary():  # cached for every client
+            payload, tags = build_product_page(product_id)
+        product_page_cache.set(product_id, payload, tags, generation)
+        
+        return jsonify(payload), 200
         
     except Exception as e:
         return jsonify({"error": "Failed to fetch product data", "details": str(e)}), 500
 
+def product_list_versions():
+    """Watermarks of every table the requested product listing depends on"""
+    models = [Product, Manufacturer, Category]
+    if request.args.get('sort', '').strip().lstrip('-') == 'rating':
+        models.append(ProductReviewStats)
+    if not request.args.get('search'):
+        return table_versions(*models)
+    # Matches also depend on salt names and compositions, which carry no
+    # updated_at; the search index version moves when either is edited
+    return table_versions(*models, Salt, ProductSalt) + [search_engine.version()]
+
 @api_bp.route('/products', methods=['GET'])
 @jwt_required()
+@conditional(product_list_versions, 'product_list')
 def get_products():
     """Get paginated list of products with filters"""
     try:
@@ -210,28 +322,46 @@ def get_products():
         per_page = request.args.get('per_page', 20, type=int)
         search = request.args.get('search', '')
         category_id = request.args.get('category_id', type=int)
+        include_subcategories = request.args.get('include_subcategories', 'true').lower() == 'true'
         manufacturer_id = request.args.get('manufacturer_id', type=int)
         min_price = request.args.get('min_price', type=float)
         max_price = request.args.get('max_price', type=float)
         prescription_required = request.args.get('prescription_required', type=bool)
+        sort_key, descending = parse_sort(request.args.get('sort'), PRODUCT_SORT_COLUMNS, 'id')
+        sort_column = PRODUCT_SORT_COLUMNS[sort_key]
+        fields = parse_fields(request.args.get('fields'))
+        facet_names = parse_facets(request.args.get('facets'))
+        
+        # Build query, loading only the columns the requested fields render
+        if sort_key == 'rating':
+            query = Product.query.options(
+                *product_load_options(fields),
+                with_expression(Product.average_rating, PRODUCT_AVERAGE_RATING)
+            ).outerjoin(ProductReviewStats, ProductReviewStats.product_id == Product.id)
+        else:
+            query = Product.query.options(*product_load_options(fields, extra_columns=(sort_column,)))
+        query = query.filter(Product.is_active == True)
         
-        # Build query
-        query = Product.query.filter(Product.is_active == True)
-        
-        # Apply filters
+        # Apply filters, mirrored into the facet index's terms
+        search_ids = None
+        search_truncated = False
+        facet_filters = {}
         if search:
-            query = query.filter(
-                or_(
-                    Product.name.ilike(f'%{search}%'),
-                    Product.description_general.ilike(f'%{search}%')
-                )
-            )
-        
-        if category_id:
+            # Past SEARCH_MAX_CANDIDATES only the best matches are listed
+            search_ids, search_truncated = search_engine.match_ids(search)
+            query = query.filter(Product.id.in_(search_ids))
+        
+        if category_id and include_subcategories:
+            query = query.filter(Product.category_id.in_(descendant_ids(category_id)))
+            if facet_names:
+                facet_filters['category'] = set(db.session.execute(descendant_ids(category_id)).scalars())
+        elif category_id:
             query = query.filter(Product.category_id == category_id)
+            facet_filters['category'] = category_id
             
         if manufacturer_id:
             query = query.filter(Product.manufacturer_id == manufacturer_id)
+            facet_filters['manufacturer'] = manufacturer_id
             
         if min_price is not None:
             query = query.filter(Product.price >= min_price)
@@ -239,18 +369,50 @@ def get_products():
         if max_price is not None:
             query = query.filter(Product.price <= max_price)
             
+        if min_price is not None or max_price is not None:
+            facet_filters['price'] = (min_price, max_price)
+            
         if prescription_required is not None:
             query = query.filter(Product.prescription_required == prescription_required)
+            facet_filters['prescription'] = prescription_required
         
-        # Pagination
-        products = query.paginate(
+        # Facet counts come from the in-memory facet index, not extra queries
+        facets = facet_counter.counts(facet_names, facet_filters, search_ids) if facet_names else None
+        
+        # Cursor pagination: seek past the last row instead of COUNT + OFFSET
+        if 'cursor' in request.args:
+            products, next_cursor = keyset_paginate(
+                query, sort_column, Product.id, sort_key, descending,
+                request.args.get('cursor'), per_page
+            )
+            pagination = {
+                "per_page": per_page,
+                "sort": request.args.get('sort', sort_key),
+                "next_cursor": next_cursor,
+                "has_next": next_cursor is not None
+            }
+            if request.args.get('include_total', 'false').lower() == 'true':
+                pagination["total"] = query.order_by(None).count()
+            if search:
+                pagination["search_truncated"] = search_truncated
+            
+            result = {
+                "products": [product.to_dict(fields) for product in products],
+                "pagination": pagination
+            }
+            if facets is not None:
+                result["facets"] = facets
+            return jsonify(result), 200
+        
+        # Offset pagination
+        products = apply_sort(query, sort_column, Product.id, descending).paginate(
             page=page, 
             per_page=per_page, 
             error_out=False
         )
         
-        return jsonify({
-            "products": [product.to_dict() for product in products.items],
+        result = {
+            "products": [product.to_dict(fields) for product in products.items],
             "pagination": {
                 "page": page,
                 "per_page": per_page,
@@ -259,30 +421,109 @@ def get_products():
                 "has_next": products.has_next,
                 "has_prev": products.has_prev
             }
+        }
+        if search:
+            result["pagination"]["search_truncated"] = search_truncated
+        if facets is not None:
+            result["facets"] = facets
+        return jsonify(result), 200
+        
+    except (PaginationError, FieldSelectionError, FacetSelectionError) as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": "Failed to fetch products", "details": str(e)}), 500
+
+@api_bp.route('/products/batch', methods=['GET', 'POST'])
+@jwt_required()
+def get_products_batch():
+    """Product summaries for many known ids in one query (cart, orders, substitutes)"""
+    try:
+        if request.method == 'POST':
+            data = request.get_json() or {}
+            raw_ids = data.get('ids', [])
+            fields_param = data.get('fields')
+        else:
+            # Query string ids are digit strings; anything else is rejected below
+            raw_ids = [
+                int(part) if part.strip().isdecimal() else part
+                for part in request.args.get('ids', '').split(',') if part.strip()
+            ]
+            fields_param = request.args.get('fields')
+        
+        if not isinstance(raw_ids, list):
+            return jsonify({"error": "ids must be a list of product ids"}), 400
+        if not all(is_integer(product_id) for product_id in raw_ids):
+            return jsonify({"error": "ids must be integers"}), 400
+        # Deduplicate while keeping the caller's order
+        product_ids = list(dict.fromkeys(raw_ids))
+        
+        if not product_ids:
+            return jsonify({"error": "At least one product id is required"}), 400
+        max_ids = current_app.config.get('PRODUCT_BATCH_MAX_IDS', 500)
+        if len(product_ids) > max_ids:
+            return jsonify({"error": f"At most {max_ids} ids per request"}), 400
+        
+        fields = parse_fields(fields_param, default='summary')
+        loaded = Product.query.options(
+            *product_load_options(fields)
+        ).filter(Product.id.in_(product_ids)).all()
+        by_id = {product.id: product for product in loaded}
+        
+        return jsonify({
+            "products": [by_id[pid].to_dict(fields) for pid in product_ids if pid in by_id],
+            "missing": [pid for pid in product_ids if pid not in by_id]
         }), 200
         
+    except FieldSelectionError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": "Failed to fetch products", "details": str(e)}), 500
 
+@api_bp.route('/products/export', methods=['GET'])
+@jwt_required()
+def export_products():
+    """Stream the whole catalog as NDJSON or CSV without paging"""
+    export_format = request.args.get('format', 'ndjson')
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({"error": f"Invalid format. Allowed: {', '.join(EXPORT_FORMATS)}"}), 400
+    include_inactive = request.args.get('include_inactive', 'false').lower() == 'true'
+    
+    mimetype, extension = EXPORT_FORMATS[export_format]
+    return Response(
+        stream_with_context(export_chunks(export_format, include_inactive)),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename=products.{extension}'}
+    )
+
 @api_bp.route('/categories', methods=['GET'])
+@conditional(lambda: table_versions(Category), 'reference')
 def get_categories():
     """Get all product categories"""
     try:
-        categories = Category.query.all()
-        return jsonify({
-            "categories": [category.to_dict() for category in categories]
-        }), 200
+        return jsonify({"categories": reference_cache.rows('categories')}), 200
     except Exception as e:
         return jsonify({"error": "Failed to fetch categories", "details": str(e)}), 500
 
+@api_bp.route('/categories/tree', methods=['GET'])
+@conditional(lambda: table_versions(Category, Product), 'reference')
+def get_category_tree():
+    """Nested category tree with descendant-inclusive product counts"""
+    try:
+        root_id = request.args.get('root_id', type=int)
+        tree = category_tree(root_id)
+        if root_id is not None and not tree:
+            return jsonify({"error": "Category not found"}), 404
+        
+        return jsonify({"categories": tree}), 200
+    except Exception as e:
+        return jsonify({"error": "Failed to fetch category tree", "details": str(e)}), 500
+
 @api_bp.route('/manufacturers', methods=['GET'])
+@conditional(lambda: table_versions(Manufacturer), 'reference')
 def get_manufacturers():
     """Get all manufacturers"""
     try:
-        manufacturers = Manufacturer.query.all()
-        return jsonify({
-            "manufacturers": [manufacturer.to_dict() for manufacturer in manufacturers]
-        }), 200
+        return jsonify({"manufacturers": reference_cache.rows('manufacturers')}), 200
     except Exception as e:
         return jsonify({"error": "Failed to fetch manufacturers", "details": str(e)}), 500
 
@@ -294,11 +535,36 @@ def get_product_reviews(product_id):
     try:
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 10, type=int)
+        sort_key, descending = parse_sort(request.args.get('sort'), REVIEW_SORT_COLUMNS, '-created_at')
+        sort_column = REVIEW_SORT_COLUMNS[sort_key]
         
-        reviews = Review.query.filter(
+        query = Review.query.filter(
             Review.product_id == product_id,
             Review.is_active == True
-        ).order_by(Review.created_at.desc()).paginate(
+        )
+        
+        # Cursor pagination: seek past the last row instead of COUNT + OFFSET
+        if 'cursor' in request.args:
+            reviews, next_cursor = keyset_paginate(
+                query, sort_column, Review.id, sort_key, descending,
+                request.args.get('cursor'), per_page
+            )
+            pagination = {
+                "per_page": per_page,
+                "sort": request.args.get('sort', '-created_at'),
+                "next_cursor": next_cursor,
+                "has_next": next_cursor is not None
+            }
+            if request.args.get('include_total', 'false').lower() == 'true':
+                pagination["total"] = query.count()
+            
+            return jsonify({
+                "reviews": [review.to_dict() for review in reviews],
+                "pagination": pagination
+            }), 200
+        
+        # Offset pagination
+        reviews = apply_sort(query, sort_column, Review.id, descending).paginate(
             page=page, per_page=per_page, error_out=False
         )
         
@@ -312,6 +578,8 @@ def get_product_reviews(product_id):
             }
         }), 200
         
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": "Failed to fetch reviews", "details": str(e)}), 500
 
@@ -320,8 +588,7 @@ def get_product_reviews(product_id):
 def add_product_review(product_id):
     """Add a review for a product"""
     try:
-        current_user = get_jwt_identity()
-        user = User.query.filter_by(username=current_user).first()
+        user = current_user()
         
         data = request.get_json()
         
@@ -329,8 +596,8 @@ def add_product_review(product_id):
         if not all(key in data for key in ['rating', 'comment']):
             return jsonify({"error": "Rating and comment are required"}), 400
         
-        if not (1 <= data['rating'] <= 5):
-            return jsonify({"error": "Rating must be between 1 and 5"}), 400
+        if not is_integer(data['rating']) or not 1 <= data['rating'] <= 5:
+            return jsonify({"error": "Rating must be an integer between 1 and 5"}), 400
         
         # Check if product exists
         product = Product.query.get(product_id)
@@ -362,6 +629,7 @@ def add_product_review(product_id):
 # --- Search Endpoints ---
 @api_bp.route('/search', methods=['GET'])
 @jwt_required()
+@rate_limiter.limit('search', '60/minute', burst=20)
 def search_products():
     """Advanced product search"""
     try:
@@ -372,41 +640,94 @@ def search_products():
         if not query:
             return jsonify({"error": "Search query is required"}), 400
         
-        # Search in products, salts, and manufacturers
-        products = Product.query.join(ProductSalt).join(Salt).join(Manufacturer).filter(
-            or_(
-                Product.name.ilike(f'%{query}%'),
-                Product.description_general.ilike(f'%{query}%'),
-                Salt.name.ilike(f'%{query}%'),
-                Manufacturer.name.ilike(f'%{query}%')
-            ),
-            Product.is_active == True
-        ).distinct().paginate(
-            page=page, per_page=per_page, error_out=False
-        )
+        fuzzy = request.args.get('fuzzy', 'auto').lower()
+        if fuzzy not in ('auto', 'true', 'false'):
+            return jsonify({"error": "fuzzy must be one of: auto, true, false"}), 400
         
-        return jsonify({
-            "products": [product.to_dict() for product in products.items],
+        page = max(page, 1)
+        per_page = max(per_page, 1)
+        fields = parse_fields(request.args.get('fields'))
+        facet_names = parse_facets(request.args.get('facets'))
+        
+        # Ranked ids from the search index (products, salts, manufacturers);
+        # misspelled names fall back to trigram matching
+        corrections = None
+        if fuzzy == 'true':
+            product_ids, total, corrections = search_engine.fuzzy_search(query, page=page, per_page=per_page)
+        else:
+            product_ids, total = search_engine.search(query, page=page, per_page=per_page)
+            if total == 0 and fuzzy == 'auto' and search_engine.fuzzy_enabled:
+                product_ids, total, corrections = search_engine.fuzzy_search(
+                    query, page=page, per_page=per_page, blend=False
+                )
+        
+        products = []
+        if product_ids:
+            loaded = Product.query.options(
+                *product_load_options(fields)
+            ).filter(Product.id.in_(product_ids)).all()
+            by_id = {product.id: product for product in loaded}
+            products = [by_id[pid] for pid in product_ids if pid in by_id]
+        
+        result = {
+            "products": [product.to_dict(fields) for product in products],
             "pagination": {
                 "page": page,
                 "per_page": per_page,
-                "total": products.total,
-                "pages": products.pages
+                "total": total,
+                "pages": math.ceil(total / per_page)
             },
-            "query": query
-        }), 200
+            "query": query,
+            "fuzzy": corrections is not None,
+            "corrections": corrections or {}
+        }
+        if facet_names:
+            # Counts cover every match, not just this page
+            if corrections is not None:
+                matched, _, _ = search_engine.fuzzy_search(
+                    query, per_page=search_engine.max_candidates, blend=fuzzy == 'true'
+                )
+            else:
+                matched, _ = search_engine.match_ids(query)
+            result["facets"] = facet_counter.counts(facet_names, product_ids=matched)
+        return jsonify(result), 200
         
+    except (FieldSelectionError, FacetSelectionError) as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": "Search failed", "details": str(e)}), 500
 
+@api_bp.route('/autocomplete', methods=['GET'])
+@jwt_required()
+def autocomplete_names():
+    """Popularity-ranked product, salt and manufacturer names for a typed prefix"""
+    try:
+        query = request.args.get('q', '')
+        limit = request.args.get('limit', 5, type=int)
+        kinds = [kind.strip() for kind in request.args.get('types', ','.join(SUGGESTION_KINDS)).split(',') if kind.strip()]
+        
+        invalid = [kind for kind in kinds if kind not in SUGGESTION_KINDS]
+        if invalid:
+            return jsonify({
+                "error": f"Invalid types: {', '.join(invalid)}. Allowed: {', '.join(SUGGESTION_KINDS)}"
+            }), 400
+        
+        return jsonify({
+            "query": query,
+            "suggestions": autocomplete.suggest(query, limit=limit, kinds=kinds)
+        }), 200
+    except Exception as e:
+        return jsonify({"error": "Autocomplete failed", "details": str(e)}), 500
+
 # --- Order Management Endpoints ---
 @api_bp.route('/orders', methods=['POST'])
 @jwt_required()
 def create_order():
     """Create a new order"""
     try:
-        current_user = get_jwt_identity()
-        user = User.query.filter_by(username=current_user).first()
+        user = current_user()
+        if user is None:
+            return jsonify({"error": "User not found"}), 404
         
         data = request.get_json()
         items = data.get('items', [])
@@ -414,15 +735,51 @@ def create_order():
         if not items:
             return jsonify({"error": "Order items are required"}), 400
         
-        # Calculate total amount
+        # Validate every line before touching the database, so all problems
+        # are reported in one response
+        errors = []
+        for index, item in enumerate(items):
+            if not isinstance(item, dict) or not is_integer(item.get('product_id')):
+                errors.append({"line": index, "error": "product_id must be an integer"})
+                continue
+            quantity = item.get('quantity')
+            if not is_integer(quantity) or quantity < 1:
+                errors.append({"line": index, "product_id": item['product_id'],
+                               "error": "quantity must be a positive integer"})
+        
+        # Load every product in the cart with a single query
+        product_ids = {item['product_id'] for item in items
+                       if isinstance(item, dict) and is_integer(item.get('product_id'))}
+        products = {
+            product.id: product
+            for product in Product.query.filter(Product.id.in_(product_ids))
+        } if product_ids else {}
+        
+        missing = 0
+        for index, item in enumerate(items):
+            if isinstance(item, dict) and is_integer(item.get('product_id')) \
+                    and item['product_id'] not in products:
+                missing += 1
+                errors.append({"line": index, "product_id": item['product_id'],
+                               "error": f"Product {item['product_id']} not found"})
+        
+        if errors:
+            errors.sort(key=lambda error: error['line'])
+            status = 404 if missing == len(errors) else 400
+            return jsonify({"error": "Invalid order items", "errors": errors}), status
+        
+        # Take stock for the whole cart in one conditional UPDATE
+        quantities = {}
+        for item in items:
+            quantities[item['product_id']] = quantities.get(item['product_id'], 0) + item['quantity']
+        reserve_stock(quantities)
+        
+        # Price the cart in memory
         total_amount = 0
         order_items = []
         
         for item in items:
-            product = Product.query.get(item['product_id'])
-            if not product:
-                return jsonify({"error": f"Product {item['product_id']} not found"}), 404
-            
+            product = products[item['product_id']]
             quantity = item['quantity']
             unit_price = product.price
             item_total = unit_price * quantity
@@ -442,27 +799,28 @@ def create_order():
             total_amount=total_amount,
             shipping_address=data.get('shipping_address', ''),
             payment_method=data.get('payment_method', 'COD'),
+            reserved_until=reservation_deadline(data.get('payment_method', 'COD')),
             notes=data.get('notes', '')
         )
         
         db.session.add(order)
         db.session.flush()  # Get the order ID
         
-        # Create order items
+        # Create order items with one executemany INSERT
         for item_data in order_items:
-            order_item = OrderItem(
-                order_id=order.id,
-                **item_data
-            )
-            db.session.add(order_item)
+            item_data['order_id'] = order.id
+        db.session.execute(insert(OrderItem), order_items)
         
         db.session.commit()
+        invalidate_stock(quantities)
         
         return jsonify({
             "message": "Order created successfully",
             "order": order.to_dict()
         }), 201
         
+    except InsufficientStockError as e:
+        return jsonify({"error": "Insufficient stock", "shortages": e.shortages}), 409
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": "Failed to create order", "details": str(e)}), 500
@@ -472,8 +830,9 @@ def create_order():
 def get_user_orders():
     """Get current user's orders"""
     try:
-        current_user = get_jwt_identity()
-        user = User.query.filter_by(username=current_user).first()
+        user = current_user()
+        if user is None:
+            return jsonify({"error": "User not found"}), 404
         
         orders = Order.query.filter_by(user_id=user.id).order_by(Order.created_at.desc()).all()
         
@@ -484,6 +843,59 @@ def get_user_orders():
     except Exception as e:
         return jsonify({"error": "Failed to fetch orders", "details": str(e)}), 500
 
+@api_bp.route('/cache/stats', methods=['GET'])
+@jwt_required()
+def get_cache_stats():
+    """Hit/miss/eviction counters for sizing the product page cache"""
+    return jsonify({
+        "product_page": product_page_cache.stats(),
+        "users": user_cache.stats(),
+        "autocomplete": autocomplete.stats(),
+        "facets": facet_counter.stats(),
+        "reference": reference_cache.stats()
+    }), 200
+
+@api_bp.route('/metrics', methods=['GET'])
+@jwt_required()
+def get_metrics():
+    """Per-endpoint latency percentiles, queries per request, per-database-bind and rate limit totals since start or the last reset"""
+    stats = request_metrics.stats()
+    stats['database'] = replica_router.stats()
+    stats['rate_limits'] = rate_limiter.stats()
+    return jsonify(stats), 200
+
+@api_bp.route('/metrics/reset', methods=['POST'])
+@jwt_required()
+def reset_metrics():
+    """Clear the request and database metrics (only where METRICS_RESET_ENABLED is set)"""
+    if not current_app.config.get('METRICS_RESET_ENABLED', False):
+        return jsonify({"error": "Metrics reset is disabled"}), 403
+    request_metrics.reset()
+    replica_router.reset()
+    return jsonify({"message": "Metrics reset"}), 200
+
+@api_bp.route('/orders/<int:order_id>/cancel', methods=['POST'])
+@jwt_required()
+def cancel_order(order_id):
+    """Cancel a pending order and release its reserved stock"""
+    try:
+        user = current_user()
+        if user is None:
+            return jsonify({"error": "User not found"}), 404
+        
+        if not release_order(order_id, status='cancelled', user_id=user.id):
+            return jsonify({"error": "Order not found or can no longer be cancelled"}), 409
+        
+        order = db.session.get(Order, order_id)
+        return jsonify({
+            "message": "Order cancelled successfully",
+            "order": order.to_dict()
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": "Failed to cancel order", "details": str(e)}), 500
+
 # --- Health Check Endpoint ---
 @api_bp.route('/health', methods=['GET'])
 def health_check():
@@ -0,0 +1,792 @@
+# backend/app/search.py
+import bisect
+import heapq
+import logging
+import math
+import re
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import Counter, deque
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import bindparam, event, text
+from sqlalchemy.orm import Session
+from .models import db, Product, ProductSalt, Salt, Manufacturer
+from .replicas import replica_router
+
+logger = logging.getLogger(__name__)
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+# Relative weight of a term depending on which field it came from
+FIELD_WEIGHTS = {
+    'name': 10.0,
+    'salts': 5.0,
+    'manufacturer': 3.0,
+    'description': 1.0
+}
+
+
+def tokenize(value):
+    """Lowercase alphanumeric tokens of a string"""
+    return TOKEN_RE.findall(value.lower()) if value else []
+
+
+def iter_documents(product_ids=None, chunk_size=1000):
+    """Yield (product_id, fields) for active products, or (product_id, None)
+    for requested ids that are missing or inactive and must be dropped.
+
+    Rows are read in primary-key chunks with plain column queries so a full
+    rebuild never holds more than one chunk of ORM state in memory.
+    """
+    if product_ids is not None:
+        product_ids = sorted(set(product_ids))
+
+    last_id = 0
+    offset = 0
+    while True:
+        query = db.session.query(
+            Product.id, Product.name, Product.description_general, Manufacturer.name
+        ).outerjoin(Manufacturer, Product.manufacturer_id == Manufacturer.id).filter(
+            Product.is_active == True
+        )
+        if product_ids is None:
+            rows = query.filter(Product.id > last_id).order_by(Product.id).limit(chunk_size).all()
+            if not rows:
+                return
+            chunk_ids = [row[0] for row in rows]
+            last_id = chunk_ids[-1]
+        else:
+            chunk_ids = product_ids[offset:offset + chunk_size]
+            if not chunk_ids:
+                return
+            offset += chunk_size
+            rows = query.filter(Product.id.in_(chunk_ids)).all()
+
+        salts = {}
+        for product_id, salt_name in db.session.query(ProductSalt.product_id, Salt.name).join(
+            Salt, ProductSalt.salt_id == Salt.id
+        ).filter(ProductSalt.product_id.in_([row[0] for row in rows])):
+            salts.setdefault(product_id, []).append(salt_name)
+
+        found = set()
+        for product_id, name, description, manufacturer in rows:
+            found.add(product_id)
+            yield product_id, {
+                'name': name or '',
+                'description': description or '',
+                'salts': ' '.join(salts.get(product_id, [])),
+                'manufacturer': manufacturer or ''
+            }
+        if product_ids is not None:
+            for product_id in chunk_ids:
+                if product_id not in found:
+                    yield product_id, None
+
+
+class SearchBackend(ABC):
+    """Interface every search backend implements"""
+
+    name = 'base'
+    persistent = False  # the index is a database table shared by every worker
+
+    @abstractmethod
+    def is_empty(self):
+        """True if nothing has been indexed yet"""
+
+    @abstractmethod
+    def rebuild(self, documents):
+        """Replace the whole index with (product_id, fields-or-None) pairs"""
+
+    @abstractmethod
+    def update(self, documents):
+        """Apply (product_id, fields-or-None) pairs; None removes the product"""
+
+    @abstractmethod
+    def search(self, query, limit=20, offset=0):
+        """Return (ranked product ids for the page, total matches)"""
+
+    def match_ids(self, query, limit):
+        """Return up to `limit` ranked product ids matching the query"""
+        return self.search(query, limit=limit)[0]
+
+
+class InMemorySearchBackend(SearchBackend):
+    """Process-local inverted index with field-weighted tf-idf ranking.
+
+    Each query token matches every indexed term it is a prefix of, found by
+    bisecting a sorted term list; a product must match all query tokens.
+    """
+
+    name = 'memory'
+    max_expansions = 64  # terms a single prefix may expand to
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self._postings = {}    # term -> {product_id: weight}
+        self._doc_terms = {}   # product_id -> set of terms
+        self._terms = []       # sorted list of all terms
+
+    def is_empty(self):
+        return not self._doc_terms
+
+    def rebuild(self, documents):
+        with self._lock:
+            self._reset()
+            for product_id, fields in documents:
+                if fields is not None:
+                    self._add(product_id, fields)
+            self._terms = sorted(self._postings)
+
+    def update(self, documents):
+        with self._lock:
+            for product_id, fields in documents:
+                self._remove(product_id)
+                if fields is not None:
+                    for term in self._add(product_id, fields):
+                        bisect.insort(self._terms, term)
+
+    def _add(self, product_id, fields):
+        """Index a document, returning terms that are new to the index"""
+        weights = {}
+        for field, value in fields.items():
+            field_weight = FIELD_WEIGHTS.get(field, 1.0)
+            for token in tokenize(value):
+                weights[token] = weights.get(token, 0.0) + field_weight
+        new_terms = []
+        for term, weight in weights.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                new_terms.append(term)
+            postings[product_id] = weight
+        self._doc_terms[product_id] = set(weights)
+        return new_terms
+
+    def _remove(self, product_id):
+        for term in self._doc_terms.pop(product_id, ()):
+            postings = self._postings[term]
+            postings.pop(product_id, None)
+            if not postings:
+                del self._postings[term]
+                index = bisect.bisect_left(self._terms, term)
+                if index < len(self._terms) and self._terms[index] == term:
+                    del self._terms[index]
+
+    def _expand(self, token):
+        if len(token) < 2:
+            return [token] if token in self._postings else []
+        start = bisect.bisect_left(self._terms, token)
+        expanded = []
+        for term in self._terms[start:start + self.max_expansions]:
+            if not term.startswith(token):
+                break
+            expanded.append(term)
+        return expanded
+
+    def _score(self, query):
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return {}
+        with self._lock:
+            total_docs = max(len(self._doc_terms), 1)
+            per_token = []
+            for token in tokens:
+                scores = {}
+                for term in self._expand(token):
+                    postings = self._postings[term]
+                    idf = math.log(1 + total_docs / len(postings))
+                    # Exact term hits rank above prefix-only hits
+                    boost = 1.0 if term == token else 0.5
+                    for product_id, weight in postings.items():
+                        score = weight * idf * boost
+                        if score > scores.get(product_id, 0.0):
+                            scores[product_id] = score
+                if not scores:
+                    return {}
+                per_token.append(scores)
+
+        per_token.sort(key=len)
+        result = dict(per_token[0])
+        for scores in per_token[1:]:
+            result = {pid: score + scores[pid] for pid, score in result.items() if pid in scores}
+            if not result:
+                break
+        return result
+
+    def search(self, query, limit=20, offset=0):
+        scores = self._score(query)
+        ranked = heapq.nsmallest(offset + limit, scores, key=lambda pid: (-scores[pid], pid))
+        return ranked[offset:], len(scores)
+
+    def match_ids(self, query, limit):
+        scores = self._score(query)
+        return heapq.nsmallest(limit, scores, key=lambda pid: (-scores[pid], pid))
+
+
+class SQLiteFTSSearchBackend(SearchBackend):
+    """SQLite FTS5 virtual table keyed by product id, ranked with bm25()"""
+
+    name = 'sqlite_fts'
+    persistent = True
+    table = 'product_search_fts'
+
+    def _ensure_table(self, connection):
+        connection.execute(text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} "
+            "USING fts5(name, description, salts, manufacturer, "
+            "tokenize='unicode61', prefix='2 3')"
+        ))
+
+    def is_empty(self):
+        with db.engine.begin() as connection:
+            self._ensure_table(connection)
+            return connection.execute(text(f"SELECT rowid FROM {self.table} LIMIT 1")).first() is None
+
+    def _write(self, connection, documents):
+        batch = []
+        for product_id, fields in documents:
+            connection.execute(text(f"DELETE FROM {self.table} WHERE rowid = :id"), {'id': product_id})
+            if fields is not None:
+                batch.append(dict(fields, id=product_id))
+            if len(batch) >= 1000:
+                self._insert(connection, batch)
+                batch = []
+        if batch:
+            self._insert(connection, batch)
+
+    def _insert(self, connection, batch):
+        connection.execute(text(
+            f"INSERT INTO {self.table} (rowid, name, description, salts, manufacturer) "
+            "VALUES (:id, :name, :description, :salts, :manufacturer)"
+        ), batch)
+
+    def rebuild(self, documents):
+        with db.engine.begin() as connection:
+            self._ensure_table(connection)
+            connection.execute(text(f"DELETE FROM {self.table}"))
+            self._write(connection, documents)
+
+    def update(self, documents):
+        with db.engine.begin() as connection:
+            self._ensure_table(connection)
+            self._write(connection, documents)
+
+    @staticmethod
+    def _match_expression(query):
+        return ' AND '.join(f'"{token}"*' for token in tokenize(query))
+
+    def search(self, query, limit=20, offset=0):
+        expression = self._match_expression(query)
+        if not expression:
+            return [], 0
+        weights = ', '.join(str(FIELD_WEIGHTS[field]) for field in ('name', 'description', 'salts', 'manufacturer'))
+        with db.engine.connect() as connection:
+            total = connection.execute(text(
+                f"SELECT count(*) FROM {self.table} WHERE {self.table} MATCH :q"
+            ), {'q': expression}).scalar()
+            ids = connection.execute(text(
+                f"SELECT rowid FROM {self.table} WHERE {self.table} MATCH :q "
+                f"ORDER BY bm25({self.table}, {weights}), rowid LIMIT :limit OFFSET :offset"
+            ), {'q': expression, 'limit': limit, 'offset': offset}).scalars().all()
+        return ids, total
+
+
+class MySQLFulltextSearchBackend(SearchBackend):
+    """MySQL InnoDB FULLTEXT index over a denormalized documents table"""
+
+    name = 'mysql_fulltext'
+    persistent = True
+    table = 'product_search_documents'
+    columns = 'name, description, salts, manufacturer'
+
+    def _ensure_table(self, connection):
+        connection.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {self.table} ("
+            "product_id INT PRIMARY KEY, name VARCHAR(255), description TEXT, "
+            "salts TEXT, manufacturer VARCHAR(255), "
+            f"FULLTEXT KEY ft_product_search ({self.columns})"
+            ") ENGINE=InnoDB"
+        ))
+
+    def is_empty(self):
+        with db.engine.begin() as connection:
+            self._ensure_table(connection)
+            return connection.execute(text(f"SELECT product_id FROM {self.table} LIMIT 1")).first() is None
+
+    def _write(self, connection, documents):
+        upserts, deletes = [], []
+        for product_id, fields in documents:
+            if fields is None:
+                deletes.append(product_id)
+            else:
+                upserts.append(dict(fields, id=product_id))
+            if len(upserts) >= 1000:
+                self._upsert(connection, upserts)
+                upserts = []
+        if upserts:
+            self._upsert(connection, upserts)
+        if deletes:
+            connection.execute(
+                text(f"DELETE FROM {self.table} WHERE product_id IN :ids").bindparams(
+                    bindparam('ids', expanding=True)
+                ), {'ids': deletes}
+            )
+
+    def _upsert(self, connection, batch):
+        connection.execute(text(
+            f"REPLACE INTO {self.table} (product_id, {self.columns}) "
+            "VALUES (:id, :name, :description, :salts, :manufacturer)"
+        ), batch)
+
+    def rebuild(self, documents):
+        with db.engine.begin() as connection:
+            self._ensure_table(connection)
+            connection.execute(text(f"DELETE FROM {self.table}"))
+            self._write(connection, documents)
+
+    def update(self, documents):
+        with db.engine.begin() as connection:
+            self._ensure_table(connection)
+            self._write(connection, documents)
+
+    def search(self, query, limit=20, offset=0):
+        tokens = tokenize(query)
+        if not tokens:
+            return [], 0
+        expression = ' '.join(f'+{token}*' for token in tokens)
+        match = f"MATCH({self.columns}) AGAINST(:q IN BOOLEAN MODE)"
+        with db.engine.connect() as connection:
+            total = connection.execute(text(
+                f"SELECT count(*) FROM {self.table} WHERE {match}"
+            ), {'q': expression}).scalar()
+            ids = connection.execute(text(
+                f"SELECT product_id FROM {self.table} WHERE {match} "
+                f"ORDER BY {match} DESC, product_id LIMIT :limit OFFSET :offset"
+            ), {'q': expression, 'limit': limit, 'offset': offset}).scalars().all()
+        return ids, total
+
+
+SEARCH_BACKENDS = {
+    InMemorySearchBackend.name: InMemorySearchBackend,
+    SQLiteFTSSearchBackend.name: SQLiteFTSSearchBackend,
+    MySQLFulltextSearchBackend.name: MySQLFulltextSearchBackend
+}
+
+
+# Relative weight of a fuzzy hit depending on which field the word came from
+FUZZY_FIELD_WEIGHTS = {
+    'name': 1.0,
+    'salts': 0.9
+}
+MIN_WORD_LENGTH = 3
+
+
+def trigrams(word):
+    """Character trigrams of a word padded like pg_trgm ('  ab', ' abc', ...)"""
+    padded = f'  {word} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_similarity(a, b):
+    """1 - optimal string alignment distance / longer length (transpositions count once)"""
+    if a == b:
+        return 1.0
+    before, previous = None, list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            distance = previous[j - 1] + (char_a != char_b)
+            if current[j - 1] + 1 < distance:
+                distance = current[j - 1] + 1
+            if previous[j] + 1 < distance:
+                distance = previous[j] + 1
+            if (i > 1 and j > 1 and char_a == b[j - 2] and a[i - 2] == char_b
+                    and before[j - 2] + 1 < distance):
+                distance = before[j - 2] + 1
+            current.append(distance)
+        before, previous = previous, current
+    return 1 - previous[-1] / max(len(a), len(b))
+
+
+def fuzzy_words(value):
+    """Tokens worth fuzzy matching: alphabetic and at least MIN_WORD_LENGTH long"""
+    return [token for token in tokenize(value) if len(token) >= MIN_WORD_LENGTH and token.isalpha()]
+
+
+class TrigramIndex:
+    """Typo-tolerant word index over product and salt names.
+
+    Words are indexed by their character trigrams. A word needs at least
+    ceil(s * |Q|) trigrams in common with a query word Q to reach Jaccard
+    similarity s, so candidates are drawn only from the posting lists of
+    Q's |Q| - ceil(s * |Q|) + 1 rarest trigrams and then verified; common
+    trigrams such as ' pa' are never scanned. Survivors are ranked by edit
+    similarity, which tells apart near-identical drug names that trigram
+    overlap cannot. Products must fuzzily match every query word.
+    """
+
+    def __init__(self, min_similarity=0.3, max_expansions=32):
+        self.min_similarity = min_similarity
+        self.max_expansions = max_expansions  # similar words kept per query word
+        self.candidates_checked = 0
+        self._lock = threading.RLock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._grams = {}       # trigram -> set of words
+            self._word_grams = {}  # word -> its trigrams
+            self._postings = {}    # word -> {product_id: weight}
+            self._doc_words = {}   # product_id -> set of words
+
+    def __len__(self):
+        return len(self._postings)
+
+    def add(self, product_id, fields):
+        with self._lock:
+            self._add(product_id, fields)
+
+    def remove(self, product_id):
+        with self._lock:
+            self._remove(product_id)
+
+    def _add(self, product_id, fields):
+        self._remove(product_id)
+        weights = {}
+        for field, field_weight in FUZZY_FIELD_WEIGHTS.items():
+            for word in fuzzy_words(fields.get(field)):
+                weights[word] = max(weights.get(word, 0.0), field_weight)
+        for word, weight in weights.items():
+            postings = self._postings.get(word)
+            if postings is None:
+                postings = self._postings[word] = {}
+                grams = self._word_grams[word] = frozenset(trigrams(word))
+                for gram in grams:
+                    self._grams.setdefault(gram, set()).add(word)
+            postings[product_id] = weight
+        self._doc_words[product_id] = set(weights)
+
+    def _remove(self, product_id):
+        for word in self._doc_words.pop(product_id, ()):
+            postings = self._postings[word]
+            postings.pop(product_id, None)
+            if not postings:
+                del self._postings[word]
+                for gram in self._word_grams.pop(word):
+                    words = self._grams[gram]
+                    words.discard(word)
+                    if not words:
+                        del self._grams[gram]
+
+    def observe(self, documents):
+        """Index (product_id, fields-or-None) pairs while passing them through"""
+        for product_id, fields in documents:
+            if fields is None:
+                self.remove(product_id)
+            else:
+                self.add(product_id, fields)
+            yield product_id, fields
+
+    def similar_words(self, word):
+        """[(indexed word, edit similarity)] best first, for words whose
+        trigram similarity reaches min_similarity"""
+        grams = trigrams(word)
+        needed = math.ceil(self.min_similarity * len(grams))
+        probes = sorted(grams, key=lambda gram: len(self._grams.get(gram, ())))[:len(grams) - needed + 1]
+        candidates = set()
+        for gram in probes:
+            candidates.update(self._grams.get(gram, ()))
+        self.candidates_checked += len(candidates)
+
+        # Shared trigram counts, tallied a posting list at a time
+        shared = Counter()
+        for gram in grams:
+            words = self._grams.get(gram)
+            if words:
+                shared.update(candidates.intersection(words))
+        size, word_grams = len(grams), self._word_grams
+        scored = [
+            (count / (size + len(word_grams[candidate]) - count), candidate)
+            for candidate, count in shared.items() if count >= needed
+        ]
+        best = heapq.nlargest(self.max_expansions, (item for item in scored if item[0] >= self.min_similarity))
+        ranked = [(candidate, edit_similarity(word, candidate)) for _, candidate in best]
+        ranked.sort(key=lambda item: (-item[1], item[0]))
+        return ranked
+
+    def search(self, query, limit):
+        """(ranked product ids, {query word: best indexed word}) for a possibly misspelled query"""
+        words = list(dict.fromkeys(fuzzy_words(query)))
+        if not words:
+            return [], {}
+        with self._lock:
+            return self._search(words, limit)
+
+    def _search(self, words, limit):
+        scores, corrections = None, {}
+        for word in words:
+            similar = self.similar_words(word)
+            if not similar:
+                return [], {}
+            if similar[0][0] != word:
+                corrections[word] = similar[0][0]
+            word_scores = {}
+            for candidate, similarity in similar:
+                for product_id, weight in self._postings[candidate].items():
+                    score = similarity * weight
+                    if score > word_scores.get(product_id, 0.0):
+                        word_scores[product_id] = score
+            if scores is None:
+                scores = word_scores
+            else:
+                scores = {pid: score + word_scores[pid] for pid, score in scores.items() if pid in word_scores}
+            if not scores:
+                return [], corrections
+        ranked = sorted(scores, key=lambda pid: (-scores[pid], pid))
+        return ranked[:limit], corrections
+
+
+class SearchEngine:
+    """Keeps the configured backend in sync with the catalog.
+
+    The index is built on first use. Committed changes to products, their
+    salts and the salt/manufacturer names they embed are queued by session
+    events and applied before the next search, so writers never pay for
+    indexing and readers see this process's commits at once. Writes by other
+    workers or CLI commands are picked up by a rebuild every
+    SEARCH_REBUILD_SECONDS (or after invalidate()), which runs on a
+    background thread and swaps the new index in when it is done; searches
+    keep using the old one meanwhile. A persistent backend's shared table is
+    only written in full when it is empty or by rebuild-search-index; the
+    periodic rebuild then refreshes just this process's trigram index for
+    fuzzy_search(), which is fed from the same document stream whatever the
+    backend.
+    """
+
+    def __init__(self, app=None):
+        self.backend = InMemorySearchBackend()
+        self.fuzzy = TrigramIndex()
+        self.fuzzy_enabled = True
+        self.max_candidates = 10000
+        self.rebuild_seconds = 900
+        self._built_at = None
+        self._expired = False
+        self._builder = None  # background rebuild thread, while one runs
+        self._replay = None   # changes applied to the old index during a rebuild
+        self._instance = uuid.uuid4().hex
+        self._generation = 0
+        self._pending = set()
+        self._lock = threading.RLock()          # serializes index writes
+        self._pending_lock = threading.Lock()   # guards the change queue
+        self._listening = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        backend_name = app.config.get('SEARCH_BACKEND', 'memory')
+        if backend_name not in SEARCH_BACKENDS:
+            raise ValueError(f"Unknown SEARCH_BACKEND '{backend_name}'")
+        self.wait_for_rebuild()
+        self.backend = SEARCH_BACKENDS[backend_name]()
+        self.max_candidates = app.config.get('SEARCH_MAX_CANDIDATES', 10000)
+        self.rebuild_seconds = app.config.get('SEARCH_REBUILD_SECONDS', 900)
+        self.fuzzy_enabled = app.config.get('FUZZY_SEARCH_ENABLED', True)
+        self.fuzzy = TrigramIndex(
+            min_similarity=app.config.get('FUZZY_MIN_SIMILARITY', 0.3),
+            max_expansions=app.config.get('FUZZY_MAX_EXPANSIONS', 32)
+        )
+        self._built_at = None
+        self._expired = False
+        self._pending = set()
+        app.cli.add_command(rebuild_search_index_command)
+        if not self._listening:
+            self._listening = True
+            event.listen(Session, 'after_flush', self._after_flush)
+            event.listen(Session, 'after_commit', self._after_commit)
+            event.listen(Session, 'after_soft_rollback', self._after_rollback)
+
+    def rebuild(self):
+        """Rebuild now, rewriting a persistent backend's shared table too"""
+        with self._lock, replica_router.primary():
+            self._rebuild(shared=True)
+
+    def _rebuild(self, shared):
+        """Build fresh indexes off to the side, then swap them in.
+
+        `shared` also rewrites a persistent backend's table; without it only
+        this process's in-memory indexes are rebuilt. Changes applied to the
+        old index while this runs are replayed onto the new one.
+        """
+        with self._pending_lock:
+            self._pending.clear()  # the documents read below include them
+            self._replay = set()
+        persistent = self.backend.persistent
+        backend = self.backend if persistent else type(self.backend)()
+        fuzzy = TrigramIndex(self.fuzzy.min_similarity, self.fuzzy.max_expansions)
+        documents = iter_documents()
+        if self.fuzzy_enabled:
+            documents = fuzzy.observe(documents)
+        if shared or not persistent:
+            backend.rebuild(documents)
+        elif self.fuzzy_enabled:
+            deque(documents, maxlen=0)  # only the trigram index lives in this process
+        with self._lock:
+            self.backend, self.fuzzy = backend, fuzzy
+            with self._pending_lock:
+                self._pending.update(self._replay)
+                self._replay = None
+            self._built_at = time.monotonic()
+            self._expired = False
+            self._generation += 1
+
+    def _start_rebuild(self):
+        with self._pending_lock:
+            if self._builder is not None:
+                return
+            self._builder = threading.Thread(
+                target=self._rebuild_in_background, args=(current_app._get_current_object(),),
+                name='search-rebuild', daemon=True
+            )
+        self._builder.start()
+
+    def _rebuild_in_background(self, app):
+        try:
+            with app.app_context():
+                self._rebuild(shared=False)
+        except Exception:
+            logger.exception('search index rebuild failed; keeping the current index')
+            with self._pending_lock:
+                self._replay = None
+            self._built_at, self._expired = time.monotonic(), False  # retry after another interval
+        finally:
+            with self._pending_lock:
+                self._builder = None
+
+    def wait_for_rebuild(self, timeout=None):
+        """Block until a background rebuild, if any, has been swapped in"""
+        builder = self._builder
+        if builder is not None:
+            builder.join(timeout)
+
+    def invalidate(self):
+        """Rebuild on next use (after bulk writes that bypass the ORM);
+        searches keep using the current index until the new one is ready"""
+        self._expired = True
+
+    def _stale(self):
+        return self._expired or time.monotonic() - self._built_at > self.rebuild_seconds
+
+    def refresh(self):
+        """Build the index on first use, start a background rebuild when one
+        is due, then apply queued changes"""
+        if self._built_at is None:
+            with self._lock, replica_router.primary():
+                if self._built_at is None:  # nothing to serve yet, so build in line
+                    self._rebuild(shared=self.backend.is_empty())
+        elif self._stale():
+            self._start_rebuild()
+        if not self._pending:
+            return
+        with self._lock, replica_router.primary():
+            with self._pending_lock:
+                pending, self._pending = self._pending, set()
+                if self._replay is not None:
+                    self._replay.update(pending)
+            product_ids = self._resolve(pending)
+            if product_ids:
+                documents = iter_documents(product_ids)
+                if self.fuzzy_enabled:
+                    documents = self.fuzzy.observe(documents)
+                self.backend.update(documents)
+                self._generation += 1
+
+    def version(self):
+        """Changes whenever this process's index does (for ETags of search results)"""
+        self.refresh()
+        return self._instance, self._generation
+
+    def search(self, query, page=1, per_page=20):
+        self.refresh()
+        return self.backend.search(query, limit=per_page, offset=(page - 1) * per_page)
+
+    def match_ids(self, query):
+        """(ranked ids for use as a SQL filter, whether more than
+        SEARCH_MAX_CANDIDATES matched and the list was cut there)"""
+        self.refresh()
+        ids = self.backend.match_ids(query, self.max_candidates + 1)
+        return ids[:self.max_candidates], len(ids) > self.max_candidates
+
+    def fuzzy_search(self, query, page=1, per_page=20, blend=True):
+        """Typo-tolerant search over product and salt names.
+
+        Returns (ids for the page, total, {query word: corrected word}). With
+        `blend`, exact hits from the backend rank first, followed by fuzzy
+        hits not already among them.
+        """
+        if not self.fuzzy_enabled:
+            ids, total = self.search(query, page=page, per_page=per_page) if blend else ([], 0)
+            return ids, total, {}
+        self.refresh()
+        ranked, corrections = self.fuzzy.search(query, self.max_candidates)
+        if blend:
+            exact = self.backend.match_ids(query, self.max_candidates)
+            seen = set(exact)
+            ranked = exact + [product_id for product_id in ranked if product_id not in seen]
+        start = (page - 1) * per_page
+        return ranked[start:start + per_page], len(ranked), corrections
+
+    @staticmethod
+    def _resolve(pending):
+        product_ids = {key for kind, key in pending if kind == 'product'}
+        salt_ids = [key for kind, key in pending if kind == 'salt']
+        manufacturer_ids = [key for kind, key in pending if kind == 'manufacturer']
+        if salt_ids:
+            product_ids.update(pid for (pid,) in db.session.query(ProductSalt.product_id).filter(
+                ProductSalt.salt_id.in_(salt_ids)
+            ))
+        if manufacturer_ids:
+            product_ids.update(pid for (pid,) in db.session.query(Product.id).filter(
+                Product.manufacturer_id.in_(manufacturer_ids)
+            ))
+        return product_ids
+
+    # --- Session event hooks ---
+    def _after_flush(self, session, flush_context):
+        pending = session.info.setdefault('search_index_pending', set())
+        for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+            if isinstance(obj, Product):
+                pending.add(('product', obj.id))
+            elif isinstance(obj, ProductSalt):
+                pending.add(('product', obj.product_id))
+            elif isinstance(obj, Salt):
+                pending.add(('salt', obj.id))
+            elif isinstance(obj, Manufacturer):
+                pending.add(('manufacturer', obj.id))
+
+    def _after_commit(self, session):
+        pending = session.info.pop('search_index_pending', None)
+        if pending:
+            with self._pending_lock:
+                self._pending.update(pending)
+
+    def _after_rollback(self, session, previous_transaction):
+        if previous_transaction.parent is None:
+            session.info.pop('search_index_pending', None)
+
+
+@click.command('rebuild-search-index')
+@with_appcontext
+def rebuild_search_index_command():
+    """Rebuild the search index from the catalog (rewrites a persistent backend's table)"""
+    search_engine.rebuild()
+    click.echo(f"✅ Rebuilt the {search_engine.backend.name} search index")
+
+
+search_engine = SearchEngine()
@@ -0,0 +1,270 @@
+# backend/app/substitutes.py
+import click
+import re
+import time
+from flask.cli import with_appcontext
+from sqlalchemy import delete, event, inspect, insert, select
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from .models import db, Product, ProductSalt, Substitute, SubstituteRefreshQueue
+from .cache import product_page_cache
+
+STRENGTH_RE = re.compile(r'([0-9]*\.?[0-9]+)\s*([a-zµ%]+)', re.IGNORECASE)
+
+# Unit -> (family, multiplier to the family's base unit)
+STRENGTH_UNITS = {
+    'mcg': ('mass', 0.001), 'µg': ('mass', 0.001), 'ug': ('mass', 0.001),
+    'mg': ('mass', 1.0), 'g': ('mass', 1000.0), 'gm': ('mass', 1000.0),
+    'iu': ('iu', 1.0),
+    'ml': ('volume', 1.0), 'l': ('volume', 1000.0),
+    '%': ('percent', 1.0)
+}
+
+UNKNOWN_STRENGTH_RATIO = 0.5   # shared salt whose strengths can't be compared
+DOSAGE_FORM_PENALTY = 0.9      # tablet vs capsule vs syrup etc.
+
+
+def parse_strength(strength):
+    """Parse '300mg' / '0.5 g' / '500IU' into (family, value in base unit)"""
+    if not strength:
+        return None
+    match = STRENGTH_RE.search(strength)
+    if not match:
+        return None
+    unit = STRENGTH_UNITS.get(match.group(2).lower())
+    if unit is None:
+        return None
+    family, multiplier = unit
+    return family, float(match.group(1)) * multiplier
+
+
+def _strength_ratio(a, b):
+    if a is None or b is None or a[0] != b[0]:
+        return UNKNOWN_STRENGTH_RATIO
+    high = max(a[1], b[1])
+    return min(a[1], b[1]) / high if high else 1.0
+
+
+def load_compositions():
+    """Sparse product x salt matrix for active products.
+
+    Returns ({product_id: {salt_id: parsed strength}}, {product_id: dosage
+    form}, {salt_id: [product_id, ...]}) built from two column queries.
+    """
+    compositions, postings = {}, {}
+    rows = db.session.query(ProductSalt.product_id, ProductSalt.salt_id, ProductSalt.strength).join(
+        Product, ProductSalt.product_id == Product.id
+    ).filter(Product.is_active == True)
+    for product_id, salt_id, strength in rows:
+        compositions.setdefault(product_id, {})[salt_id] = parse_strength(strength)
+        postings.setdefault(salt_id, []).append(product_id)
+    forms = {
+        product_id: (form or '').lower()
+        for product_id, form in db.session.query(Product.id, Product.dosage_form).filter(
+            Product.is_active == True
+        )
+    }
+    return compositions, forms, postings
+
+
+def rank_substitutes(product_id, compositions, forms, postings, limit, min_score):
+    """Top substitutes for one product by weighted salt-composition overlap.
+
+    score = sum(strength ratio over shared salts) / |union of salts|, so an
+    identical composition at identical strengths scores 1.0. Only products
+    sharing at least one salt (via the salt postings) are ever scored.
+    """
+    composition = compositions.get(product_id)
+    if not composition:
+        return []
+    overlap, shared = {}, {}
+    for salt_id, strength in composition.items():
+        for other_id in postings.get(salt_id, ()):
+            if other_id == product_id:
+                continue
+            ratio = _strength_ratio(strength, compositions[other_id][salt_id])
+            overlap[other_id] = overlap.get(other_id, 0.0) + ratio
+            shared[other_id] = shared.get(other_id, 0) + 1
+
+    form = forms.get(product_id, '')
+    scored = []
+    for other_id, total in overlap.items():
+        union = len(composition) + len(compositions[other_id]) - shared[other_id]
+        score = total / union
+        if form and forms.get(other_id, '') != form:
+            score *= DOSAGE_FORM_PENALTY
+        if score >= min_score:
+            scored.append((round(score, 4), other_id))
+    scored.sort(key=lambda item: (-item[0], item[1]))
+    return scored[:limit]
+
+
+def compute_substitutes(product_ids=None, limit=10, min_score=0.3, chunk_size=5000):
+    """Recompute and store computed substitutes.
+
+    With product_ids=None the whole catalog is recomputed; otherwise only
+    the given products plus every product sharing a salt with them (whose
+    lists may now include or drop them). Manually curated rows
+    (is_computed=False) are never touched. Returns a summary dict.
+    """
+    started = time.perf_counter()
+    compositions, forms, postings = load_compositions()
+
+    if product_ids is None:
+        targets = set(forms)
+        stale_targets = None
+    else:
+        product_ids = set(product_ids)
+        targets = set(product_ids)
+        # Products that currently list them, or share a salt with them now
+        targets.update(db.session.scalars(
+            select(Substitute.product_id).where(
+                Substitute.substitute_product_id.in_(product_ids),
+                Substitute.is_computed == True
+            )
+        ))
+        for product_id in product_ids:
+            for salt_id in compositions.get(product_id, ()):
+                targets.update(postings[salt_id])
+        stale_targets = targets
+
+    # Curated pairs already shown on the page; don't duplicate them
+    curated = set(db.session.execute(
+        select(Substitute.product_id, Substitute.substitute_product_id).where(
+            Substitute.is_computed == False
+        )
+    ))
+
+    written = 0
+    ordered = sorted(targets)
+    table = Substitute.__table__
+    if stale_targets is None:
+        db.session.execute(delete(table).where(table.c.is_computed == True))
+    for start in range(0, len(ordered), chunk_size):
+        chunk = ordered[start:start + chunk_size]
+        if stale_targets is not None:
+            db.session.execute(delete(table).where(
+                table.c.is_computed == True, table.c.product_id.in_(chunk)
+            ))
+        rows = [
+            {
+                'product_id': product_id,
+                'substitute_product_id': other_id,
+                'similarity_score': score,
+                'is_computed': True
+            }
+            for product_id in chunk
+            for score, other_id in rank_substitutes(
+                product_id, compositions, forms, postings, limit, min_score
+            )
+            if (product_id, other_id) not in curated
+        ]
+        if rows:
+            db.session.execute(insert(table), rows)
+            written += len(rows)
+
+    if product_ids is None:
+        db.session.execute(delete(SubstituteRefreshQueue.__table__))
+    else:
+        db.session.execute(delete(SubstituteRefreshQueue.__table__).where(
+            SubstituteRefreshQueue.product_id.in_(product_ids)
+        ))
+    db.session.commit()
+
+    if product_ids is None:
+        product_page_cache.clear()
+    else:
+        for product_id in targets:
+            product_page_cache.invalidate(product_id)
+
+    return {
+        'products': len(targets),
+        'substitutes': written,
+        'seconds': round(time.perf_counter() - started, 3)
+    }
+
+
+def refresh_stale_substitutes(**kwargs):
+    """Recompute only products queued by composition changes"""
+    queued = db.session.scalars(select(SubstituteRefreshQueue.product_id)).all()
+    if not queued:
+        return {'products': 0, 'substitutes': 0, 'seconds': 0.0}
+    return compute_substitutes(queued, **kwargs)
+
+
+def queue_refresh(connection, product_ids):
+    """Queue products for compute-substitutes --stale (idempotent)"""
+    table = SubstituteRefreshQueue.__table__
+    rows = [{'product_id': product_id} for product_id in product_ids]
+    dialect = connection.dialect.name
+    if dialect == 'sqlite':
+        connection.execute(sqlite_insert(table).on_conflict_do_nothing(), rows)
+    elif dialect in ('mysql', 'mariadb'):
+        connection.execute(mysql_insert(table).prefix_with('IGNORE'), rows)
+    else:
+        existing = set(connection.scalars(
+            select(table.c.product_id).where(table.c.product_id.in_(product_ids))
+        ))
+        rows = [row for row in rows if row['product_id'] not in existing]
+        if rows:
+            connection.execute(insert(table), rows)
+
+
+class SubstituteRefreshTracker:
+    """Queues products for recomputation when their composition changes.
+
+    The queue is a table written in the same transaction as the change, so
+    it survives restarts and is visible to the CLI running elsewhere.
+    """
+
+    def __init__(self, app=None):
+        self._listening = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        if not self._listening:
+            self._listening = True
+            event.listen(Session, 'after_flush', self._after_flush)
+        app.cli.add_command(compute_substitutes_command)
+
+    def _after_flush(self, session, flush_context):
+        product_ids = set()
+        for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+            if isinstance(obj, ProductSalt):
+                history = inspect(obj).attrs.product_id.history
+                product_ids.update(history.added or ())
+                product_ids.update(history.deleted or ())
+                product_ids.update(history.unchanged or ())
+            elif isinstance(obj, Product):
+                state = inspect(obj)
+                if obj in session.deleted or any(
+                    state.attrs[attr].history.has_changes() for attr in ('is_active', 'dosage_form')
+                ):
+                    product_ids.add(obj.id)
+        product_ids.discard(None)
+        if product_ids:
+            queue_refresh(session.connection(), sorted(product_ids))
+
+
+@click.command('compute-substitutes')
+@click.option('--stale', is_flag=True, help='Only recompute products queued by composition changes')
+@click.option('--product-id', 'product_ids', type=int, multiple=True,
+              help='Recompute these products and their neighbours (repeatable)')
+@click.option('--limit', default=10, show_default=True, help='Substitutes stored per product')
+@click.option('--min-score', default=0.3, show_default=True, help='Minimum similarity to store')
+@with_appcontext
+def compute_substitutes_command(stale, product_ids, limit, min_score):
+    """Compute substitutes from salt composition and store them in bulk"""
+    if stale:
+        result = refresh_stale_substitutes(limit=limit, min_score=min_score)
+    else:
+        result = compute_substitutes(list(product_ids) or None, limit=limit, min_score=min_score)
+    click.echo(
+        f"✅ Computed {result['substitutes']} substitutes for "
+        f"{result['products']} products in {result['seconds']}s"
+    )
+
+
+substitute_tracker = SubstituteRefreshTracker()
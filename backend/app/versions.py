@@ -0,0 +1,87 @@
+# backend/app/versions.py
+import logging
+import threading
+import time
+from sqlalchemy import exc, insert, select, update
+from .models import db, DataVersion
+from .replicas import replica_router
+
+logger = logging.getLogger(__name__)
+
+
+class DataVersionWatcher:
+    """Cross-process signal for bulk writes that bypass the ORM.
+
+    In-process caches follow ORM writes through session events, which only
+    fire in the process that made them. Bulk jobs (import-catalog) instead
+    bump a row in data_versions after committing; each worker reads it at
+    most every DATA_VERSION_CHECK_SECONDS, before a request, and runs the
+    registered callbacks when it has moved. One small primary-key read per
+    interval per process.
+    """
+
+    def __init__(self, app=None):
+        self.check_seconds = 5.0
+        self._callbacks = {}  # name -> [callback]
+        self._seen = {}
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.check_seconds = app.config.get('DATA_VERSION_CHECK_SECONDS', 5.0)
+        self._seen = {}
+        self._checked_at = 0.0
+        app.before_request(self._before_request)
+
+    def on_change(self, name, callback):
+        """Call `callback()` in every worker after bump(name) is committed"""
+        callbacks = self._callbacks.setdefault(name, [])
+        if callback not in callbacks:
+            callbacks.append(callback)
+
+    @staticmethod
+    def bump(name):
+        """Advance a version in the current transaction; the caller commits"""
+        table = DataVersion.__table__
+        result = db.session.execute(
+            update(table).where(table.c.name == name).values(version=table.c.version + 1)
+        )
+        if result.rowcount == 0:
+            db.session.execute(insert(table).values(name=name, version=1))
+
+    def check(self):
+        """Read the versions and run callbacks for any that moved since the last check"""
+        if not self._callbacks:
+            return
+        try:
+            with replica_router.primary():
+                versions = dict(db.session.execute(
+                    select(DataVersion.name, DataVersion.version).where(DataVersion.name.in_(list(self._callbacks)))
+                ).all())
+        except exc.SQLAlchemyError:
+            # e.g. a database created before data_versions existed
+            db.session.rollback()
+            logger.warning('could not read data versions', exc_info=True)
+            return
+        for name, callbacks in self._callbacks.items():
+            version = versions.get(name, 0)
+            seen = self._seen.get(name)
+            self._seen[name] = version
+            if seen is not None and version != seen:
+                for callback in callbacks:
+                    callback()
+
+    def _before_request(self):
+        now = time.monotonic()
+        if now - self._checked_at < self.check_seconds or not self._lock.acquire(blocking=False):
+            return
+        try:
+            self._checked_at = now
+            self.check()
+        finally:
+            self._lock.release()
+
+
+data_versions = DataVersionWatcher()
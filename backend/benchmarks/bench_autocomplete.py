@@ -0,0 +1,70 @@
+# backend/benchmarks/bench_autocomplete.py
+"""Prefix index memory per 100k entries, lookup latency and update cost.
+
+Builds PrefixIndex directly from synthetic product names (no database), so
+the figures isolate the trie itself. Build time includes tracemalloc overhead.
+
+Usage (from backend/):  python -m benchmarks.bench_autocomplete [entries]
+"""
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from app.autocomplete import PrefixIndex
+from .dataset import DOSAGE_FORMS, SALT_STEMS, STRENGTHS, WORDS
+
+LOOKUPS = 20000
+
+
+def names(rng, count):
+    for i in range(count):
+        yield i, (f'{rng.choice(SALT_STEMS).title()} {rng.choice(WORDS).title()} '
+                  f'{rng.choice(STRENGTHS)} {rng.choice(DOSAGE_FORMS)} {i}'), int(rng.paretovariate(1.2))
+
+
+def timed_us(fn, args):
+    samples = []
+    for arg in args:
+        started = time.perf_counter()
+        fn(*arg)
+        samples.append((time.perf_counter() - started) * 1e6)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.99)]
+
+
+def main():
+    entries = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    rng = random.Random(42)
+    rows = sorted(names(rng, entries), key=lambda row: (-row[2], row[0]))
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    index = PrefixIndex(top_k=10)
+    for entry_id, label, popularity in rows:
+        index.add(entry_id, label, popularity)
+    build = time.perf_counter() - started
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"entries={entries} nodes={index.nodes} build={build:.2f}s "
+          f"memory={memory / 2 ** 20:.1f}MiB ({memory / 2 ** 20 * 100000 / entries:.1f}MiB per 100k entries)")
+
+    vocabulary = [word.lower() for word in SALT_STEMS + WORDS]
+    print(f"{'query':>22} {'p50 us':>8} {'p99 us':>8}")
+    for length in (1, 2, 4, 8):
+        queries = [(rng.choice(vocabulary)[:length], 5) for _ in range(LOOKUPS)]
+        p50, p99 = timed_us(index.lookup, queries)
+        print(f"{f'{length}-char prefix':>22} {p50:>8.1f} {p99:>8.1f}")
+    queries = [(f'{rng.choice(SALT_STEMS)[:4]} {rng.choice(STRENGTHS)[:2]}', 5) for _ in range(2000)]
+    p50, p99 = timed_us(index.lookup, queries)
+    print(f"{'two-token prefix':>22} {p50:>8.1f} {p99:>8.1f}")
+
+    updates = [(rng.randrange(entries),) for _ in range(2000)]
+    p50, p99 = timed_us(index.remove, updates)
+    print(f"{'remove':>22} {p50:>8.1f} {p99:>8.1f}")
+    p50, p99 = timed_us(index.add, [(entry_id, f'New Product {entry_id}', 5) for (entry_id,) in updates])
+    print(f"{'add':>22} {p50:>8.1f} {p99:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
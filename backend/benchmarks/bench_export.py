@@ -0,0 +1,69 @@
+# backend/benchmarks/bench_export.py
+"""Peak memory and throughput of the streaming catalog export by catalog size.
+
+Peak traced allocation should stay flat as the catalog grows, since rows
+are fetched and encoded one batch at a time.
+
+Usage (from backend/):  python -m benchmarks.bench_export
+"""
+import time
+import tracemalloc
+from decimal import Decimal
+from sqlalchemy import func, insert, select
+from app.export import export_chunks
+from app.models import db, Category, Manufacturer, Product, ProductSalt, Salt
+from .common import create_benchmark_app
+
+CATALOG_SIZES = (1000, 5000, 20000)
+SALTS = 50
+
+
+def grow_catalog(target, manufacturer_id, category_id):
+    start = db.session.scalar(select(func.count(Product.id)))
+    if start >= target:
+        return
+    db.session.execute(insert(Product), [
+        {
+            'name': f'Bench Product {i}', 'sku': f'BENCH{i:06d}',
+            'manufacturer_id': manufacturer_id, 'category_id': category_id,
+            'price': Decimal('10.50'), 'strength': '500mg', 'stock_quantity': 100,
+            'description_general': 'General description. ' * 20, 'uses': 'Pain;Fever;Headache',
+            'side_effects': 'Nausea;Dizziness', 'precautions': 'Precaution text. ' * 10
+        }
+        for i in range(start, target)
+    ])
+    product_ids = db.session.scalars(select(Product.id).where(Product.id > start)).all()
+    db.session.execute(insert(ProductSalt), [
+        {'product_id': product_id, 'salt_id': 1 + (product_id + offset) % SALTS, 'strength': '250mg'}
+        for product_id in product_ids for offset in (0, 7)
+    ])
+    db.session.commit()
+
+
+def main():
+    app = create_benchmark_app()
+    with app.app_context():
+        manufacturer = Manufacturer(name='Bench Pharma')
+        category = Category(name='Bench Category')
+        db.session.add_all([manufacturer, category])
+        db.session.add_all(Salt(name=f'Bench Salt {i}') for i in range(SALTS))
+        db.session.commit()
+        manufacturer_id, category_id = manufacturer.id, category.id
+
+        print(f"{'products':>9} {'format':>7} {'MiB out':>8} {'seconds':>8} {'peak KiB':>9}")
+        for size in CATALOG_SIZES:
+            grow_catalog(size, manufacturer_id, category_id)
+            for export_format in ('ndjson', 'csv'):
+                db.session.expunge_all()
+                tracemalloc.start()
+                started = time.perf_counter()
+                written = sum(len(chunk) for chunk in export_chunks(export_format))
+                seconds = time.perf_counter() - started
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                print(f"{size:>9} {export_format:>7} {written / 2 ** 20:>8.1f} "
+                      f"{seconds:>8.2f} {peak // 1024:>9}")
+
+
+if __name__ == '__main__':
+    main()
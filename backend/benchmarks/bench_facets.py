@@ -0,0 +1,112 @@
+# backend/benchmarks/bench_facets.py
+"""Facet count latency: in-memory FacetIndex versus grouped SQL.
+
+Builds a FacetIndex and an equivalent in-memory SQLite products table from
+the same synthetic rows, then counts all four facets (each with every filter
+but its own) for a mix of filter combinations. The SQL side is the
+one-statement alternative: a UNION ALL of one GROUP BY per facet.
+
+Usage (from backend/):  python -m benchmarks.bench_facets [products]
+"""
+import random
+import sqlite3
+import statistics
+import sys
+import time
+from app.facets import FACETS, FacetIndex
+
+CATEGORIES = 32
+MANUFACTURERS = 500
+BUCKETS = (100, 250, 500, 1000)
+REPEATS = 20
+
+SQL_FILTERS = {
+    'category': 'category_id IN ({})',
+    'manufacturer': 'manufacturer_id = {}',
+    'price': 'price BETWEEN {} AND {}',
+    'prescription': 'prescription_required = {}'
+}
+SQL_VALUES = {
+    'category': 'category_id',
+    'manufacturer': 'manufacturer_id',
+    'price': 'CASE WHEN price < 100 THEN 0 WHEN price < 250 THEN 1 WHEN price < 500 THEN 2 '
+             'WHEN price < 1000 THEN 3 ELSE 4 END',
+    'prescription': 'prescription_required'
+}
+
+
+def products(rng, count):
+    for product_id in range(1, count + 1):
+        yield (product_id, rng.randint(1, CATEGORIES), int(rng.paretovariate(1.1)) % MANUFACTURERS + 1,
+               round(rng.lognormvariate(4.5, 1.0), 2), rng.random() < 0.3)
+
+
+def sql_filter(facet, value):
+    if facet == 'category':
+        return SQL_FILTERS[facet].format(','.join(map(str, sorted(value))))
+    if facet == 'price':
+        return SQL_FILTERS[facet].format(*value)
+    return SQL_FILTERS[facet].format(int(value))
+
+
+def sql_counts(connection, filters):
+    branches = []
+    for facet in FACETS:
+        where = ['1'] + [sql_filter(other, value) for other, value in filters.items() if other != facet]
+        branches.append(
+            f"SELECT '{facet}', {SQL_VALUES[facet]}, COUNT(*) FROM products "
+            f"WHERE {' AND '.join(where)} GROUP BY 2"
+        )
+    return connection.execute(' UNION ALL '.join(branches)).fetchall()
+
+
+def timed_ms(fn):
+    samples = []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    rows = list(products(random.Random(42), count))
+
+    started = time.perf_counter()
+    index = FacetIndex(rows, BUCKETS)
+    print(f"products={count} index build={time.perf_counter() - started:.2f}s")
+
+    connection = sqlite3.connect(':memory:')
+    connection.execute('CREATE TABLE products (id INTEGER PRIMARY KEY, category_id INTEGER, '
+                       'manufacturer_id INTEGER, price REAL, prescription_required BOOLEAN)')
+    connection.executemany('INSERT INTO products VALUES (?, ?, ?, ?, ?)', rows)
+    connection.execute('CREATE INDEX ix_facets ON products '
+                       '(category_id, manufacturer_id, prescription_required, price)')
+
+    scenarios = {
+        'unfiltered': {},
+        'category': {'category': {1, 2, 3}},
+        'category+price': {'category': {1, 2, 3}, 'price': (50.0, 250.0)},
+        'manufacturer+rx': {'manufacturer': 1, 'prescription': True},
+        'all four': {'category': {1, 2, 3}, 'manufacturer': 1, 'price': (50.0, 250.0), 'prescription': True}
+    }
+    search_ids = random.Random(7).sample(range(1, count + 1), min(count, 5000))
+
+    print(f"{'filters':>22} {'memory ms':>10} {'sql ms':>8}")
+    for name, filters in scenarios.items():
+        memory = timed_ms(lambda: index.counts(FACETS, filters))
+        sql = timed_ms(lambda: sql_counts(connection, filters))
+        print(f"{name:>22} {memory:>10.2f} {sql:>8.2f}")
+    memory = timed_ms(lambda: index.counts(FACETS, {}, search_ids))
+    print(f"{'5000 search hits':>22} {memory:>10.2f} {'-':>8}")
+
+    updates = random.Random(9).sample(rows, 1000)
+    started = time.perf_counter()
+    for product_id, category_id, manufacturer_id, price, prescription in updates:
+        index.add(product_id, category_id, manufacturer_id, price * 1.1, prescription)
+    print(f"update={(time.perf_counter() - started) * 1e6 / len(updates):.0f}us per product")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+# backend/benchmarks/bench_fuzzy_search.py
+"""Recall and latency of trigram fuzzy search on a generated misspelling corpus.
+
+Builds a TrigramIndex over synthetic drug-like brand and salt names (no
+database), then queries it with seeded misspellings (deletions,
+transpositions, substitutions, insertions, doubled letters). Reports how
+often the intended word is the top correction and appears among the top-10
+products, lookup latency, and how many vocabulary words candidate pruning
+lets through per query.
+
+Usage (from backend/):  python -m benchmarks.bench_fuzzy_search [products]
+"""
+import random
+import string
+import sys
+import time
+from app.search import TrigramIndex
+from .dataset import DOSAGE_FORMS, STRENGTHS
+
+QUERIES = 2000
+SYLLABLES = ('ab ac al am an ar az ce ci co da de di do fe ga ge li lo lu ma me mi mo na ne ni no '
+             'pa pe pi ra re ri ro sa se si so ta te ti to va ve vi xa xi za ze zo').split()
+SUFFIXES = ('pril', 'sartan', 'statin', 'mab', 'olol', 'azole', 'cillin', 'mycin', 'pine', 'done',
+            'lam', 'xin', 'fen', 'tide', 'vir', 'cort', 'formin', 'prazole', 'tidine', 'oxacin')
+
+
+def coined_word(rng):
+    return ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 3))) + rng.choice(SUFFIXES)
+
+
+def misspell(rng, word):
+    for _ in range(1 if len(word) < 8 else rng.randint(1, 2)):
+        i = rng.randrange(1, len(word) - 1)
+        operation = rng.choice(('delete', 'transpose', 'substitute', 'insert', 'double'))
+        if operation == 'delete':
+            word = word[:i] + word[i + 1:]
+        elif operation == 'transpose':
+            word = word[:i] + word[i + 1] + word[i] + word[i + 2:]
+        elif operation == 'substitute':
+            word = word[:i] + rng.choice(string.ascii_lowercase) + word[i + 1:]
+        elif operation == 'insert':
+            word = word[:i] + rng.choice(string.ascii_lowercase) + word[i:]
+        else:
+            word = word[:i] + word[i] + word[i:]
+    return word
+
+
+def build(rng, products):
+    brands = sorted({coined_word(rng) for _ in range(products // 5)})
+    salts = sorted({coined_word(rng) for _ in range(max(200, products // 50))})
+    index = TrigramIndex()
+    words = {}
+    for product_id in range(1, products + 1):
+        brand = rng.choice(brands)
+        composition = rng.sample(salts, rng.choice((1, 1, 2)))
+        index.add(product_id, {
+            'name': f'{brand.title()} {rng.choice(STRENGTHS)} {rng.choice(DOSAGE_FORMS)}',
+            'salts': ' '.join(composition)
+        })
+        words[product_id] = {brand, *composition}
+    return index, brands, salts, words
+
+
+def evaluate(rng, index, vocabulary, words):
+    corrected = hits = checked = 0
+    latencies = []
+    for _ in range(QUERIES):
+        original = rng.choice(vocabulary)
+        typo = misspell(rng, original)
+        before = index.candidates_checked
+        started = time.perf_counter()
+        product_ids, corrections = index.search(typo, 10)
+        latencies.append((time.perf_counter() - started) * 1000)
+        checked += index.candidates_checked - before
+        corrected += corrections.get(typo, typo) == original
+        hits += any(original in words[product_id] for product_id in product_ids)
+    latencies.sort()
+    return {
+        'correction': corrected / QUERIES,
+        'hit@10': hits / QUERIES,
+        'p50_ms': latencies[len(latencies) // 2],
+        'p99_ms': latencies[int(len(latencies) * 0.99)],
+        'candidates': checked / QUERIES
+    }
+
+
+def main():
+    products = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    rng = random.Random(42)
+    started = time.perf_counter()
+    index, brands, salts, words = build(rng, products)
+    print(f"products={products} words={len(index)} build={time.perf_counter() - started:.1f}s")
+    print(f"{'corpus':>8} {'correct':>8} {'hit@10':>7} {'p50 ms':>7} {'p99 ms':>7} {'candidates':>11}")
+    for corpus, vocabulary in (('brands', brands), ('salts', salts)):
+        result = evaluate(rng, index, vocabulary, words)
+        print(f"{corpus:>8} {result['correction']:>8.1%} {result['hit@10']:>7.1%} {result['p50_ms']:>7.2f} "
+              f"{result['p99_ms']:>7.2f} {result['candidates']:>11.0f}")
+
+
+if __name__ == '__main__':
+    main()
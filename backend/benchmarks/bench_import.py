@@ -0,0 +1,92 @@
+# backend/benchmarks/bench_import.py
+"""Rows per second of the bulk catalog import.
+
+Writes a synthetic catalog (manufacturers, salts, products, compositions,
+FAQs) to a temporary directory, imports it into an empty database, then
+imports the products again to measure the upsert path.
+
+Usage (from backend/):  python -m benchmarks.bench_import [products] [csv|ndjson]
+"""
+import csv
+import json
+import os
+import random
+import sys
+import tempfile
+from app.importer import import_catalog
+from .common import create_benchmark_app
+
+MANUFACTURERS = 200
+SALTS = 500
+
+
+def write_file(directory, name, extension, rows):
+    path = os.path.join(directory, f'{name}.{extension}')
+    with open(path, 'w', newline='', encoding='utf-8') as handle:
+        if extension == 'csv':
+            writer = None
+            for row in rows:
+                if writer is None:
+                    writer = csv.DictWriter(handle, fieldnames=list(row))
+                    writer.writeheader()
+                writer.writerow(row)
+        else:
+            for row in rows:
+                handle.write(json.dumps(row) + '\n')
+    return path
+
+
+def write_catalog(directory, products, extension):
+    rng = random.Random(1)
+    files = {
+        'manufacturers': write_file(directory, 'manufacturers', extension, (
+            {'name': f'Manufacturer {i}', 'country': 'India', 'established_year': 1950 + i % 70}
+            for i in range(MANUFACTURERS)
+        )),
+        'salts': write_file(directory, 'salts', extension, (
+            {'name': f'Salt {i}', 'therapeutic_class': f'Class {i % 20}'} for i in range(SALTS)
+        )),
+        'products': write_file(directory, 'products', extension, (
+            {
+                'sku': f'SKU{i:07d}', 'name': f'Product {i} {rng.choice((250, 500, 650))}mg',
+                'manufacturer': f'Manufacturer {rng.randrange(MANUFACTURERS)}',
+                'category': f'Category {i % 25}', 'price': f'{rng.uniform(5, 500):.2f}',
+                'mrp': f'{rng.uniform(500, 600):.2f}', 'dosage_form': rng.choice(('Tablet', 'Capsule', 'Syrup')),
+                'strength': '500mg', 'pack_size': '10 tablets', 'stock_quantity': rng.randrange(1000),
+                'prescription_required': rng.choice(('true', 'false')),
+                'description_general': f'Description of product {i}. ' * 5, 'uses': 'Pain;Fever'
+            }
+            for i in range(products)
+        )),
+        'compositions': write_file(directory, 'compositions', extension, (
+            {'sku': f'SKU{i // 2:07d}', 'salt': f'Salt {rng.randrange(SALTS)}', 'strength': '250mg'}
+            for i in range(products * 2)
+        )),
+        'faqs': write_file(directory, 'faqs', extension, (
+            {'sku': f'SKU{i:07d}', 'question': f'What is product {i}?', 'answer': 'A medicine.'}
+            for i in range(0, products, 10)
+        ))
+    }
+    return files
+
+
+def print_reports(label, reports):
+    print(label)
+    for entity, report in reports.items():
+        print(f"  {entity:>13} {report['rows']:>9} rows {report['seconds']:>8}s "
+              f"{report['rows_per_second']:>9} rows/s {report['rejected']:>5} rejected")
+
+
+def main():
+    products = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    extension = sys.argv[2] if len(sys.argv) > 2 else 'ndjson'
+    app = create_benchmark_app()
+    with tempfile.TemporaryDirectory() as directory:
+        files = write_catalog(directory, products, extension)
+        with app.app_context():
+            print_reports(f"Initial load ({products} products, {extension})", import_catalog(files))
+            print_reports("Re-import products (upsert)", import_catalog({'products': files['products']}))
+
+
+if __name__ == '__main__':
+    main()
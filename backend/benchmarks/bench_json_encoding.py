@@ -0,0 +1,90 @@
+# backend/benchmarks/bench_json_encoding.py
+"""Encode time and bytes on the wire for a synthetic 500-product listing.
+
+Compares the JSON providers in app.encoding, then the response codings the
+Compressor can negotiate, on the same payload /api/products would build.
+No database is needed.
+
+Usage (from backend/):  python -m benchmarks.bench_json_encoding
+"""
+import random
+import statistics
+import time
+from datetime import date
+from decimal import Decimal
+from app import create_app
+from app.compression import available_encodings, compressor
+from app.encoding import JSON_PROVIDERS, orjson
+from app.models import Category, Manufacturer, Product
+from .dataset import text
+
+PRODUCTS = 500
+REPEAT = 20
+
+
+def build_listing():
+    """Product.to_dict() output for PRODUCTS transient products with long text fields"""
+    rng = random.Random(42)
+    manufacturer = Manufacturer(name='Bench Pharma')
+    category = Category(name='Analgesics')
+    products = []
+    for i in range(PRODUCTS):
+        product = Product(
+            id=i + 1, name=f'Bench Product {i} 500mg Tablet', sku=f'BENCH{i:05d}',
+            price=Decimal('42.50') + i, mrp=Decimal('50.00') + i, discount_percentage=15.0,
+            description_general=text(rng, 80), how_it_works=text(rng, 60), how_to_use=text(rng, 40),
+            uses=';'.join(text(rng, 12) for _ in range(4)),
+            side_effects=';'.join(text(rng, 3) for _ in range(12)),
+            precautions=';'.join(text(rng, 15) for _ in range(5)),
+            interactions=';'.join(text(rng, 15) for _ in range(3)),
+            dosage_form='Tablet', strength='500mg', pack_size='15 tablets',
+            prescription_required=True, is_active=True, stock_quantity=100 + i,
+            expiry_date=date(2027, 1, 1), manufacturing_date=date(2025, 1, 1),
+            batch_number=f'B{i:06d}', storage_conditions='Store below 25°C'
+        )
+        product.manufacturer_info = manufacturer
+        product.category = category
+        products.append(product.to_dict())
+    return {
+        'products': products,
+        'pagination': {'page': 1, 'per_page': PRODUCTS, 'total': PRODUCTS, 'pages': 1}
+    }
+
+
+def timed(fn, repeat=REPEAT):
+    """(median ms, result of the last call)"""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return round(statistics.median(samples), 2), result
+
+
+def main():
+    app = create_app('benchmark')
+    with app.app_context():
+        payload = build_listing()
+
+    print(f"Listing of {PRODUCTS} products\n")
+    print(f"{'provider':>10} {'encode ms':>10} {'bytes':>10}")
+    body = None
+    for name, provider_class in JSON_PROVIDERS.items():
+        if name == 'orjson' and orjson is None:
+            print(f"{name:>10} {'(not installed)':>21}")
+            continue
+        provider = provider_class(app)
+        provider.compact = True
+        ms, encoded = timed(lambda: provider.dumps(payload).encode('utf-8'))
+        body = body or encoded
+        print(f"{name:>10} {ms:>10} {len(encoded):>10}")
+
+    print(f"\n{'coding':>10} {'compress ms':>12} {'bytes':>10} {'ratio':>7}")
+    print(f"{'identity':>10} {0:>12} {len(body):>10} {1.0:>7}")
+    for encoding in available_encodings():
+        ms, compressed = timed(lambda: compressor.compress(body, encoding))
+        print(f"{encoding:>10} {ms:>12} {len(compressed):>10} {round(len(body) / len(compressed), 1):>7}")
+
+
+if __name__ == '__main__':
+    main()
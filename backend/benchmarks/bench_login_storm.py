@@ -0,0 +1,89 @@
+# backend/benchmarks/bench_login_storm.py
+"""Product endpoint latency while a burst of logins is hashing passwords.
+
+Measures GET /api/products latency on its own, then again while
+STORM_THREADS threads hammer POST /api/login. With hashing confined to the
+bounded pool, product latency should stay close to the baseline and excess
+logins are shed with 503 instead of queueing.
+
+Usage (from backend/):  python -m benchmarks.bench_login_storm
+"""
+import statistics
+import threading
+import time
+from decimal import Decimal
+from sqlalchemy import insert
+from app.models import db, Manufacturer, Product
+from .common import auth_headers, create_benchmark_app, create_user
+
+PRODUCTS = 200
+SAMPLES = 200
+STORM_THREADS = 16
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def sample_products(client, headers):
+    latencies = []
+    for _ in range(SAMPLES):
+        started = time.perf_counter()
+        response = client.get('/api/products?per_page=20', headers=headers)
+        latencies.append((time.perf_counter() - started) * 1000)
+        assert response.status_code == 200
+    return latencies
+
+
+def main():
+    app = create_benchmark_app()
+    with app.app_context():
+        manufacturer = Manufacturer(name='Storm Pharma')
+        db.session.add(manufacturer)
+        db.session.flush()
+        db.session.execute(insert(Product), [
+            {'name': f'Storm Product {i}', 'sku': f'STORM{i:05d}',
+             'manufacturer_id': manufacturer.id, 'price': Decimal('9.99')}
+            for i in range(PRODUCTS)
+        ])
+        db.session.commit()
+        create_user()
+
+    client = app.test_client()
+    headers = auth_headers(client)
+
+    baseline = sample_products(client, headers)
+
+    stop = threading.Event()
+    logins = {}
+    lock = threading.Lock()
+
+    def storm():
+        storm_client = app.test_client()
+        while not stop.is_set():
+            status = storm_client.post('/api/login', json={
+                'username': 'bench', 'password': 'password123'
+            }).status_code
+            with lock:
+                logins[status] = logins.get(status, 0) + 1
+
+    threads = [threading.Thread(target=storm) for _ in range(STORM_THREADS)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.5)
+    under_storm = sample_products(client, headers)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    print(f"bcrypt rounds={app.config['BCRYPT_ROUNDS']} "
+          f"hash workers={app.config['PASSWORD_HASH_WORKERS']} storm threads={STORM_THREADS}")
+    for label, values in (('baseline', baseline), ('login storm', under_storm)):
+        print(f"{label:>12}: p50={statistics.median(values):.2f}ms "
+              f"p95={percentile(values, 95):.2f}ms max={max(values):.2f}ms")
+    print(f"login responses during storm: {dict(sorted(logins.items()))}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+# backend/benchmarks/bench_orders.py
+"""Round trips and latency of POST /api/orders versus cart size.
+
+Usage (from backend/):  python -m benchmarks.bench_orders
+"""
+from decimal import Decimal
+from sqlalchemy import insert
+from app.models import db, Manufacturer, Product
+from .common import QueryCounter, auth_headers, create_benchmark_app, create_user
+
+CART_SIZES = (1, 10, 30, 100, 300)
+REPEAT = 5
+
+
+def main():
+    app = create_benchmark_app()
+    with app.app_context():
+        manufacturer = Manufacturer(name='Bench Pharma')
+        db.session.add(manufacturer)
+        db.session.flush()
+        db.session.execute(insert(Product), [
+            {
+                'name': f'Bench Product {i}', 'sku': f'BENCH{i:05d}',
+                'manufacturer_id': manufacturer.id, 'price': Decimal('10.50'),
+                'stock_quantity': 1000000
+            }
+            for i in range(max(CART_SIZES))
+        ])
+        db.session.commit()
+        create_user()
+        product_ids = [product_id for (product_id,) in db.session.query(Product.id)]
+        counter = QueryCounter(db.engine)
+
+    client = app.test_client()
+    headers = auth_headers(client)
+
+    print(f"{'cart size':>10} {'queries':>8} {'ms (best)':>10}")
+    for size in CART_SIZES:
+        items = [{'product_id': product_ids[i], 'quantity': 1} for i in range(size)]
+        best, queries = None, None
+        for _ in range(REPEAT):
+            with counter.measure() as result:
+                response = client.post('/api/orders', json={'items': items}, headers=headers)
+            assert response.status_code == 201, response.get_json()
+            queries = result['queries']
+            best = result['ms'] if best is None else min(best, result['ms'])
+        print(f"{size:>10} {queries:>8} {best:>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+# backend/benchmarks/bench_sparse_fields.py
+"""Memory, database payload and response size of product listings by fieldset.
+
+For each `fields=` value, requests a 100-product page of /api/products and
+reports peak Python allocation during the request (tracemalloc), the bytes
+of column data the listing SELECT returns, and the response size.
+
+Usage (from backend/):  python -m benchmarks.bench_sparse_fields
+"""
+import random
+import tracemalloc
+from decimal import Decimal
+from sqlalchemy import event, insert
+from app.models import db, Manufacturer, Product
+from .common import auth_headers, create_benchmark_app, create_user
+from .dataset import text
+
+PRODUCTS = 2000
+PER_PAGE = 100
+FIELDSETS = ('full', 'summary', 'id,name,price,strength')
+
+
+class LastSelect:
+    """Remembers the last SELECT against products so it can be replayed"""
+
+    def __init__(self, engine):
+        self.statement = None
+        self.parameters = None
+        event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT PRODUCTS.'):
+            self.statement, self.parameters = statement, parameters
+
+
+def payload_bytes(statement, parameters):
+    """Size of the column values a statement returns, as the driver hands them over"""
+    rows = db.session.connection().exec_driver_sql(statement, parameters).fetchall()
+    return sum(len(str(value)) for row in rows for value in row if value is not None)
+
+
+def main():
+    app = create_benchmark_app()
+    rng = random.Random(7)
+    with app.app_context():
+        manufacturer = Manufacturer(name='Bench Pharma')
+        db.session.add(manufacturer)
+        db.session.flush()
+        db.session.execute(insert(Product), [
+            {
+                'name': f'Bench Product {i}', 'sku': f'BENCH{i:05d}',
+                'manufacturer_id': manufacturer.id, 'price': Decimal('10.50') + i % 90,
+                'strength': '500mg', 'stock_quantity': 100,
+                'description_general': text(rng, 120), 'uses': text(rng, 40),
+                'how_it_works': text(rng, 80), 'how_to_use': text(rng, 40),
+                'side_effects': text(rng, 40), 'precautions': text(rng, 60),
+                'interactions': text(rng, 60)
+            }
+            for i in range(PRODUCTS)
+        ])
+        db.session.commit()
+        create_user()
+        last_select = LastSelect(db.engine)
+
+    client = app.test_client()
+    headers = auth_headers(client)
+
+    print(f"{'fields':>24} {'peak KiB':>9} {'db bytes':>10} {'response bytes':>15}")
+    for fields in FIELDSETS:
+        url = f'/api/products?per_page={PER_PAGE}&fields={fields}'
+        client.get(url, headers=headers)  # warm up
+        tracemalloc.start()
+        response = client.get(url, headers=headers)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        assert response.status_code == 200, response.get_json()
+        with app.app_context():
+            db_bytes = payload_bytes(last_select.statement, last_select.parameters)
+        print(f"{fields:>24} {peak // 1024:>9} {db_bytes:>10} {len(response.data):>15}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+# backend/benchmarks/common.py
+import time
+from contextlib import contextmanager
+from sqlalchemy import event
+from app import create_app
+from app.models import db, User
+
+
+def create_benchmark_app():
+    """App bound to the BENCHMARK_DATABASE_URI database with a fresh schema"""
+    app = create_app('benchmark')
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+    return app
+
+
+class QueryCounter:
+    """Counts statements sent to the database while active"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+        self.active = False
+        event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if self.active:
+            self.count += 1
+
+    @contextmanager
+    def measure(self):
+        self.count = 0
+        self.active = True
+        started = time.perf_counter()
+        result = {}
+        try:
+            yield result
+        finally:
+            self.active = False
+            result['queries'] = self.count
+            result['ms'] = round((time.perf_counter() - started) * 1000, 2)
+
+
+def create_user(username='bench', password='password123'):
+    user = User(username=username, email=f'{username}@example.com', first_name='Bench')
+    user.set_password(password)
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def auth_headers(client, username='bench', password='password123'):
+    response = client.post('/api/login', json={'username': username, 'password': password})
+    return {'Authorization': f"Bearer {response.get_json()['access_token']}"}
@@ -0,0 +1,266 @@
+# backend/benchmarks/dataset.py
+"""Seeded synthetic catalog generator for benchmarks.
+
+The same seed and size always produce the same rows, so benchmark results
+from different commits are comparable. Rows are written with bulk Core
+inserts and explicit ids into an empty schema; derived tables (review
+aggregates, computed substitutes) are then built the way production does.
+
+Usage (from backend/):  python -m benchmarks.dataset [products] [seed] [--reviews N ...]
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from itertools import islice
+from sqlalchemy import insert
+from app.models import (
+    db, User, Manufacturer, Category, Salt, Product, ProductSalt, FAQ,
+    Review, Order, OrderItem
+)
+from app.categories import rebuild_category_closure
+from app.passwords import password_hasher
+from app.reviews import rebuild_review_stats
+from app.substitutes import compute_substitutes
+
+PASSWORD = 'password123'  # every generated user's password
+CHUNK_SIZE = 5000
+
+WORDS = (
+    'take with food avoid alcohol consult doctor symptoms persist dose daily tablet '
+    'nausea headache dizziness kidney liver pregnancy children elderly allergic '
+    'reaction rash blood pressure heart rate sleep drowsiness stomach pain fever '
+    'infection bacterial viral dosage missed double overdose storage sunlight'
+).split()
+SALT_STEMS = (
+    'paracetamol ibuprofen amoxicillin azithromycin cetirizine omeprazole pantoprazole '
+    'metformin atorvastatin amlodipine losartan ursodeoxycholic diclofenac ranitidine '
+    'levocetirizine montelukast doxycycline ciprofloxacin clopidogrel telmisartan'
+).split()
+DOSAGE_FORMS = ('Tablet', 'Capsule', 'Syrup', 'Injection', 'Cream', 'Drops')
+STRENGTHS = ('5mg', '10mg', '20mg', '40mg', '250mg', '300mg', '500mg', '650mg', '1g', '100IU')
+ROOT_CATEGORIES = ('Pain Relief', 'Digestive Health', 'Cardiac Care', 'Diabetes', 'Antibiotics',
+                   'Allergy', 'Skin Care', 'Vitamins')
+
+
+def text(rng, words):
+    """Pseudo-random prose, so compression ratios resemble real copy"""
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize() + '.'
+
+
+# Smallest count each table can have (compositions draw up to 3 distinct salts)
+MIN_SIZES = {'products': 1, 'manufacturers': 1, 'salts': 3, 'users': 1, 'reviews': 0, 'orders': 0, 'faqs': 0}
+
+
+def dataset_size(products, **overrides):
+    """Row counts for every table, scaled from the product count.
+
+    Keyword arguments set a table's count directly (None keeps the scaled
+    default), e.g. reviews=products * 50 for a review-heavy dataset.
+    """
+    sizes = {
+        'products': products,
+        'manufacturers': max(20, products // 50),
+        'salts': max(40, products // 20),
+        'users': max(20, products // 10),
+        'reviews': products * 5,
+        'orders': max(20, products // 5),
+        'faqs': products * 2
+    }
+    unknown = set(overrides) - set(sizes)
+    if unknown:
+        raise ValueError(f"Unknown tables: {', '.join(sorted(unknown))}")
+    sizes.update({table: count for table, count in overrides.items() if count is not None})
+    for table, count in sizes.items():
+        if count < MIN_SIZES[table]:
+            raise ValueError(f"{table} must be at least {MIN_SIZES[table]}, got {count}")
+    return sizes
+
+
+def add_size_arguments(parser):
+    """--manufacturers, --salts, ... options overriding dataset_size() per table"""
+    for table in MIN_SIZES:
+        if table != 'products':
+            parser.add_argument(f'--{table}', type=int, help=f'{table} rows (default: scaled from the product count)')
+
+
+def size_overrides(args):
+    return {table: getattr(args, table) for table in MIN_SIZES if table != 'products'}
+
+
+def manufacturer_records(rng, count):
+    for i in range(count):
+        yield {
+            'name': f'{rng.choice(SALT_STEMS).title()} Pharma {i}',
+            'country': rng.choice(('India', 'USA', 'Germany', 'Switzerland')),
+            'established_year': rng.randint(1900, 2015),
+            'website': f'https://pharma{i}.example.com'
+        }
+
+
+def salt_records(rng, count):
+    for i in range(count):
+        stem = SALT_STEMS[i % len(SALT_STEMS)]
+        yield {
+            'name': f'{stem.title()} {i // len(SALT_STEMS)}' if i >= len(SALT_STEMS) else stem.title(),
+            'description': text(rng, 25),
+            'therapeutic_class': f'Class {i % 15}'
+        }
+
+
+def product_records(rng, count, manufacturers, categories):
+    for i in range(count):
+        price = Decimal(rng.randint(500, 50000)) / 100
+        yield {
+            'name': f'{rng.choice(SALT_STEMS).title()} {rng.choice(STRENGTHS)} {rng.choice(DOSAGE_FORMS)} {i}',
+            'sku': f'SYN{i:07d}',
+            'manufacturer_id': rng.randint(1, manufacturers),
+            'category_id': rng.randint(1, categories),
+            'price': price,
+            'mrp': (price * Decimal('1.15')).quantize(Decimal('0.01')),
+            'discount_percentage': 13.0,
+            'description_general': text(rng, 60),
+            'uses': ';'.join(text(rng, 6) for _ in range(3)),
+            'how_it_works': text(rng, 40),
+            'how_to_use': text(rng, 20),
+            'side_effects': ';'.join(text(rng, 2) for _ in range(6)),
+            'precautions': ';'.join(text(rng, 10) for _ in range(3)),
+            'interactions': ';'.join(text(rng, 10) for _ in range(2)),
+            'dosage_form': rng.choice(DOSAGE_FORMS),
+            'strength': rng.choice(STRENGTHS),
+            'pack_size': f'{rng.choice((10, 15, 20, 30))} units',
+            'prescription_required': rng.random() < 0.6,
+            'is_active': rng.random() < 0.97,
+            'stock_quantity': rng.randint(0, 500),
+            'batch_number': f'B{i:07d}'
+        }
+
+
+def composition_records(rng, products, salts):
+    for product_id in range(1, products + 1):
+        for salt_id in rng.sample(range(1, salts + 1), rng.choice((1, 1, 2, 3))):
+            yield {'product_id': product_id, 'salt_id': salt_id, 'strength': rng.choice(STRENGTHS)}
+
+
+def faq_records(rng, count, products):
+    for i in range(count):
+        yield {
+            'product_id': rng.randint(1, products),
+            'question': text(rng, 8).rstrip('.') + '?',
+            'answer': text(rng, 30),
+            'category': rng.choice(('Usage', 'Side Effects', 'Dosage'))
+        }
+
+
+def user_records(count, password_hash):
+    for i in range(count):
+        yield {
+            'username': f'user{i}', 'email': f'user{i}@example.com',
+            'password_hash': password_hash, 'first_name': f'User{i}', 'last_name': 'Synthetic'
+        }
+
+
+def review_records(rng, count, products, users, now):
+    for _ in range(count):
+        yield {
+            'product_id': rng.randint(1, products),
+            'user_id': rng.randint(1, users),
+            'rating': rng.choice((1, 2, 3, 4, 4, 5, 5, 5)),
+            'title': text(rng, 4),
+            'comment': text(rng, 30),
+            'reviewer_name': 'Synthetic',
+            'verified_purchase': rng.random() < 0.5,
+            'helpful_count': rng.randint(0, 50),
+            'created_at': now - timedelta(minutes=rng.randint(0, 525600))
+        }
+
+
+def _bulk_insert(model, records):
+    iterator = iter(records)
+    written = 0
+    while True:
+        chunk = list(islice(iterator, CHUNK_SIZE))
+        if not chunk:
+            return written
+        db.session.execute(insert(model.__table__), chunk)
+        written += len(chunk)
+
+
+def _insert_orders(rng, count, users, products, now):
+    order_rows, item_rows = [], []
+    for order_id in range(1, count + 1):
+        lines = [(rng.randint(1, products), rng.randint(1, 3)) for _ in range(rng.randint(1, 5))]
+        prices = {product_id: Decimal(rng.randint(500, 50000)) / 100 for product_id, _ in lines}
+        order_rows.append({
+            'id': order_id, 'user_id': rng.randint(1, users),
+            'order_number': f'SYN-{order_id:08d}',
+            'status': rng.choice(('delivered', 'delivered', 'shipped', 'cancelled', 'confirmed')),
+            'total_amount': sum(prices[product_id] * quantity for product_id, quantity in lines),
+            'shipping_address': text(rng, 6), 'payment_method': 'COD', 'payment_status': 'paid',
+            'created_at': now - timedelta(minutes=rng.randint(0, 525600))
+        })
+        item_rows.extend({
+            'order_id': order_id, 'product_id': product_id, 'quantity': quantity,
+            'unit_price': prices[product_id], 'total_price': prices[product_id] * quantity
+        } for product_id, quantity in lines)
+    _bulk_insert(Order, order_rows)
+    _bulk_insert(OrderItem, item_rows)
+    return len(order_rows)
+
+
+def populate(products=1000, seed=42, **overrides):
+    """Fill an empty schema with a synthetic catalog; returns row counts and timing.
+
+    `overrides` set table sizes as in dataset_size(). Call inside an app
+    context after db.create_all().
+    """
+    started = time.perf_counter()
+    rng = random.Random(seed)
+    sizes = dataset_size(products, **overrides)
+    now = datetime(2026, 1, 1)
+
+    categories = [{'id': i + 1, 'name': name} for i, name in enumerate(ROOT_CATEGORIES)]
+    for i in range(len(ROOT_CATEGORIES) * 3):
+        parent = categories[i]['id']
+        categories.append({'id': len(categories) + 1, 'name': f'Sub Category {i}', 'parent_id': parent})
+    _bulk_insert(Category, categories)
+
+    _bulk_insert(Manufacturer, manufacturer_records(rng, sizes['manufacturers']))
+    _bulk_insert(Salt, salt_records(rng, sizes['salts']))
+    _bulk_insert(Product, product_records(rng, products, sizes['manufacturers'], len(categories)))
+    sizes['compositions'] = _bulk_insert(ProductSalt, composition_records(rng, products, sizes['salts']))
+    _bulk_insert(FAQ, faq_records(rng, sizes['faqs'], products))
+    _bulk_insert(User, user_records(sizes['users'], password_hasher.hash(PASSWORD)))
+    _bulk_insert(Review, review_records(rng, sizes['reviews'], products, sizes['users'], now))
+    _insert_orders(rng, sizes['orders'], sizes['users'], products, now)
+    db.session.commit()
+
+    rebuild_category_closure()
+    rebuild_review_stats()
+    sizes['substitutes'] = compute_substitutes()['substitutes']
+    sizes['categories'] = len(categories)
+    sizes['seed'] = seed
+    sizes['seconds'] = round(time.perf_counter() - started, 2)
+    return sizes
+
+
+def main():
+    from .common import create_benchmark_app
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('products', type=int, nargs='?', default=1000)
+    parser.add_argument('seed', type=int, nargs='?', default=42)
+    add_size_arguments(parser)
+    args = parser.parse_args()
+    try:
+        dataset_size(args.products, **size_overrides(args))
+    except ValueError as e:
+        parser.error(str(e))
+    app = create_benchmark_app()
+    with app.app_context():
+        sizes = populate(args.products, args.seed, **size_overrides(args))
+    print(', '.join(f'{name}={value}' for name, value in sizes.items()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,432 @@
+# backend/benchmarks/suite.py
+"""Endpoint benchmark suite: every API route against a seeded synthetic catalog.
+
+Each scenario is run through the Flask test client and reports p50/p95/p99
+latency, queries per request and peak traced memory. Results are written
+as JSON (by default benchmarks/results/suite-<commit>.json) so runs from
+two commits can be diffed with --compare.
+
+Usage (from backend/):
+    python -m benchmarks.suite [--products 2000] [--iterations 50] [--only product_page]
+    python -m benchmarks.suite --products 500 --reviews 50000 --only review   # review-heavy
+    python -m benchmarks.suite --compare old.json new.json [--threshold 0.2]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+import sqlalchemy
+from app.cache import product_page_cache
+from app.models import db
+from .common import QueryCounter, create_benchmark_app
+from .dataset import PASSWORD, SALT_STEMS, add_size_arguments, dataset_size, populate, size_overrides
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+MEMORY_SAMPLES = 3
+WARMUP = 3
+
+SCENARIOS = []
+
+
+def scenario(name, endpoint, iterations=None, expect=(200,)):
+    """Register a scenario. The function does untimed setup and returns the
+    request to time as a zero-argument callable."""
+    def decorator(fn):
+        SCENARIOS.append({
+            'name': name, 'endpoint': endpoint, 'prepare': fn,
+            'iterations': iterations, 'expect': expect
+        })
+        return fn
+    return decorator
+
+
+class Context:
+    """State shared by scenarios: client, auth headers and known ids"""
+
+    def __init__(self, app, client, sizes, seed):
+        self.app = app
+        self.client = client
+        self.sizes = sizes
+        self.rng = random.Random(seed)
+        self.product_ids = list(range(1, sizes['products'] + 1))
+        tokens = client.post('/api/login', json={'username': 'user0', 'password': PASSWORD}).get_json()
+        self.headers = {'Authorization': f"Bearer {tokens['access_token']}"}
+        self.refresh_headers = {'Authorization': f"Bearer {tokens['refresh_token']}"}
+        self.registered = 0
+        self.cursor = ''
+        self.page_cache_warmed = False
+
+    def product_id(self):
+        return self.rng.choice(self.product_ids)
+
+    def hot_product_ids(self):
+        """The 20 popular products, so cache-backed routes see repeat traffic"""
+        return self.product_ids[:20]
+
+    def hot_product_id(self):
+        return self.rng.choice(self.hot_product_ids())
+
+    def get(self, url, **kwargs):
+        headers = dict(self.headers, **kwargs.pop('headers', {}))
+        return lambda: self.client.get(url, headers=headers, **kwargs)
+
+    def post(self, url, payload=None, **kwargs):
+        headers = dict(self.headers, **kwargs.pop('headers', {}))
+        return lambda: self.client.post(url, json=payload, headers=headers, **kwargs)
+
+
+# --- Scenarios ---
+@scenario('health', 'api_bp.health_check')
+def _health(ctx):
+    return ctx.get('/api/health')
+
+
+@scenario('login', 'api_bp.login', iterations=10)
+def _login(ctx):
+    username = f'user{ctx.rng.randrange(ctx.sizes["users"])}'
+    return lambda: ctx.client.post('/api/login', json={'username': username, 'password': PASSWORD})
+
+
+@scenario('register', 'api_bp.register', iterations=10, expect=(201,))
+def _register(ctx):
+    ctx.registered += 1
+    name = f'bench{ctx.registered}_{int(time.time() * 1000)}'
+    return lambda: ctx.client.post('/api/register', json={
+        'username': name, 'email': f'{name}@example.com', 'password': PASSWORD
+    })
+
+
+@scenario('refresh', 'api_bp.refresh')
+def _refresh(ctx):
+    return lambda: ctx.client.post('/api/refresh', headers=ctx.refresh_headers)
+
+
+@scenario('logout', 'api_bp.logout')
+def _logout(ctx):
+    return ctx.post('/api/logout')
+
+
+@scenario('profile', 'api_bp.get_profile')
+def _profile(ctx):
+    return ctx.get('/api/profile')
+
+
+@scenario('product_page_warm', 'api_bp.get_product_data')
+def _product_page_warm(ctx):
+    if not ctx.page_cache_warmed:
+        # Fetch every hot page once so each timed request is a cache hit
+        for product_id in ctx.hot_product_ids():
+            ctx.get(f'/api/product/{product_id}')()
+        ctx.page_cache_warmed = True
+    return ctx.get(f'/api/product/{ctx.hot_product_id()}')
+
+
+@scenario('product_page_cold', 'api_bp.get_product_data')
+def _product_page_cold(ctx):
+    product_page_cache.clear()
+    return ctx.get(f'/api/product/{ctx.product_id()}')
+
+
+@scenario('product_page_not_modified', 'api_bp.get_product_data', expect=(304,))
+def _product_page_not_modified(ctx):
+    url = f'/api/product/{ctx.hot_product_id()}'
+    etag = ctx.client.get(url, headers=ctx.headers).headers['ETag']
+    return ctx.get(url, headers={'If-None-Match': etag})
+
+
+@scenario('products_offset', 'api_bp.get_products')
+def _products_offset(ctx):
+    return ctx.get(f'/api/products?page={ctx.rng.randint(1, 20)}&per_page=20&sort=-price')
+
+
+@scenario('products_cursor', 'api_bp.get_products')
+def _products_cursor(ctx):
+    def request():
+        response = ctx.client.get(
+            f'/api/products?per_page=20&sort=name&cursor={ctx.cursor}', headers=ctx.headers
+        )
+        ctx.cursor = response.get_json()['pagination']['next_cursor'] or ''
+        return response
+    return request
+
+
+@scenario('products_summary', 'api_bp.get_products')
+def _products_summary(ctx):
+    return ctx.get(f'/api/products?page={ctx.rng.randint(1, 20)}&per_page=50&fields=summary')
+
+
+@scenario('products_search_filter', 'api_bp.get_products')
+def _products_search_filter(ctx):
+    return ctx.get(f'/api/products?search={ctx.rng.choice(SALT_STEMS)}&per_page=20')
+
+
+@scenario('products_batch', 'api_bp.get_products_batch')
+def _products_batch(ctx):
+    return ctx.post('/api/products/batch', {'ids': ctx.rng.sample(ctx.product_ids, min(100, len(ctx.product_ids)))})
+
+
+@scenario('products_export', 'api_bp.export_products', iterations=3)
+def _products_export(ctx):
+    def request():
+        response = ctx.client.get('/api/products/export', headers=ctx.headers)
+        response.get_data()  # drain the stream
+        return response
+    return request
+
+
+@scenario('categories', 'api_bp.get_categories')
+def _categories(ctx):
+    return ctx.get('/api/categories')
+
+
+@scenario('category_tree', 'api_bp.get_category_tree')
+def _category_tree(ctx):
+    return ctx.get('/api/categories/tree')
+
+
+@scenario('products_category_subtree', 'api_bp.get_products')
+def _products_category_subtree(ctx):
+    return ctx.get(f'/api/products?category_id={ctx.rng.randint(1, 8)}&per_page=20')
+
+
+@scenario('products_facets', 'api_bp.get_products')
+def _products_facets(ctx):
+    return ctx.get(f'/api/products?category_id={ctx.rng.randint(1, 8)}&max_price=250&facets=true&per_page=20')
+
+
+@scenario('manufacturers', 'api_bp.get_manufacturers')
+def _manufacturers(ctx):
+    return ctx.get('/api/manufacturers')
+
+
+@scenario('reviews_list', 'api_bp.get_product_reviews')
+def _reviews_list(ctx):
+    return ctx.get(f'/api/product/{ctx.hot_product_id()}/reviews?sort=-helpful_count')
+
+
+@scenario('review_create', 'api_bp.add_product_review', expect=(201,))
+def _review_create(ctx):
+    return ctx.post(f'/api/product/{ctx.product_id()}/reviews', {
+        'rating': ctx.rng.randint(1, 5), 'comment': 'Benchmark review'
+    })
+
+
+@scenario('search', 'api_bp.search_products')
+def _search(ctx):
+    return ctx.get(f'/api/search?q={ctx.rng.choice(SALT_STEMS)}')
+
+
+@scenario('search_fuzzy', 'api_bp.search_products')
+def _search_fuzzy(ctx):
+    stem = ctx.rng.choice(SALT_STEMS)
+    i = ctx.rng.randrange(1, len(stem) - 1)
+    return ctx.get(f'/api/search?q={stem[:i] + stem[i + 1:]}&fuzzy=true')
+
+
+@scenario('autocomplete', 'api_bp.autocomplete_names')
+def _autocomplete(ctx):
+    stem = ctx.rng.choice(SALT_STEMS)
+    return ctx.get(f'/api/autocomplete?q={stem[:ctx.rng.randint(1, 5)]}')
+
+
+@scenario('order_create', 'api_bp.create_order', expect=(201,))
+def _order_create(ctx):
+    items = [{'product_id': pid, 'quantity': 1} for pid in ctx.rng.sample(ctx.product_ids, 3)]
+    _restock(items)
+    return ctx.post('/api/orders', {'items': items, 'payment_method': 'COD'})
+
+
+@scenario('orders_list', 'api_bp.get_user_orders')
+def _orders_list(ctx):
+    return ctx.get('/api/orders')
+
+
+@scenario('order_cancel', 'api_bp.cancel_order')
+def _order_cancel(ctx):
+    items = [{'product_id': ctx.product_id(), 'quantity': 1}]
+    _restock(items)
+    order_id = ctx.client.post('/api/orders', json={'items': items}, headers=ctx.headers).get_json()['order']['id']
+    return ctx.post(f'/api/orders/{order_id}/cancel')
+
+
+@scenario('cache_stats', 'api_bp.get_cache_stats')
+def _cache_stats(ctx):
+    return ctx.get('/api/cache/stats')
+
+
+@scenario('metrics', 'api_bp.get_metrics')
+def _metrics(ctx):
+    return ctx.get('/api/metrics')
+
+
+@scenario('metrics_reset', 'api_bp.reset_metrics')
+def _metrics_reset(ctx):
+    return ctx.post('/api/metrics/reset')
+
+
+def _restock(items):
+    """Keep generated stock from running out over many order iterations"""
+    from app.models import Product
+    db.session.query(Product).filter(Product.id.in_([item['product_id'] for item in items])).update(
+        {Product.stock_quantity: 1000}, synchronize_session=False
+    )
+    db.session.commit()
+
+
+# --- Harness ---
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def run_scenario(ctx, counter, spec, iterations):
+    iterations = spec['iterations'] or iterations
+    for _ in range(WARMUP):
+        spec['prepare'](ctx)()
+
+    latencies, queries, statuses = [], [], {}
+    for _ in range(iterations):
+        request = spec['prepare'](ctx)
+        with counter.measure() as measured:
+            response = request()
+        latencies.append(measured['ms'])
+        queries.append(measured['queries'])
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    peak = 0
+    for _ in range(MEMORY_SAMPLES):
+        request = spec['prepare'](ctx)
+        tracemalloc.start()
+        request()
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    return {
+        'endpoint': spec['endpoint'],
+        'iterations': iterations,
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p95_ms': round(percentile(latencies, 95), 3),
+        'p99_ms': round(percentile(latencies, 99), 3),
+        'mean_ms': round(statistics.fmean(latencies), 3),
+        'queries_mean': round(statistics.fmean(queries), 2),
+        'queries_max': max(queries),
+        'peak_kib': round(peak / 1024, 1),
+        'statuses': {str(code): count for code, count in sorted(statuses.items())},
+        'unexpected_statuses': sum(count for code, count in statuses.items() if code not in spec['expect'])
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(__file__)
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(products, iterations, seed, only=None, sizes=None):
+    """Run the scenarios; `sizes` overrides table sizes as in dataset_size()"""
+    app = create_benchmark_app()
+    with app.app_context():
+        sizes = populate(products, seed, **(sizes or {}))
+        counter = QueryCounter(db.engine)
+        ctx = Context(app, app.test_client(), sizes, seed)
+
+        specs = [spec for spec in SCENARIOS if not only or any(term in spec['name'] for term in only)]
+        routes = {rule.endpoint for rule in app.url_map.iter_rules() if rule.endpoint.startswith('api_bp.')}
+        results = {}
+        for spec in specs:
+            results[spec['name']] = run_scenario(ctx, counter, spec, iterations)
+            print_result(spec['name'], results[spec['name']])
+
+    return {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': datetime.utcnow().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'sqlalchemy': sqlalchemy.__version__,
+            'database': app.config['SQLALCHEMY_DATABASE_URI'].split('://')[0],
+            'iterations': iterations,
+            'dataset': sizes
+        },
+        'scenarios': results,
+        'uncovered_routes': sorted(routes - {spec['endpoint'] for spec in SCENARIOS})
+    }
+
+
+def print_result(name, result):
+    flag = '  !' if result['unexpected_statuses'] else ''
+    print(f"{name:>26} {result['p50_ms']:>8} {result['p95_ms']:>8} {result['p99_ms']:>8} "
+          f"{result['queries_mean']:>7} {result['peak_kib']:>9}{flag}")
+
+
+def compare(old_path, new_path, threshold):
+    """Print per-scenario changes; returns the number of regressions"""
+    with open(old_path) as handle:
+        old = json.load(handle)
+    with open(new_path) as handle:
+        new = json.load(handle)
+    print(f"{old['meta']['commit']} -> {new['meta']['commit']}")
+    print(f"{'scenario':>26} {'p50 ms':>18} {'p95 ms':>18} {'queries':>14}")
+    regressions = 0
+    for name, after in new['scenarios'].items():
+        before = old['scenarios'].get(name)
+        if before is None:
+            print(f"{name:>26} (new)")
+            continue
+        marks = []
+        for key in ('p50_ms', 'p95_ms'):
+            if before[key] and (after[key] - before[key]) / before[key] > threshold:
+                marks.append(key)
+        if after['queries_mean'] > before['queries_mean']:
+            marks.append('queries')
+        regressions += bool(marks)
+        print(f"{name:>26} {before['p50_ms']:>8} -> {after['p50_ms']:<7} {before['p95_ms']:>8} -> "
+              f"{after['p95_ms']:<7} {before['queries_mean']:>5} -> {after['queries_mean']:<6}"
+              f"{'  REGRESSED ' + ','.join(marks) if marks else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--products', type=int, default=2000)
+    add_size_arguments(parser)
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--only', action='append', help='Run scenarios whose name contains this (repeatable)')
+    parser.add_argument('--output', help='JSON results path')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='Diff two result files')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Latency increase flagged by --compare')
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(1 if compare(*args.compare, args.threshold) else 0)
+    try:
+        dataset_size(args.products, **size_overrides(args))
+    except ValueError as e:
+        parser.error(str(e))
+
+    print(f"{'scenario':>26} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'queries':>7} {'peak KiB':>9}")
+    results = run_suite(args.products, args.iterations, args.seed, args.only, size_overrides(args))
+    if results['uncovered_routes']:
+        print(f"Routes without a scenario: {', '.join(results['uncovered_routes'])}")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"suite-{results['meta']['commit'] or 'local'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as handle:
+        json.dump(results, handle, indent=2, sort_keys=True)
+    print(f"Results written to {output}")
+
+
+if __name__ == '__main__':
+    main()
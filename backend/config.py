@@ -20,13 +20,103 @@ class Config:
         'pool_pre_ping': True
     }
     
+    # --- Read Replicas (plain SELECTs in GET/HEAD requests) ---
+    SQLALCHEMY_REPLICA_URIS = [uri for uri in os.environ.get('SQLALCHEMY_REPLICA_URIS', '').split(',') if uri]
+    REPLICA_HEALTH_CHECK_SECONDS = float(os.environ.get('REPLICA_HEALTH_CHECK_SECONDS', 30))
+    READ_YOUR_WRITES_SECONDS = float(os.environ.get('READ_YOUR_WRITES_SECONDS', 5))  # primary-only after a write
+    
     # --- JWT Configuration ---
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY', 'medingen-super-secret-key-2025')
     
+    # --- User Cache (authenticated requests resolve the user from here) ---
+    USER_CACHE_ENABLED = os.environ.get('USER_CACHE_ENABLED', 'True').lower() == 'true'
+    USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE', 4096))
+    USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL', 60))  # seconds; bounds staleness across processes
+    
+    # --- Password Hashing ---
+    BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', 12))  # hashes with another cost are upgraded on login
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))
+    PASSWORD_HASH_MAX_PENDING = int(os.environ.get('PASSWORD_HASH_MAX_PENDING', 32))
+    PASSWORD_HASH_TIMEOUT = float(os.environ.get('PASSWORD_HASH_TIMEOUT', 5.0))  # seconds
+    
+    # --- Rate Limiting (token buckets per IP and per identity on expensive endpoints) ---
+    RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'True').lower() == 'true'
+    RATE_LIMIT_MAX_BUCKETS = int(os.environ.get('RATE_LIMIT_MAX_BUCKETS', 100000))  # per process; LRU beyond
+    # 'memory' (per process) or 'package.module:Class' implementing app.ratelimit.RateLimitStore
+    RATE_LIMIT_STORE = os.environ.get('RATE_LIMIT_STORE', 'memory')
+    RATE_LIMIT_OVERRIDES = {}  # budget name ('login', 'register', 'search') -> '<count>/<period>'
+    
     # --- Flask Configuration ---
     SECRET_KEY = os.environ.get('SECRET_KEY', 'medingen-flask-secret-key')
     DEBUG = os.environ.get('FLASK_DEBUG', 'True').lower() == 'true'
     
+    # --- Response Encoding ---
+    JSON_PROVIDER = os.environ.get('JSON_PROVIDER', 'auto')  # auto (orjson if installed), orjson or default
+    COMPRESS_ENABLED = os.environ.get('COMPRESS_ENABLED', 'True').lower() == 'true'
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))  # bytes; smaller bodies aren't worth it
+    COMPRESS_MIMETYPES = ['application/json', 'text/html', 'text/csv', 'application/x-ndjson']
+    COMPRESS_GZIP_LEVEL = 6
+    COMPRESS_BROTLI_QUALITY = 4  # 0-11; low levels are fast enough for dynamic responses
+    
+    # --- Request Metrics (SQL instrumentation, Server-Timing, slow request log) ---
+    REQUEST_METRICS_ENABLED = os.environ.get('REQUEST_METRICS_ENABLED', 'True').lower() == 'true'
+    SERVER_TIMING_ENABLED = os.environ.get('SERVER_TIMING_ENABLED', 'True').lower() == 'true'
+    SLOW_REQUEST_MS = float(os.environ.get('SLOW_REQUEST_MS', 500))
+    SLOW_REQUEST_LOG = os.environ.get('SLOW_REQUEST_LOG')  # file path; default: the app logger
+    SLOW_QUERY_SAMPLES = 3  # slowest statements logged per slow request
+    METRICS_LATENCY_SAMPLES = 1024  # recent requests per endpoint used for percentiles
+    METRICS_RESET_ENABLED = os.environ.get('METRICS_RESET_ENABLED', 'False').lower() == 'true'  # POST /api/metrics/reset
+    
+    # --- Product Page Cache ---
+    PRODUCT_PAGE_CACHE_ENABLED = os.environ.get('PRODUCT_PAGE_CACHE_ENABLED', 'True').lower() == 'true'
+    PRODUCT_PAGE_CACHE_SIZE = int(os.environ.get('PRODUCT_PAGE_CACHE_SIZE', 1024))
+    PRODUCT_PAGE_CACHE_TTL = int(os.environ.get('PRODUCT_PAGE_CACHE_TTL', 300))  # seconds
+    PRODUCT_PAGE_REVIEW_LIMIT = 10  # top reviews embedded in the product page
+    
+    # --- Reference Data Cache (manufacturers, categories, salts by id) ---
+    REFERENCE_CACHE_ENABLED = os.environ.get('REFERENCE_CACHE_ENABLED', 'True').lower() == 'true'
+    REFERENCE_CACHE_TTL = int(os.environ.get('REFERENCE_CACHE_TTL', 300))  # seconds a table snapshot is reused
+    REFERENCE_CACHE_VERSION_CHECK_SECONDS = float(os.environ.get('REFERENCE_CACHE_VERSION_CHECK_SECONDS', 1))
+    # 'memory' (per process) or 'package.module:Class' implementing app.reference.ReferenceBackend
+    REFERENCE_CACHE_BACKEND = os.environ.get('REFERENCE_CACHE_BACKEND', 'memory')
+    
+    # --- Bulk Write Signal (import-catalog tells running workers to drop derived state) ---
+    DATA_VERSION_CHECK_SECONDS = float(os.environ.get('DATA_VERSION_CHECK_SECONDS', 5))
+    
+    # --- HTTP Caching (Cache-Control per conditional GET endpoint) ---
+    CACHE_CONTROL_POLICIES = {
+        'reference': 'public, max-age=300',             # categories, manufacturers
+        'product_list': 'private, no-cache',            # always revalidate; 304 when unchanged
+        'product_page': 'private, max-age=30, must-revalidate'
+    }
+    
+    # --- Product Listings ---
+    PRODUCT_BATCH_MAX_IDS = int(os.environ.get('PRODUCT_BATCH_MAX_IDS', 500))  # per /api/products/batch call
+    
+    # --- Search Configuration ---
+    # memory (in-process inverted index), sqlite_fts (FTS5) or mysql_fulltext
+    SEARCH_BACKEND = os.environ.get('SEARCH_BACKEND', 'memory')
+    SEARCH_MAX_CANDIDATES = int(os.environ.get('SEARCH_MAX_CANDIDATES', 10000))
+    SEARCH_REBUILD_SECONDS = int(os.environ.get('SEARCH_REBUILD_SECONDS', 900))  # background rebuild; picks up other workers' writes
+    FUZZY_SEARCH_ENABLED = os.environ.get('FUZZY_SEARCH_ENABLED', 'True').lower() == 'true'
+    FUZZY_MIN_SIMILARITY = float(os.environ.get('FUZZY_MIN_SIMILARITY', 0.3))  # trigram Jaccard, 0-1
+    FUZZY_MAX_EXPANSIONS = 32  # similar indexed words considered per query word
+    
+    # --- Autocomplete ---
+    AUTOCOMPLETE_TOP_K = int(os.environ.get('AUTOCOMPLETE_TOP_K', 10))  # suggestions cached per prefix; max limit
+    AUTOCOMPLETE_REBUILD_SECONDS = int(os.environ.get('AUTOCOMPLETE_REBUILD_SECONDS', 3600))  # popularity refresh
+    
+    # --- Facet Counts (?facets= on /api/products and /api/search) ---
+    FACET_PRICE_BUCKETS = [
+        float(edge) for edge in os.environ.get('FACET_PRICE_BUCKETS', '100,250,500,1000').split(',')
+    ]  # ascending bucket edges
+    FACET_MAX_VALUES = int(os.environ.get('FACET_MAX_VALUES', 20))  # categories/manufacturers per facet
+    FACET_MASK_CACHE_SIZE = int(os.environ.get('FACET_MASK_CACHE_SIZE', 128))  # per-value masks kept, one byte per product each
+    FACET_REBUILD_SECONDS = int(os.environ.get('FACET_REBUILD_SECONDS', 300))  # background rebuild; picks up other workers' writes
+    
+    # --- Orders ---
+    ORDER_RESERVATION_MINUTES = int(os.environ.get('ORDER_RESERVATION_MINUTES', 30))  # unpaid, non-COD orders
+    
     # --- CORS Configuration ---
     CORS_ORIGINS = ['http://localhost:3000', 'http://127.0.0.1:3000']
 
@@ -34,6 +124,7 @@ class DevelopmentConfig(Config):
     """Development configuration."""
     DEBUG = True
     TESTING = False
+    METRICS_RESET_ENABLED = True
 
 class ProductionConfig(Config):
     """Production configuration."""
@@ -46,11 +137,23 @@ class TestingConfig(Config):
     DEBUG = True
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    BCRYPT_ROUNDS = 4  # the minimum; tests don't need slow hashes
+
+class BenchmarkConfig(Config):
+    """Benchmark configuration (local SQLite file, no debug overhead)."""
+    DEBUG = False
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = os.environ.get('BENCHMARK_DATABASE_URI', 'sqlite:///benchmark.db')
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    RATE_LIMIT_ENABLED = False  # scenarios replay far more requests than any budget allows
+    METRICS_RESET_ENABLED = True
 
 # Configuration map
 config_map = {
     'development': DevelopmentConfig,
     'production': ProductionConfig,
     'testing': TestingConfig,
+    'benchmark': BenchmarkConfig,
     'default': DevelopmentConfig
 }
\ No newline at end of file
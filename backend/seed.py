@@ -4,6 +4,7 @@ from app.models import (
     db, User, Product, Salt, FAQ, Review, Manufacturer, 
     Category, ProductSalt, Substitute
 )
+from app.substitutes import compute_substitutes
 from datetime import datetime, date
 import random
 
@@ -312,6 +313,10 @@ with app.app_context():
     
     db.session.commit()
 
+    # --- Compute Substitutes from salt composition ---
+    print("Computing substitutes from salt composition...")
+    computed = compute_substitutes()
+
     # --- Create FAQs ---
     print("Creating FAQs...")
     faqs = [
@@ -420,6 +425,7 @@ with app.app_context():
     print(f"✅ Created {len(products)} products")
     print(f"✅ Created {len(product_salt_associations)} product-salt associations")
     print(f"✅ Created {len(substitutes)} substitute relationships")
+    print(f"✅ Computed {computed['substitutes']} substitutes from salt composition")
     print(f"✅ Created {len(faqs)} FAQs")
     print(f"✅ Created {len(reviews)} reviews")
     print("\n🔐 Test Login Credentials:")
@@ -0,0 +1,94 @@
+# backend/tests/conftest.py
+from contextlib import contextmanager
+from decimal import Decimal
+import pytest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+import config
+from app import create_app
+from app.models import db, Manufacturer, Product, User
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """Testing app on a fresh SQLite file (a file, so threads share it)"""
+    monkeypatch.setattr(config.TestingConfig, 'SQLALCHEMY_DATABASE_URI', f"sqlite:///{tmp_path / 'test.db'}")
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def user(app):
+    with app.app_context():
+        user = User(username='tester', email='tester@example.com', first_name='Test')
+        user.set_password('password123')
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+
+@pytest.fixture
+def auth_headers(app, user):
+    with app.app_context():
+        token = create_access_token(identity='tester')
+    return {'Authorization': f'Bearer {token}'}
+
+
+@pytest.fixture
+def make_product(app):
+    """Create an active product (and its manufacturer on first use); returns its id"""
+    counter = iter(range(1, 10000))
+
+    def make(name=None, **columns):
+        number = next(counter)
+        with app.app_context():
+            manufacturer = Manufacturer.query.filter_by(name='Test Pharma').first()
+            if manufacturer is None:
+                manufacturer = Manufacturer(name='Test Pharma')
+                db.session.add(manufacturer)
+                db.session.flush()
+            columns.setdefault('price', Decimal('10.00'))
+            columns.setdefault('stock_quantity', 100)
+            product = Product(name=name or f'Product {number}', sku=f'TST{number:04d}',
+                              manufacturer_id=manufacturer.id, **columns)
+            db.session.add(product)
+            db.session.commit()
+            return product.id
+    return make
+
+
+@pytest.fixture
+def count_queries(app):
+    """Context manager yielding a dict whose 'queries' is set on exit"""
+    with app.app_context():
+        engine = db.engine
+    active = {'count': None}
+
+    def before_cursor_execute(*args):
+        if active['count'] is not None:
+            active['count'] += 1
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+
+    @contextmanager
+    def measure():
+        result = {}
+        active['count'] = 0
+        try:
+            yield result
+        finally:
+            result['queries'], active['count'] = active['count'], None
+
+    yield measure
+    event.remove(engine, 'before_cursor_execute', before_cursor_execute)
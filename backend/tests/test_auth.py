@@ -0,0 +1,56 @@
+# backend/tests/test_auth.py
+import pytest
+from flask_jwt_extended import create_access_token
+from app.auth import token_claims, user_cache
+from app.models import db, User
+
+
+@pytest.fixture
+def auth_headers(app, user):
+    """A token carrying the uid claim, so every request goes through the cache"""
+    with app.app_context():
+        token = create_access_token(identity='tester', additional_claims=token_claims(db.session.get(User, user)))
+    return {'Authorization': f'Bearer {token}'}
+
+
+def profile(client, auth_headers):
+    return client.get('/api/profile', headers=auth_headers)
+
+
+def test_committed_user_edits_evict_the_cached_snapshot(app, client, auth_headers, user):
+    assert profile(client, auth_headers).get_json()['user']['first_name'] == 'Test'
+    assert user_cache.cache.peek(user) is not None
+
+    with app.app_context():
+        db.session.get(User, user).first_name = 'Renamed'
+        db.session.flush()
+        assert user_cache.cache.peek(user) is not None  # evicted on commit only
+        db.session.commit()
+    assert user_cache.cache.peek(user) is None
+    assert profile(client, auth_headers).get_json()['user']['first_name'] == 'Renamed'
+
+    with app.app_context():
+        db.session.get(User, user).is_active = False
+        db.session.commit()
+    assert profile(client, auth_headers).status_code == 404
+
+
+def test_rolled_back_user_edits_keep_the_snapshot(app, client, auth_headers, user):
+    assert profile(client, auth_headers).status_code == 200
+
+    with app.app_context():
+        db.session.get(User, user).first_name = 'Discarded'
+        db.session.flush()
+        db.session.rollback()
+        db.session.commit()
+    assert user_cache.cache.peek(user) is not None
+    assert profile(client, auth_headers).get_json()['user']['first_name'] == 'Test'
+
+
+def test_deleted_users_are_evicted(app, client, auth_headers, user):
+    assert profile(client, auth_headers).status_code == 200
+
+    with app.app_context():
+        db.session.delete(db.session.get(User, user))
+        db.session.commit()
+    assert profile(client, auth_headers).status_code == 404
@@ -0,0 +1,27 @@
+# backend/tests/test_batch.py
+import pytest
+
+
+def test_batch_keeps_order_and_reports_missing(client, auth_headers, make_product):
+    first, second = make_product(), make_product()
+    response = client.post('/api/products/batch', headers=auth_headers, json={'ids': [second, 999, first, second]})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert [product['id'] for product in body['products']] == [second, first]
+    assert body['missing'] == [999]
+
+    response = client.get(f'/api/products/batch?ids={first}, {second}', headers=auth_headers)
+    assert [product['id'] for product in response.get_json()['products']] == [first, second]
+
+
+@pytest.mark.parametrize('bad_id', [1.9, '1', True, None, [1]])
+def test_batch_rejects_non_integer_json_ids(client, auth_headers, make_product, bad_id):
+    make_product()
+    response = client.post('/api/products/batch', headers=auth_headers, json={'ids': [bad_id]})
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize('bad_ids', ['1.9', 'abc', '-1', '1,2x', '²'])
+def test_batch_rejects_non_integer_query_ids(client, auth_headers, bad_ids):
+    response = client.get(f'/api/products/batch?ids={bad_ids}', headers=auth_headers)
+    assert response.status_code == 400
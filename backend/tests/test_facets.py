@@ -0,0 +1,60 @@
+# backend/tests/test_facets.py
+from decimal import Decimal
+from app.facets import FacetIndex, facet_counter
+from app.models import db, Product
+
+
+def test_refresh_keeps_positions_for_facet_neutral_edits(app, make_product):
+    product_id = make_product(price=Decimal('50.00'))
+    with app.app_context():
+        facet_counter.refresh()
+        index = facet_counter.index
+        position = index._positions[product_id]
+
+        db.session.get(Product, product_id).stock_quantity = 7
+        db.session.commit()
+        facet_counter.refresh()
+        assert facet_counter.index is index
+        assert index._positions[product_id] == position
+        assert index.dead == 0
+
+        db.session.get(Product, product_id).price = Decimal('300.00')
+        db.session.commit()
+        facet_counter.refresh()
+        assert index._positions[product_id] != position
+        assert index.dead == 1
+
+        db.session.get(Product, product_id).is_active = False
+        db.session.commit()
+        facet_counter.refresh()
+        assert product_id not in index._positions
+        assert index.dead == 2
+
+
+def test_value_mask_cache_is_bounded():
+    rows = [(product_id, product_id % 7, product_id, 50.0, False) for product_id in range(1, 201)]
+    index = FacetIndex(rows, mask_cache_size=16)
+    for manufacturer_id in range(1, 401):  # half of them unknown to the index
+        index.counts(['category'], {'manufacturer': manufacturer_id})
+    assert len(index._value_masks) <= 16
+    assert all(facet != 'manufacturer' or value <= 200 for facet, value in index._value_masks)
+
+    assert +index.counts(['category'], {'manufacturer': 14})['category'] == {0: 1}
+    assert +index.counts(['category'], {'manufacturer': 999})['category'] == {}
+
+
+def test_periodic_rebuild_sees_writes_from_other_processes(app, make_product):
+    make_product()
+    with app.app_context():
+        assert facet_counter.counts(['prescription'])['prescription'][0]['count'] == 1
+
+        # A Core write, as another worker or CLI command would make it, queues nothing here
+        db.session.execute(Product.__table__.insert().values(
+            name='Other', sku='OTHER1', manufacturer_id=1, price=5, is_active=True, prescription_required=True
+        ))
+        db.session.commit()
+        facet_counter._built_at -= facet_counter.rebuild_seconds + 1
+        with facet_counter._lock:  # the rebuild cannot swap in yet; the old index answers
+            assert facet_counter.counts(['prescription'])['prescription'][0]['count'] == 1
+        facet_counter.wait_for_rebuild()
+        assert facet_counter.counts(['prescription'])['prescription'][0]['count'] == 2
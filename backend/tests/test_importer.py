@@ -0,0 +1,69 @@
+# backend/tests/test_importer.py
+from sqlalchemy import text
+from app.importer import import_catalog
+from app.models import db, Product, ProductSalt
+from app.search import search_engine
+from app.versions import data_versions
+
+
+def write(path, content):
+    path.write_text(content, encoding='utf-8')
+    return str(path)
+
+
+def test_blank_cells_keep_column_defaults(app, tmp_path):
+    products = write(tmp_path / 'products.csv',
+                     'sku,name,manufacturer,price,stock_quantity,is_active,prescription_required,discount_percentage\n'
+                     'IMP0001,Blankol,Acme,12.50,,,,\n')
+    with app.app_context():
+        reports = import_catalog({'products': products})
+        assert reports['products']['imported'] == 1
+        product = Product.query.filter_by(sku='IMP0001').one()
+        assert product.is_active is True
+        assert product.stock_quantity == 0
+        assert product.prescription_required is True
+        assert product.discount_percentage == 0.0
+
+
+def test_blank_cells_do_not_clear_stored_values(app, tmp_path):
+    with app.app_context():
+        import_catalog({'products': write(tmp_path / 'first.csv',
+                                          'sku,name,manufacturer,price,stock_quantity\n'
+                                          'IMP0002,Keepol,Acme,5.00,40\n')})
+        import_catalog({'products': write(tmp_path / 'second.csv',
+                                          'sku,name,manufacturer,price,stock_quantity\n'
+                                          'IMP0002,Keepol,Acme,6.00,\n')})
+        product = Product.query.filter_by(sku='IMP0002').one()
+        assert product.stock_quantity == 40
+        assert product.is_active is True
+
+
+def test_duplicate_compositions_last_row_wins(app, tmp_path):
+    products = write(tmp_path / 'products.csv',
+                     'sku,name,manufacturer,price\nIMP0003,Twinol,Acme,3.00\n')
+    compositions = write(tmp_path / 'compositions.csv',
+                         'sku,salt,strength\n'
+                         'IMP0003,Paracetamol,250mg\n'
+                         'IMP0003,Caffeine,30mg\n'
+                         'IMP0003,Paracetamol,500mg\n')
+    with app.app_context():
+        # A chunk size of 2 puts the duplicate pair in different chunks
+        reports = import_catalog({'products': products, 'compositions': compositions}, chunk_size=2)
+        assert reports['compositions']['rejected'] == 0
+        product = Product.query.filter_by(sku='IMP0003').one()
+        strengths = sorted(row.strength for row in ProductSalt.query.filter_by(product_id=product.id))
+        assert strengths == ['30mg', '500mg']
+
+
+def test_catalog_version_invalidates_other_workers(app, client, make_product):
+    make_product('Versionol')
+    with app.app_context():
+        data_versions.check()  # baseline
+        search_engine.refresh()
+        assert not search_engine._expired
+
+        # What another process's import-catalog leaves behind
+        data_versions.bump('catalog')
+        db.session.commit()
+        data_versions.check()
+        assert search_engine._expired
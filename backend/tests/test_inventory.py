@@ -0,0 +1,53 @@
+# backend/tests/test_inventory.py
+import threading
+from sqlalchemy import func
+from app.models import db, Order, OrderItem, Product
+
+INITIAL_STOCK = 100
+THREADS = 8
+ATTEMPTS_PER_THREAD = 20
+CANCEL_EVERY = 5  # each thread cancels every Nth successful order
+
+
+def test_concurrent_checkouts_never_oversell(app, auth_headers, make_product):
+    """Threads race checkouts (and some cancellations) for one hot SKU"""
+    hot_id = make_product(name='Hot SKU', stock_quantity=INITIAL_STOCK)
+    outcomes = {'created': 0, 'rejected': 0, 'cancelled': 0, 'errors': 0}
+    lock = threading.Lock()
+
+    def worker():
+        client = app.test_client()
+        placed = 0
+        for _ in range(ATTEMPTS_PER_THREAD):
+            response = client.post('/api/orders', headers=auth_headers, json={
+                'items': [{'product_id': hot_id, 'quantity': 1}],
+                'payment_method': 'UPI'
+            })
+            key = {201: 'created', 409: 'rejected'}.get(response.status_code, 'errors')
+            with lock:
+                outcomes[key] += 1
+            if response.status_code == 201:
+                placed += 1
+                if placed % CANCEL_EVERY == 0:
+                    order_id = response.get_json()['order']['id']
+                    if client.post(f'/api/orders/{order_id}/cancel', headers=auth_headers).status_code == 200:
+                        with lock:
+                            outcomes['cancelled'] += 1
+
+    threads = [threading.Thread(target=worker) for _ in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    with app.app_context():
+        stock = db.session.get(Product, hot_id).stock_quantity
+        held = db.session.query(func.coalesce(func.sum(OrderItem.quantity), 0)).join(Order).filter(
+            Order.status.in_(('pending', 'confirmed'))
+        ).scalar()
+
+    assert outcomes['errors'] == 0
+    assert outcomes['rejected'] > 0, 'the race never ran out of stock'
+    assert stock >= 0, 'stock went negative'
+    assert stock + held == INITIAL_STOCK, 'stock leaked or was oversold'
+    assert outcomes['created'] - outcomes['cancelled'] == held
@@ -0,0 +1,59 @@
+# backend/tests/test_listings.py
+from sqlalchemy import delete
+from app.categories import category_tree_maintainer
+from app.models import db, Category, CategoryClosure, Review
+
+
+def add_reviews(app, product_id, *ratings):
+    with app.app_context():
+        for rating in ratings:
+            db.session.add(Review(product_id=product_id, rating=rating, comment='Review'))
+        db.session.commit()
+
+
+def test_products_sort_by_rating_with_cursor(app, client, auth_headers, make_product):
+    unrated, good, best, tied = (make_product() for _ in range(4))
+    add_reviews(app, good, 4, 3)
+    add_reviews(app, best, 5, 5, 4)
+    add_reviews(app, tied, 3, 4)
+
+    seen = []
+    cursor = ''
+    while True:
+        page = client.get(f'/api/products?sort=-rating&per_page=1&cursor={cursor}', headers=auth_headers).get_json()
+        seen += [product['id'] for product in page['products']]
+        cursor = page['pagination']['next_cursor']
+        if cursor is None:
+            break
+    assert seen == [best, tied, good, unrated]
+
+    page = client.get('/api/products?sort=rating', headers=auth_headers).get_json()
+    assert [product['id'] for product in page['products']] == [unrated, good, tied, best]
+
+
+def test_rating_listing_etag_changes_with_reviews(app, client, auth_headers, make_product):
+    product_id = make_product()
+    first = client.get('/api/products?sort=-rating', headers=auth_headers)
+    add_reviews(app, product_id, 5)
+    second = client.get('/api/products?sort=-rating', headers={**auth_headers, 'If-None-Match': first.headers['ETag']})
+    assert second.status_code == 200
+
+
+def test_category_filter_rebuilds_an_empty_closure(app, client, auth_headers, make_product):
+    with app.app_context():
+        parent = Category(name='Pain Relief')
+        db.session.add(parent)
+        db.session.flush()
+        child = Category(name='Headache', parent_id=parent.id)
+        db.session.add(child)
+        db.session.commit()
+        parent_id, child_id = parent.id, child.id
+        # A database whose categories predate the closure table
+        db.session.execute(delete(CategoryClosure.__table__))
+        db.session.commit()
+    product_id = make_product(category_id=child_id)
+    category_tree_maintainer._closure_checked = False
+
+    response = client.get(f'/api/products?category_id={parent_id}', headers=auth_headers)
+    assert response.status_code == 200
+    assert [product['id'] for product in response.get_json()['products']] == [product_id]
@@ -0,0 +1,19 @@
+# backend/tests/test_metrics.py
+from app.metrics import request_metrics
+
+
+def test_metrics_reset_needs_post_and_config(app, client, auth_headers):
+    client.get('/api/health')
+    assert 'GET /api/health' in request_metrics.stats()['endpoints']
+
+    # A GET never clears anything
+    client.get('/api/metrics?reset=true', headers=auth_headers)
+    assert 'GET /api/health' in request_metrics.stats()['endpoints']
+
+    app.config['METRICS_RESET_ENABLED'] = False
+    assert client.post('/api/metrics/reset', headers=auth_headers).status_code == 403
+    assert 'GET /api/health' in request_metrics.stats()['endpoints']
+
+    app.config['METRICS_RESET_ENABLED'] = True
+    assert client.post('/api/metrics/reset', headers=auth_headers).status_code == 200
+    assert 'GET /api/health' not in request_metrics.stats()['endpoints']
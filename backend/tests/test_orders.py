@@ -0,0 +1,24 @@
+# backend/tests/test_orders.py
+import pytest
+
+
+@pytest.mark.parametrize('product_id', [True, False, '1', 1.0, None])
+def test_create_order_rejects_non_integer_product_ids(client, auth_headers, make_product, product_id):
+    make_product()
+    response = client.post('/api/orders', headers=auth_headers, json={
+        'items': [{'product_id': product_id, 'quantity': 1}],
+        'payment_method': 'UPI'
+    })
+    assert response.status_code == 400
+    assert response.get_json()['errors'][0]['error'] == 'product_id must be an integer'
+
+
+def test_create_order_takes_stock(client, auth_headers, make_product):
+    product_id = make_product(stock_quantity=5)
+    response = client.post('/api/orders', headers=auth_headers, json={
+        'items': [{'product_id': product_id, 'quantity': 2}],
+        'payment_method': 'UPI'
+    })
+    assert response.status_code == 201
+    product = client.get(f'/api/products/batch?ids={product_id}&fields=stock_quantity', headers=auth_headers)
+    assert product.get_json()['products'][0]['stock_quantity'] == 3
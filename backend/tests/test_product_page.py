@@ -0,0 +1,100 @@
+# backend/tests/test_product_page.py
+import pytest
+from app.cache import product_page_cache
+from app.metrics import QueryBudgetExceeded, query_budget
+from app.models import db, FAQ, Product, ProductSalt, Review, Salt, Substitute
+
+
+def add_relations(app, make_product, product_id, count):
+    """Give a product `count` salts (each with a FAQ), substitutes, reviews and FAQs"""
+    substitute_ids = [make_product() for _ in range(count)]
+    with app.app_context():
+        for number in range(count):
+            salt = Salt(name=f'Salt {product_id}-{number}')
+            db.session.add(salt)
+            db.session.flush()
+            db.session.add(ProductSalt(product_id=product_id, salt_id=salt.id, strength='100mg'))
+            db.session.add(FAQ(salt_id=salt.id, question='Salt question?', answer='Answer.'))
+            db.session.add(FAQ(product_id=product_id, question='Product question?', answer='Answer.'))
+            db.session.add(Substitute(product_id=product_id, substitute_product_id=substitute_ids[number],
+                                      similarity_score=0.5))
+            db.session.add(Review(product_id=product_id, rating=4, comment='Fine'))
+        db.session.commit()
+
+
+def test_product_page_query_count_is_constant(app, client, auth_headers, make_product, count_queries):
+    small, large = make_product(), make_product()
+    add_relations(app, make_product, small, 1)
+    add_relations(app, make_product, large, 6)
+
+    # Warm the per-process reference data, then time cold page builds only
+    assert client.get(f'/api/product/{small}', headers=auth_headers).status_code == 200
+    product_page_cache.clear()
+
+    with count_queries() as one:
+        response = client.get(f'/api/product/{small}', headers=auth_headers)
+    assert response.status_code == 200
+    with count_queries() as many:
+        response = client.get(f'/api/product/{large}', headers=auth_headers)
+    assert response.status_code == 200
+
+    page = response.get_json()
+    assert len(page['salt_content']) == 6
+    assert len(page['substitutes']) == 6
+    assert len(page['reviews']) == 6
+    assert len(page['faqs']) == 12
+    assert one['queries'] == many['queries']
+
+
+def test_committed_writes_evict_dependent_pages(app, client, auth_headers, make_product):
+    product_id, other_id = make_product('Cachol'), make_product('Otherol')
+    add_relations(app, make_product, product_id, 1)
+    for page in (product_id, other_id):
+        assert client.get(f'/api/product/{page}', headers=auth_headers).status_code == 200
+    assert product_page_cache.get(product_id) is not None
+
+    with app.app_context():
+        db.session.get(Product, product_id).name = 'Renamol'
+        db.session.flush()
+        assert product_page_cache.get(product_id) is not None  # evicted on commit only
+        db.session.commit()
+    assert product_page_cache.get(product_id) is None
+    assert product_page_cache.get(other_id) is not None
+    page = client.get(f'/api/product/{product_id}', headers=auth_headers).get_json()
+    assert page['product_details']['name'] == 'Renamol'
+
+    # An embedded row evicts the page too
+    with app.app_context():
+        salt = Salt.query.filter_by(name=f'Salt {product_id}-0').one()
+        salt.name = 'Renamed salt'
+        db.session.commit()
+    assert product_page_cache.get(product_id) is None
+    page = client.get(f'/api/product/{product_id}', headers=auth_headers).get_json()
+    assert 'Renamed salt' in str(page['salt_content'])
+
+
+def test_rolled_back_writes_keep_cached_pages(app, client, auth_headers, make_product):
+    product_id = make_product()
+    assert client.get(f'/api/product/{product_id}', headers=auth_headers).status_code == 200
+
+    with app.app_context():
+        db.session.get(Product, product_id).name = 'Discarded'
+        db.session.flush()
+        db.session.rollback()
+        db.session.commit()
+    assert product_page_cache.get(product_id) is not None
+
+
+def test_query_budget_raises_in_testing(app, make_product):
+    product_id = make_product()
+
+    @query_budget(1)
+    def view():
+        for _ in range(2):
+            db.session.get(Salt, product_id)
+            db.session.expire_all()
+        return 'ok'
+
+    with app.test_request_context():
+        with pytest.raises(QueryBudgetExceeded):
+            view()
@@ -0,0 +1,66 @@
+# backend/tests/test_ratelimit.py
+import types
+import pytest
+from app import ratelimit
+from app.ratelimit import MemoryStore
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A settable stand-in for time.monotonic() inside the rate limiter"""
+    now = types.SimpleNamespace(value=1000.0)
+    monkeypatch.setattr(ratelimit, 'time', types.SimpleNamespace(monotonic=lambda: now.value))
+    return now
+
+
+def test_bucket_allows_its_burst_then_refills_at_the_rate(clock):
+    store = MemoryStore()
+    assert [store.consume('k', 2.0, 3)[:2] for _ in range(3)] == [(True, 2), (True, 1), (True, 0)]
+
+    allowed, remaining, retry_after = store.consume('k', 2.0, 3)
+    assert (allowed, remaining) == (False, 0)
+    assert retry_after == pytest.approx(0.5)
+
+    clock.value += 0.5
+    assert store.consume('k', 2.0, 3)[0]
+    assert not store.consume('k', 2.0, 3)[0]
+    clock.value += 60
+    assert store.consume('k', 2.0, 3)[:2] == (True, 2)  # capped at the burst
+    assert store.consume('other', 2.0, 3)[:2] == (True, 2)
+
+
+def test_least_recently_used_bucket_is_evicted_past_the_limit(clock):
+    store = MemoryStore(max_buckets=2)
+    for key in ('a', 'b'):
+        store.consume(key, 1.0, 1)
+    store.consume('a', 1.0, 1)  # touch a, so b is the oldest
+    store.consume('c', 1.0, 1)
+    assert len(store) == 2
+    assert store.consume('a', 1.0, 1)[0] is False
+    assert store.consume('b', 1.0, 1)[0] is True  # forgotten, so full again
+
+
+def test_refilled_buckets_are_dropped(clock):
+    store = MemoryStore()
+    for key in ('a', 'b', 'c'):
+        store.consume(key, 1.0, 2)
+    clock.value += 1
+    store.consume('d', 1.0, 2)
+    assert len(store) == 2  # a and b were full again; c is next
+    clock.value += 1
+    store.consume('d', 1.0, 2)
+    assert len(store) == 1
+
+
+def test_login_budget_covers_the_address_and_the_account(client):
+    def login(username, address):
+        return client.post('/api/login', json={'username': username, 'password': 'wrong'},
+                           environ_base={'REMOTE_ADDR': address})
+
+    for _ in range(5):
+        assert login('victim', '10.0.0.1').status_code == 401
+    response = login('victim', '10.0.0.2')
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) >= 1
+    assert login('someone', '10.0.0.1').status_code == 429
+    assert login('someone', '10.0.0.3').status_code == 401
@@ -0,0 +1,77 @@
+# backend/tests/test_reference.py
+import threading
+import time
+import pytest
+from app.models import db, Manufacturer
+from app.reference import MemoryBackend, ReferenceCache, reference_cache
+
+
+def worker_cache(backend):
+    """A ReferenceCache as another worker process would hold it, sharing `backend`"""
+    cache = ReferenceCache()
+    cache.register('manufacturers', Manufacturer)
+    cache.backend = backend
+    return cache
+
+
+@pytest.fixture
+def slow_loads(monkeypatch):
+    """Make every database load of `cache` take a while, so refills overlap"""
+    def slow(cache):
+        load = cache._load
+
+        def slow_load(kind):
+            time.sleep(0.2)
+            return load(kind)
+        monkeypatch.setattr(cache, '_load', slow_load)
+        return cache
+    return slow
+
+
+def run_concurrently(app, calls):
+    barrier = threading.Barrier(len(calls))
+    results = [None] * len(calls)
+
+    def run(index, call):
+        with app.app_context():
+            barrier.wait()
+            results[index] = call()
+
+    threads = [threading.Thread(target=run, args=pair) for pair in enumerate(calls)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_concurrent_misses_in_one_process_load_once(app, make_product, slow_loads):
+    make_product()
+    cache = slow_loads(worker_cache(MemoryBackend()))
+
+    results = run_concurrently(app, [lambda: cache.rows('manufacturers')] * 8)
+    assert all(rows is results[0] for rows in results)
+    assert [row['name'] for row in results[0]] == ['Test Pharma']
+    assert cache.db_loads == 1
+    assert cache.refills == 1
+    assert cache.hits == 7
+
+
+def test_concurrent_misses_across_processes_load_once(app, make_product, slow_loads):
+    make_product()
+    backend = MemoryBackend()
+    workers = [slow_loads(worker_cache(backend)) for _ in range(4)]
+
+    results = run_concurrently(app, [lambda cache=cache: cache.rows('manufacturers') for cache in workers])
+    assert all(rows == results[0] for rows in results)
+    assert sum(cache.db_loads for cache in workers) == 1
+    assert sum(cache.refills for cache in workers) == 4
+
+
+def test_committed_writes_bump_the_shared_version(app, make_product):
+    make_product()
+    with app.app_context():
+        assert [row['name'] for row in reference_cache.rows('manufacturers')] == ['Test Pharma']
+        db.session.get(Manufacturer, 1).name = 'Renamed Pharma'
+        db.session.commit()
+        assert [row['name'] for row in reference_cache.rows('manufacturers')] == ['Renamed Pharma']
@@ -0,0 +1,59 @@
+# backend/tests/test_replicas.py
+import sqlite3
+import pytest
+import config
+from app.models import db
+from app.replicas import replica_router
+from app.search import search_engine
+
+
+@pytest.fixture
+def replica(tmp_path, monkeypatch):
+    path = tmp_path / 'replica.db'
+    monkeypatch.setattr(config.TestingConfig, 'SQLALCHEMY_REPLICA_URIS', [f'sqlite:///{path}'])
+    return path
+
+
+@pytest.fixture
+def app(replica, app):
+    """The conftest app, built with one SQLite replica configured"""
+    yield app
+    db.metadatas.pop('replica_1', None)  # registered on the shared db by init_app
+
+
+def sync(app):
+    assert 'Synced replica_1' in app.test_cli_runner().invoke(args=['sync-replicas']).output
+
+
+def test_index_refills_read_the_primary(app, make_product, replica):
+    make_product('Aspirol')
+    sync(app)
+    # Another worker's write the replica has not caught up with
+    primary = sqlite3.connect(app.config['SQLALCHEMY_DATABASE_URI'].removeprefix('sqlite:///'))
+    primary.execute(
+        "INSERT INTO products (name, sku, manufacturer_id, price, stock_quantity, is_active, prescription_required) "
+        "VALUES ('Lagol', 'LAG0001', 1, 5, 10, 1, 0)"
+    )
+    primary.commit()
+    primary.close()
+
+    with app.test_request_context('/api/search?q=lagol'):
+        search_engine.invalidate()
+        ids, _ = search_engine.match_ids('lagol')
+    assert len(ids) == 1
+
+
+def test_writes_pin_the_identity_not_the_address(app, client, auth_headers, make_product):
+    product_id = make_product()
+    sync(app)
+
+    response = client.post(f'/api/product/{product_id}/reviews', json={'rating': 5, 'comment': 'Good'},
+                           headers=auth_headers)
+    assert response.status_code == 201
+    assert set(replica_router._pins) == {'user:tester'}
+
+    response = client.post('/api/register', json={
+        'username': 'newcomer', 'email': 'newcomer@example.com', 'password': 'password123'
+    })
+    assert response.status_code == 201
+    assert set(replica_router._pins) == {'user:tester', 'addr:127.0.0.1'}
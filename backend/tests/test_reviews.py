@@ -0,0 +1,58 @@
+# backend/tests/test_reviews.py
+import pytest
+from app.models import db, ProductReviewStats, Review
+from app.reviews import rebuild_review_stats
+
+STATS = ('review_count', 'rating_sum', 'rating_1', 'rating_2', 'rating_3', 'rating_4', 'rating_5', 'verified_count')
+
+
+def stats_of(product_id):
+    row = db.session.get(ProductReviewStats, product_id)
+    return {column: getattr(row, column) for column in STATS} if row else None
+
+
+@pytest.mark.parametrize('rating', [4.5, 0, 6, True, '5'])
+def test_review_rating_must_be_an_integer_from_1_to_5(client, auth_headers, make_product, rating):
+    product_id = make_product()
+    response = client.post(f'/api/product/{product_id}/reviews', json={'rating': rating, 'comment': 'Hm'},
+                           headers=auth_headers)
+    assert response.status_code == 400
+
+
+def test_rebuild_skips_the_ratings_the_incremental_path_skips(app, make_product):
+    product_id = make_product()
+    with app.app_context():
+        db.session.add_all([Review(product_id=product_id, rating=5, comment='Good'),
+                            Review(product_id=product_id, rating=9, comment='Out of range')])
+        db.session.commit()
+        incremental = stats_of(product_id)
+        assert incremental['review_count'] == 1
+
+        rebuild_review_stats()
+        db.session.expire_all()
+        assert stats_of(product_id) == incremental
+
+
+def test_incremental_stats_match_rebuild(app, make_product):
+    first, second = make_product(), make_product()
+    with app.app_context():
+        reviews = [Review(product_id=first, rating=rating, comment='Ok', verified_purchase=rating > 3)
+                   for rating in (1, 3, 4, 5, 5)]
+        reviews.append(Review(product_id=second, rating=2, comment='Meh'))
+        db.session.add_all(reviews)
+        db.session.commit()
+
+        reviews[0].rating = 4                 # edit
+        reviews[1].is_active = False          # hide
+        reviews[2].product_id = second        # move
+        reviews[3].verified_purchase = False  # unverify
+        db.session.delete(reviews[4])
+        db.session.commit()
+        incremental = {product_id: stats_of(product_id) for product_id in (first, second)}
+        assert incremental[first]['review_count'] == 2
+        assert incremental[second]['review_count'] == 2
+
+    result = app.test_cli_runner().invoke(args=['rebuild-review-stats'])
+    assert 'Rebuilt review stats for 2 products' in result.output
+    with app.app_context():
+        assert {product_id: stats_of(product_id) for product_id in (first, second)} == incremental
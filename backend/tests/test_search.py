@@ -0,0 +1,78 @@
+# backend/tests/test_search.py
+import time
+from app.models import db, Product, ProductSalt, Salt
+from app.search import SQLiteFTSSearchBackend, search_engine
+
+
+def test_products_search_reports_truncation(app, client, auth_headers, make_product):
+    for _ in range(3):
+        make_product(name='Zyzzyva tablet')
+    search_engine.max_candidates = 2
+
+    page = client.get('/api/products?search=zyzzyva', headers=auth_headers).get_json()
+    assert len(page['products']) == 2
+    assert page['pagination']['search_truncated'] is True
+
+    search_engine.max_candidates = 10
+    page = client.get('/api/products?search=zyzzyva', headers=auth_headers).get_json()
+    assert page['pagination']['total'] == 3
+    assert page['pagination']['search_truncated'] is False
+
+
+def test_periodic_rebuild_sees_writes_from_other_processes(app, client, auth_headers, make_product):
+    make_product(name='Zyzzyva tablet')
+    assert client.get('/api/search?q=zyzzyva', headers=auth_headers).get_json()['pagination']['total'] == 1
+
+    # A Core write, as another worker or CLI command would make it, queues nothing here
+    with app.app_context():
+        db.session.execute(Product.__table__.insert().values(
+            name='Zyzzyva syrup', sku='OTHER1', manufacturer_id=1, price=5, is_active=True
+        ))
+        db.session.commit()
+    assert client.get('/api/search?q=zyzzyva', headers=auth_headers).get_json()['pagination']['total'] == 1
+
+    # The due rebuild runs in the background; the old index answers meanwhile
+    search_engine._built_at = time.monotonic() - search_engine.rebuild_seconds - 1
+    with search_engine._lock:
+        assert client.get('/api/search?q=zyzzyva', headers=auth_headers).get_json()['pagination']['total'] == 1
+    search_engine.wait_for_rebuild()
+    assert client.get('/api/search?q=zyzzyva', headers=auth_headers).get_json()['pagination']['total'] == 2
+
+
+def test_products_search_etag_changes_when_a_salt_is_renamed(app, client, auth_headers, make_product):
+    product_id = make_product(name='Plain tablet')
+    with app.app_context():
+        salt = Salt(name='Zyzzyvamol')
+        db.session.add(salt)
+        db.session.flush()
+        db.session.add(ProductSalt(product_id=product_id, salt_id=salt.id, strength='5mg'))
+        db.session.commit()
+        salt_id = salt.id
+
+    first = client.get('/api/products?search=zyzzyvamol', headers=auth_headers)
+    assert first.get_json()['pagination']['total'] == 1
+    etag = {**auth_headers, 'If-None-Match': first.headers['ETag']}
+    assert client.get('/api/products?search=zyzzyvamol', headers=etag).status_code == 304
+
+    with app.app_context():
+        db.session.get(Salt, salt_id).name = 'Quuxamol'
+        db.session.commit()
+    second = client.get('/api/products?search=zyzzyvamol', headers=etag)
+    assert second.status_code == 200
+    assert second.get_json()['pagination']['total'] == 0
+
+
+def test_persistent_index_is_only_written_when_empty(app, monkeypatch, make_product):
+    make_product(name='Zyzzyva tablet')
+    writes = []
+    monkeypatch.setattr(SQLiteFTSSearchBackend, 'rebuild', lambda self, documents: writes.append(list(documents)))
+    monkeypatch.setattr(SQLiteFTSSearchBackend, 'is_empty', lambda self: not writes)
+
+    with app.app_context():
+        for _ in range(2):  # two workers starting up
+            search_engine.backend, search_engine._built_at = SQLiteFTSSearchBackend(), None
+            search_engine.refresh()
+        assert len(writes) == 1
+
+        search_engine.rebuild()  # rebuild-search-index
+        assert len(writes) == 2